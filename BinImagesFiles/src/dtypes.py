@@ -12,7 +12,31 @@ class Dtypes:
         'float32': 4,
         'float64': 8,
     }
+    DTYPE_CODES = {  # codes stored in the header of versioned .aku files, never reuse or reorder them
+        'uint8': 1,
+        'int8': 2,
+        'uint16': 3,
+        'int16': 4,
+        'uint32': 5,
+        'int32': 6,
+        'uint64': 7,
+        'int64': 8,
+        'float16': 9,
+        'float32': 10,
+        'float64': 11,
+    }
 
     @classmethod
     def get_dtype_bytes(cls, dtype: str):
-        return cls.DTYPE_N_BYTES[dtype]
\ No newline at end of file
+        return cls.DTYPE_N_BYTES[dtype]
+
+    @classmethod
+    def get_dtype_code(cls, dtype: str):
+        return cls.DTYPE_CODES[dtype]
+
+    @classmethod
+    def get_dtype_from_code(cls, code: int):
+        for dtype, dtype_code in cls.DTYPE_CODES.items():
+            if dtype_code == code:
+                return dtype
+        raise ValueError(f"Unknown dtype code {code}")
\ No newline at end of file
@@ -4,7 +4,10 @@ from dtypes import Dtypes
 from interfaces.file import AbstractFile
 
 
-from numpy import ndarray, zeros, random
+from numpy import ndarray, zeros, random, packbits, unpackbits, frombuffer, uint8
+
+
+MASK_HEADER = struct.Struct("<IIB")  # rows, cols, dims of a bit packed mask
         
 
 class FlatFile(AbstractFile):
@@ -45,4 +48,40 @@ class FlatFile(AbstractFile):
             
             bin_file.close()
         
-        return self 
\ No newline at end of file
+        return self
+
+    def write_packed_mask(self, mask: ndarray):
+        """
+        Writes a binary mask with 8 pixels per byte, every row padded to a whole byte.
+
+        Args:
+            mask (ndarray): A boolean mask or a thresholded image, any non zero value is set.
+        """
+        rows, cols = mask.shape[:2]
+        dims = mask.shape[2] if mask.ndim == 3 else 1
+        with open(self._abs_file_path, "wb") as bin_file:
+            bin_file.write(MASK_HEADER.pack(rows, cols, dims))
+            bin_file.write(packbits(mask.reshape(rows, cols*dims) != 0, axis=-1).tobytes())
+        return self
+
+    def read_packed_mask(self, packed: bool = False) -> ndarray:
+        """
+        Reads a mask written by write_packed_mask.
+
+        Args:
+            packed (bool, optional): If True, returns the (rows, packed row bytes) packed mask,
+                otherwise a 0/255 (rows, cols, dims) mask. Defaults to False.
+
+        Returns:
+            ndarray: The mask.
+        """
+        AbstractFile.is_valid_file_path(self._file_path)
+        with open(self._abs_file_path, "rb") as bin_file:
+            rows, cols, dims = MASK_HEADER.unpack(bin_file.read(MASK_HEADER.size))
+            row_bytes = -(-cols*dims // 8)
+            packed_mask = frombuffer(bin_file.read(rows*row_bytes), dtype=uint8).reshape(rows, row_bytes)
+        if packed:
+            return packed_mask
+        mask = unpackbits(packed_mask, axis=-1, count=cols*dims).reshape(rows, cols, dims)
+        mask *= 255
+        return mask
@@ -0,0 +1,48 @@
+import struct
+
+
+# Patient record: id, gender bit and 7 bits age, day (4 bits) month (5 bits) year (7 bits), length of other
+RECORD_PREFIX = struct.Struct("<HBHB")
+MALE_BIT = 0x80
+AGE_MASK = 0x7F
+
+
+def _check_bits(name: str, value: int, bits: int) -> int:
+    if not 0 <= value < (1 << bits):
+        raise ValueError(f"{name} must fit in {bits} bits, got {value}")
+    return value
+
+
+def encode_record(file_content: list) -> bytes:
+    """
+    Encodes a patient record [id, gender, age, day, month, year, other] in a single call.
+
+    Args:
+        file_content (list): The patient record.
+
+    Returns:
+        bytes: The packed record.
+    """
+    id, gender, age, day, month, year, other = file_content
+    gender_n_age = (MALE_BIT if gender == "M" else 0) | _check_bits("age", int(age), 7)
+    date = (_check_bits("day", int(day), 4) << 12) | (_check_bits("month", int(month), 5) << 7) | _check_bits("year", int(year), 7)
+    other = bytes(other, "utf-8")
+    return RECORD_PREFIX.pack(int(id), gender_n_age, date, len(other)) + other
+
+
+def decode_record(buffer, offset: int = 0) -> tuple[list, int]:
+    """
+    Decodes a single patient record.
+
+    Args:
+        buffer (bytes-like): Buffer holding the record.
+        offset (int, optional): Position of the record in the buffer. Defaults to 0.
+
+    Returns:
+        tuple[list, int]: The record [id, gender, age, day, month, year, other] and the position right after it.
+    """
+    id, gender_n_age, date, num_bytes_other = RECORD_PREFIX.unpack_from(buffer, offset)
+    offset += RECORD_PREFIX.size
+    other = bytes(buffer[offset:offset + num_bytes_other]).decode("utf-8")
+    gender = "M" if gender_n_age & MALE_BIT else "F"
+    return [id, gender, gender_n_age & AGE_MASK, date >> 12, (date >> 7) & 0x1F, date & 0x7F, other], offset + num_bytes_other
@@ -0,0 +1,53 @@
+from functools import partial
+from shared_processing.frame_pipeline import FrameWriter, iter_frames, get_video_fps, run_frame_pipeline
+from shared_processing.pool import get_executor
+from plan import rotate_batch
+
+import numpy as np
+
+
+def rotate_frame(frame: np.ndarray, angle: int, interpolation: str = "nearest", canvas="expand") -> np.ndarray:
+    """
+    Rotates a frame with the cached plan of its shape, which persists in every worker of the pool.
+
+    Args:
+        frame (np.ndarray): A gray or BGR frame.
+        angle (int): Rotation angle in degrees.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+
+    Returns:
+        np.ndarray: The rotated frame.
+    """
+    return np.ascontiguousarray(rotate_batch(frame[None], angle, interpolation, canvas)[0])
+
+
+def rotate_frames(source_path: str,
+                  output_path: str,
+                  angle: int,
+                  interpolation: str = "nearest",
+                  canvas="expand",
+                  num_processes: int = None,
+                  queue_size: int = 8) -> dict:
+    """
+    Rotates every frame of a video or a directory of frames.
+
+    Args:
+        source_path (str): Path of a video or of a directory of frames.
+        output_path (str): Path of the output video, or of a directory for PNG frames.
+        angle (int): Rotation angle in degrees.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+        num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+        queue_size (int, optional): Capacity of every queue of the pipeline. Defaults to 8.
+
+    Returns:
+        dict: The number of frames, the elapsed seconds and the frames per second.
+    """
+    writer = FrameWriter(output_path, get_video_fps(source_path))
+    try:
+        return run_frame_pipeline(iter_frames(source_path),
+                                  partial(rotate_frame, angle=angle, interpolation=interpolation, canvas=canvas),
+                                  writer.write, get_executor(num_processes), queue_size)
+    finally:
+        writer.close()
@@ -1,6 +1,5 @@
-from utils import multiply_mats, find_available_cores
-from concurrent.futures import ProcessPoolExecutor
-from functools import partial
+from utils import multiply_mats, apply_mat
+from interpolation import sample
 
 import numpy as np
 
@@ -30,13 +29,180 @@ class ImageOperations:
     def calc_new_img(self, result_mat, img, new_shape):
         img_xy_shape = img.shape[0:2]
         new_img = np.zeros(new_shape, dtype='u1')
-        for x in range(img_xy_shape[0]):
-            for y in range(img_xy_shape[1]):
-                xyw = np.array([x,y,1])
-                new_xyw = multiply_mats(result_mat, xyw)
-                new_img[int(new_xyw[0]),int(new_xyw[1])] = img[x,y]
+        xs, ys = np.meshgrid(np.arange(img_xy_shape[0]), np.arange(img_xy_shape[1]), indexing="ij")
+        xyw = np.stack([xs.ravel(), ys.ravel(), np.ones(xs.size, dtype=xs.dtype)], axis=1)
+        new_xyw = apply_mat(result_mat, xyw).astype(int)  # every pixel mapped in one call, truncated like int()
+        new_img[new_xyw[:, 0], new_xyw[:, 1]] = img.reshape((xs.size,) + img.shape[2:])
         return new_img
     
+    def calc_source_coords(self, result_mat, rows: range, cols: range):
+        """
+        Maps every output pixel of a block back to the source image with the inverse matrix.
+
+        Args:
+            result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+            rows (range): Output rows of the block.
+            cols (range): Output columns of the block.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The real source rows and columns of every output pixel.
+        """
+        inverse_mat = np.linalg.inv(result_mat)
+        # inverse_mat @ [row, col, 1] for every pixel, the grid is separable so it is
+        # evaluated as a broadcast sum of its row and column terms
+        out_rows = np.arange(rows.start, rows.stop, dtype=np.float64)[:, None]
+        out_cols = np.arange(cols.start, cols.stop, dtype=np.float64)[None, :]
+        src_rows = inverse_mat[0, 0]*out_rows + inverse_mat[0, 1]*out_cols + inverse_mat[0, 2]
+        src_cols = inverse_mat[1, 0]*out_rows + inverse_mat[1, 1]*out_cols + inverse_mat[1, 2]
+        if not (inverse_mat[2, 0] == 0 and inverse_mat[2, 1] == 0 and inverse_mat[2, 2] == 1):  # projective transforms
+            w = inverse_mat[2, 0]*out_rows + inverse_mat[2, 1]*out_cols + inverse_mat[2, 2]
+            src_rows, src_cols = src_rows / w, src_cols / w
+        return src_rows, src_cols
+
+    def calc_centered_rotation_mat(self, angle: int, img_xy_shape):
+        """
+        Computes the matrix rotating an image about the center of its pixel grid,
+        the center is mapped to the origin.
+
+        Args:
+            angle (int): Rotation angle in degrees.
+            img_xy_shape (tuple): Height and width of the image.
+
+        Returns:
+            np.ndarray: The 3x3 matrix.
+        """
+        height, width = img_xy_shape
+        return multiply_mats(self.calc_rotation_mat(angle), self.calc_transfer_mat(-(height - 1)/2, -(width - 1)/2))
+
+    def calc_canvas(self, mat, img_xy_shape, canvas="expand"):
+        """
+        Places a transformed image on an output canvas.
+
+        Args:
+            mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to coordinates centered at the origin.
+            img_xy_shape (tuple): Height and width of the source image.
+            canvas (Union[str, tuple], optional): "expand" for the exact bounding box of the transformed
+                corners, "same" for the shape of the source or a (height, width) tuple, the origin is
+                placed at the center of the last two. Defaults to "expand".
+
+        Returns:
+            tuple[np.ndarray, tuple]: The 3x3 matrix onto the canvas and the height and width of the canvas.
+
+        Raises:
+            ValueError: If the canvas mode is unknown.
+        """
+        if isinstance(canvas, str) and canvas == "expand":
+            corners = self.calc_transformed_corners(mat, img_xy_shape)
+            low, high = corners.min(axis=0), corners.max(axis=0)
+            new_xy_shape = tuple(int(length) + 1 for length in np.ceil(high - low - 1e-6))
+            return multiply_mats(self.calc_transfer_mat(-low[0], -low[1]), mat), new_xy_shape
+        if isinstance(canvas, str) and canvas == "same":
+            new_xy_shape = tuple(img_xy_shape)
+        elif isinstance(canvas, (tuple, list)) and len(canvas) == 2:
+            new_xy_shape = tuple(int(length) for length in canvas)
+        else:
+            raise ValueError(f"Unknown canvas {canvas}, expected 'expand', 'same' or a (height, width) tuple")
+        return multiply_mats(self.calc_transfer_mat((new_xy_shape[0] - 1)/2, (new_xy_shape[1] - 1)/2), mat), new_xy_shape
+
+    def calc_rotation_canvas(self, angle: int, img_xy_shape, canvas="expand"):
+        """
+        Computes the output height and width and the matrix rotating an image about its center onto it.
+
+        Args:
+            angle (int): Rotation angle in degrees.
+            img_xy_shape (tuple): Height and width of the image.
+            canvas (Union[str, tuple], optional): "hypotenuse" for the legacy 2*hypotenuse square,
+                otherwise any canvas accepted by calc_canvas. Defaults to "expand".
+
+        Returns:
+            tuple[np.ndarray, tuple]: The 3x3 matrix and the output height and width.
+        """
+        if isinstance(canvas, str) and canvas == "hypotenuse":
+            height, width = img_xy_shape
+            hypotenuse = self.calc_hypotenuse(height, width)
+            new_xy_shape = (int(2*hypotenuse), int(2*hypotenuse))
+            result_mat = multiply_mats(self.calc_transfer_mat(new_xy_shape[0]//2, new_xy_shape[1]//2),
+                                       self.calc_rotation_mat(angle),
+                                       self.calc_transfer_mat(-height//2, -width//2))
+            return result_mat, new_xy_shape
+        result_mat, new_xy_shape = self.calc_canvas(self.calc_centered_rotation_mat(angle, img_xy_shape), img_xy_shape, canvas)
+        return result_mat, tuple(new_xy_shape)
+
+    def calc_right_angle_turns(self, angle, img_xy_shape, canvas="expand"):
+        """
+        Finds whether a rotation is an exact multiple of 90 degrees that can be done without resampling.
+
+        Args:
+            angle (int): Rotation angle in degrees.
+            img_xy_shape (tuple): Height and width of the image.
+            canvas (Union[str, tuple], optional): Canvas mode, only "expand" and, when the output
+                keeps the shape of the image, "same" place the image exactly. Defaults to "expand".
+
+        Returns:
+            Union[int, None]: The number of counterclockwise quarter turns for np.rot90, None
+                if the rotation has to be resampled.
+        """
+        if angle % 90 != 0 or not isinstance(canvas, str):
+            return None
+        turns = int(-angle // 90) % 4  # positive angles turn clockwise
+        if canvas == "expand" or (canvas == "same" and (turns % 2 == 0 or img_xy_shape[0] == img_xy_shape[1])):
+            return turns
+        return None
+
+    def calc_transformed_corners(self, result_mat, img_xy_shape):
+        """
+        Maps the corners of the source pixel grid to output coordinates.
+
+        Args:
+            result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+            img_xy_shape (tuple): Height and width of the source image.
+
+        Returns:
+            np.ndarray: The (4, 2) output rows and columns of the corners.
+        """
+        height, width = img_xy_shape
+        corners = np.array([[0, 0, 1], [0, width - 1, 1], [height - 1, 0, 1], [height - 1, width - 1, 1]], dtype=np.float64)
+        return apply_mat(result_mat, corners, normalize=True)[:, 0:2]
+
+    def calc_covered_block(self, result_mat, img_xy_shape, new_xy_shape):
+        """
+        Computes the block of the output the source image lands on, two pixels of margin
+        are kept for the interpolation.
+
+        Args:
+            result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+            img_xy_shape (tuple): Height and width of the source image.
+            new_xy_shape (tuple): Height and width of the output image.
+
+        Returns:
+            tuple[range, range]: The output rows and columns of the block.
+        """
+        corners = self.calc_transformed_corners(result_mat, img_xy_shape)
+        low = np.maximum(np.floor(corners.min(axis=0)).astype(int) - 2, 0)  # bicubic taps reach 2 pixels
+        high = np.minimum(np.ceil(corners.max(axis=0)).astype(int) + 3, new_xy_shape)
+        return range(low[0], max(low[0], high[0])), range(low[1], max(low[1], high[1]))
+
+    def calc_new_img_inverse(self, result_mat, img, new_shape, interpolation: str = "nearest"):
+        """
+        Vectorized inverse mapping: every output pixel takes the source pixel mapped onto it,
+        so the output has no holes.
+
+        Args:
+            result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+            img (np.ndarray): Source image.
+            new_shape (tuple): Shape of the output image.
+            interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+
+        Returns:
+            np.ndarray: The output image.
+        """
+        new_img = np.zeros(new_shape, dtype=img.dtype)
+        rows, cols = self.calc_covered_block(result_mat, img.shape[0:2], new_shape[0:2])
+        if len(rows) and len(cols):  # only the block the source lands on is sampled, the rest stays black
+            src_rows, src_cols = self.calc_source_coords(result_mat, rows, cols)
+            new_img[rows.start:rows.stop, cols.start:cols.stop] = sample(img, src_rows, src_cols, interpolation)
+        return new_img
+
     def get_img_fragments(self, img: np.ndarray, num_fragments) -> list:
         img_xy_shape = img.shape[0:2]
         fragment_threshold = int(np.ceil(img_xy_shape[0]/num_fragments))
@@ -56,66 +222,180 @@ class ImageOperations:
         return multiply_mats(transfer_mat_center_canvas, rotation_mat, transfer_mat_center_img)
     
 
+class TransformPipeline:
+    """
+    Lazily composes affine and projective transforms of an image.
+
+    Every operation only multiplies its 3x3 matrix into the accumulated one, the image
+    is resampled once by materialize, so chained operations cost a single pass and
+    blur only once.
+
+    Operations work on (row, col) coordinates and, unless a center is given, turn about
+    the center of the image as transformed so far.
+    """
+    def __init__(self, img: np.ndarray, img_ops: ImageOperations = None):
+        self._img = img
+        self._img_ops = ImageOperations() if img_ops is None else img_ops
+        self._mat = np.identity(3)
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """
+        The accumulated 3x3 matrix mapping source (row, col, 1) to output coordinates.
+        """
+        return self._mat.copy()
+
+    def _get_center(self):
+        """
+        The center of the image as transformed so far.
+        """
+        height, width = self._img.shape[0:2]
+        center = np.matmul(self._mat, np.array([(height - 1)/2, (width - 1)/2, 1]))
+        return center[0:2] / center[2]
+
+    def _compose(self, mat, center=None):
+        """
+        Applies a transform after the accumulated ones, about a center.
+        """
+        center_x, center_y = self._get_center() if center is None else center
+        self._mat = multiply_mats(self._img_ops.calc_transfer_mat(center_x, center_y),
+                                  mat,
+                                  self._img_ops.calc_transfer_mat(-center_x, -center_y),
+                                  self._mat)
+        return self
+
+    def rotate(self, angle: float, center=None):
+        """
+        Rotates by angle degrees, with the same convention as Image.rotate.
+        """
+        return self._compose(self._img_ops.calc_rotation_mat(angle), center)
+
+    def translate(self, dx: float, dy: float):
+        """
+        Moves dx rows down and dy columns right.
+        """
+        self._mat = multiply_mats(self._img_ops.calc_transfer_mat(dx, dy), self._mat)
+        return self
+
+    def scale(self, sx: float, sy: float = None, center=None):
+        """
+        Scales rows by sx and columns by sy, by sx too if not given.
+        """
+        return self._compose(np.diag([sx, sx if sy is None else sy, 1.0]), center)
+
+    def shear(self, shx: float = 0.0, shy: float = 0.0, center=None):
+        """
+        Shears rows by shx times the column and columns by shy times the row.
+        """
+        shear_mat = np.identity(3)
+        shear_mat[0, 1] = shx
+        shear_mat[1, 0] = shy
+        return self._compose(shear_mat, center)
+
+    def flip(self, axis: int = 1, center=None):
+        """
+        Mirrors rows (axis 0, upside down) or columns (axis 1, left to right).
+        """
+        assert axis in (0, 1), "Flip axis must be 0 (rows) or 1 (columns)"
+        return self._compose(np.diag([-1.0, 1.0, 1.0] if axis == 0 else [1.0, -1.0, 1.0]), center)
+
+    def homography(self, mat: np.ndarray):
+        """
+        Applies a 3x3 projective transform of output coordinates after the accumulated ones.
+        """
+        assert np.shape(mat) == (3, 3), "A homography must be a 3x3 matrix"
+        self._mat = multiply_mats(np.asarray(mat, dtype=np.float64), self._mat)
+        return self
+
+    def materialize(self, interpolation: str = "bilinear", canvas="expand") -> np.ndarray:
+        """
+        Resamples the image once with the accumulated transform.
+
+        Args:
+            interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "bilinear".
+            canvas (Union[str, tuple], optional): "expand" for the exact bounding box of the
+                transformed image, "same" for the input frame and shape, or a (height, width)
+                tuple for the input frame cropped or padded to that shape. Defaults to "expand".
+
+        Returns:
+            np.ndarray: The transformed image.
+        """
+        img_xy_shape = self._img.shape[0:2]
+        if isinstance(canvas, str) and canvas == "expand":
+            result_mat, new_xy_shape = self._img_ops.calc_canvas(self._mat, img_xy_shape, "expand")
+        elif isinstance(canvas, str) and canvas == "same":
+            result_mat, new_xy_shape = self._mat, tuple(img_xy_shape)
+        elif isinstance(canvas, (tuple, list)) and len(canvas) == 2:
+            result_mat, new_xy_shape = self._mat, tuple(int(length) for length in canvas)
+        else:
+            raise ValueError(f"Unknown canvas {canvas}, expected 'expand', 'same' or a (height, width) tuple")
+        return self._img_ops.calc_new_img_inverse(result_mat, self._img, new_xy_shape + self._img.shape[2:], interpolation)
+
+
 class Image:
     def __init__(self, img: np.ndarray):
         self._img = img
         self._img_ops = ImageOperations()
 
-    def rotate(self, angle: int) -> np.ndarray:
-        img_xy_shape = self._img.shape[0:2]
-        height, width = img_xy_shape
-        hypotenuse = self._img_ops.calc_hypotenuse(height, width)
+    def pipeline(self) -> TransformPipeline:
+        """
+        Starts a lazy transform pipeline over the image, see TransformPipeline.
+        """
+        return TransformPipeline(self._img, self._img_ops)
 
-        new_img_shape = (int(2*hypotenuse), int(2*hypotenuse), 3)
+    def calc_rotation_canvas(self, angle: int, canvas="expand"):
+        """
+        Computes the output shape and the matrix rotating the image about its center onto it.
 
-        center_img_x, center_img_y = (-height//2, -width//2)
-        center_canvas_x, center_canvas_y = (new_img_shape[0]//2, new_img_shape[1]//2)
-
-        rotation_mat = self._img_ops.calc_rotation_mat(angle)
-        transfer_mat_center_img = self._img_ops.calc_transfer_mat(center_img_x, center_img_y)
-        transfer_mat_center_canvas = self._img_ops.calc_transfer_mat(center_canvas_x, center_canvas_y)
-        
-        result_mat = multiply_mats(transfer_mat_center_canvas, rotation_mat, transfer_mat_center_img)
-        rotated_img = self._img_ops.calc_new_img(result_mat, self._img.copy(), new_img_shape)
-        return rotated_img
-    
-    def rotate_fragment(self,
-                        idx_and_fragments, 
-                        rotation_mat, 
-                        img_rotation_mat, 
-                        new_img_shape):
-            fragment_x, fragment = idx_and_fragments
+        Args:
+            angle (int): Rotation angle in degrees.
+            canvas (Union[str, tuple], optional): "expand" for the exact bounding box of the rotated
+                image, "same" for the shape of the input, "hypotenuse" for the legacy 2*hypotenuse
+                square or a (height, width) tuple. Defaults to "expand".
 
-            fragment_translation_dir = np.array([fragment_x, 0, 1])
-            fragment_translation_dir_rotated = multiply_mats(rotation_mat, fragment_translation_dir)
+        Returns:
+            tuple[np.ndarray, tuple]: The 3x3 matrix and the output shape, channels included.
+        """
+        result_mat, new_xy_shape = self._img_ops.calc_rotation_canvas(angle, self._img.shape[0:2], canvas)
+        return result_mat, tuple(new_xy_shape) + self._img.shape[2:]
 
-            translation_fragment_mat = self._img_ops.calc_transfer_mat(
-                fragment_translation_dir_rotated[0],
-                fragment_translation_dir_rotated[1]
-            )
-            fragment_result_mat = multiply_mats(translation_fragment_mat, img_rotation_mat)
-            return self._img_ops.calc_new_img(fragment_result_mat, fragment.copy(), new_img_shape)
+    def rotate(self, angle: int, interpolation: str = "nearest", canvas="expand") -> np.ndarray:
+        """
+        Rotates the image about its center.
 
+        Multiples of 90 degrees are returned as np.rot90 views of the image, exact and without
+        resampling, so the interpolation is only paid for other angles.
 
-    def merge_fragments(self, fragments:list, new_img_shape):
-        new_img = np.zeros(new_img_shape, dtype='u1')
-        for fragment in fragments:
-            new_img += fragment
-        return np.array(new_img, dtype='u1')
+        Args:
+            angle (int): Rotation angle in degrees.
+            interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+            canvas (Union[str, tuple], optional): Canvas mode, see calc_rotation_canvas. Defaults to "expand".
 
+        Returns:
+            np.ndarray: The rotated image.
+        """
+        turns = self._img_ops.calc_right_angle_turns(angle, self._img.shape[0:2], canvas)
+        if turns is not None:
+            return np.rot90(self._img, turns)
+        result_mat, new_img_shape = self.calc_rotation_canvas(angle, canvas)
+        rotated_img = self._img_ops.calc_new_img_inverse(result_mat, self._img, new_img_shape, interpolation)
+        return rotated_img
 
-    def rotate_paralelized(self, angle: int):
-        idx_n_fragments:list = self._img_ops.get_img_fragments(self._img, find_available_cores())
-        img_xy_shape = self._img.shape[0:2]
-        img_hypotenuse = self._img_ops.calc_hypotenuse(*img_xy_shape)
+    def rotate_paralelized(self, angle: int, num_processes: int = None, canvas="expand"):
+        """
+        Rotates the image about its center in parallel, the result equals rotate.
 
-        rotation_mat = self._img_ops.calc_rotation_mat(angle)
-        new_img_shape = (int(2*img_hypotenuse), int(2*img_hypotenuse), 3)
-        fragment_rot_mat = self._img_ops.get_fragment_rot_mat(angle, img_xy_shape, new_img_shape)
-        
-        partial_rotate_fragment = partial(self.rotate_fragment, rotation_mat=rotation_mat, img_rotation_mat=fragment_rot_mat, new_img_shape=new_img_shape)
+        Delegates to shared_parallel.rotate_shared, whose workers sample tiles of the output
+        straight into shared memory, so every output pixel is written exactly once and no
+        fragment canvas is sent back and merged.
 
-        with ProcessPoolExecutor(max_workers=find_available_cores()) as executor:
-            fragments:list = list(executor.map(partial_rotate_fragment, [fragment for fragment in idx_n_fragments]))
+        Args:
+            angle (int): Rotation angle in degrees.
+            num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+            canvas (Union[str, tuple], optional): Canvas mode, see calc_rotation_canvas. Defaults to "expand".
 
-        return self.merge_fragments(fragments, new_img_shape)
+        Returns:
+            np.ndarray: The rotated image.
+        """
+        from shared_parallel import rotate_shared  # shared_parallel imports this module
+        return rotate_shared(self._img, angle, canvas=canvas, num_processes=num_processes)
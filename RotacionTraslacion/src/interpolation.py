@@ -0,0 +1,146 @@
+import numpy as np
+
+
+def _take(img: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Gathers the pixels at integer coordinates, pixels outside the image are black.
+
+    Args:
+        img (np.ndarray): Source image, (height, width) or (height, width, channels).
+        rows (np.ndarray): Integer rows of the pixels.
+        cols (np.ndarray): Integer columns of the pixels, same shape as rows.
+
+    Returns:
+        np.ndarray: The pixels, with shape rows.shape + img.shape[2:].
+    """
+    height, width = img.shape[0:2]
+    valid = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    flat_idx = np.clip(rows, 0, height - 1)*width + np.clip(cols, 0, width - 1)
+    pixels = np.take(img.reshape((height*width,) + img.shape[2:]), flat_idx, axis=0)  # a single flat gather
+    pixels[~valid] = 0
+    return pixels
+
+
+def _cast_like(values: np.ndarray, dtype: np.dtype) -> np.ndarray:
+    """
+    Casts interpolated values back to the dtype of the image, rounding and clipping integers.
+
+    Args:
+        values (np.ndarray): Interpolated values.
+        dtype (np.dtype): Dtype of the image.
+
+    Returns:
+        np.ndarray: The values with the given dtype.
+    """
+    if np.issubdtype(dtype, np.integer):
+        limits = np.iinfo(dtype)
+        values = np.clip(np.rint(values), limits.min, limits.max)
+    return values.astype(dtype)
+
+
+def sample_nearest(img: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Samples an image at real coordinates taking the nearest pixel.
+
+    Args:
+        img (np.ndarray): Source image, (height, width) or (height, width, channels).
+        rows (np.ndarray): Real rows to be sampled.
+        cols (np.ndarray): Real columns to be sampled, same shape as rows.
+
+    Returns:
+        np.ndarray: The sampled pixels, with shape rows.shape + img.shape[2:].
+    """
+    return _take(img, np.floor(rows + 0.5).astype(np.intp), np.floor(cols + 0.5).astype(np.intp))
+
+
+def sample_bilinear(img: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Samples an image at real coordinates weighting its 4 neighbouring pixels.
+
+    Args:
+        img (np.ndarray): Source image, (height, width) or (height, width, channels).
+        rows (np.ndarray): Real rows to be sampled.
+        cols (np.ndarray): Real columns to be sampled, same shape as rows.
+
+    Returns:
+        np.ndarray: The sampled pixels, with shape rows.shape + img.shape[2:].
+    """
+    top, left = np.floor(rows), np.floor(cols)
+    row_weight, col_weight = (rows - top).astype(np.float32), (cols - left).astype(np.float32)
+    top, left = top.astype(np.intp), left.astype(np.intp)
+    channels = (None,)*(img.ndim - 2)  # broadcast the weights over the channels
+    values = np.zeros(rows.shape + img.shape[2:], dtype=np.float32)
+    for d_row, d_col, weight in ((0, 0, (1 - row_weight)*(1 - col_weight)),
+                                 (0, 1, (1 - row_weight)*col_weight),
+                                 (1, 0, row_weight*(1 - col_weight)),
+                                 (1, 1, row_weight*col_weight)):
+        values += weight[(...,) + channels] * _take(img, top + d_row, left + d_col)
+    return _cast_like(values, img.dtype)
+
+
+def get_cubic_weights(fraction: np.ndarray, a: float = -0.5) -> list[np.ndarray]:
+    """
+    Computes the weights of the 4 taps of the Keys cubic convolution kernel.
+
+    Args:
+        fraction (np.ndarray): Distance from the coordinates to the pixel before them, in [0, 1).
+        a (float, optional): Parameter of the kernel, -0.5 matches a cubic spline. Defaults to -0.5.
+
+    Returns:
+        list[np.ndarray]: The float32 weights of the pixels at offsets -1, 0, 1 and 2.
+    """
+    t = fraction.astype(np.float32)
+    near = lambda x: ((a + 2)*x - (a + 3))*x*x + 1  # |x| <= 1
+    far = lambda x: ((a*x - 5*a)*x + 8*a)*x - 4*a  # 1 < |x| < 2
+    return [far(1 + t), near(t), near(1 - t), far(2 - t)]
+
+
+def sample_bicubic(img: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    """
+    Samples an image at real coordinates weighting its 16 neighbouring pixels with the Keys kernel.
+
+    Args:
+        img (np.ndarray): Source image, (height, width) or (height, width, channels).
+        rows (np.ndarray): Real rows to be sampled.
+        cols (np.ndarray): Real columns to be sampled, same shape as rows.
+
+    Returns:
+        np.ndarray: The sampled pixels, with shape rows.shape + img.shape[2:].
+    """
+    top, left = np.floor(rows), np.floor(cols)
+    row_weights, col_weights = get_cubic_weights(rows - top), get_cubic_weights(cols - left)
+    top, left = top.astype(np.intp), left.astype(np.intp)
+    channels = (None,)*(img.ndim - 2)  # broadcast the weights over the channels
+    values = np.zeros(rows.shape + img.shape[2:], dtype=np.float32)
+    for d_row, row_weight in zip(range(-1, 3), row_weights):
+        for d_col, col_weight in zip(range(-1, 3), col_weights):
+            values += (row_weight*col_weight)[(...,) + channels] * _take(img, top + d_row, left + d_col)
+    return _cast_like(values, img.dtype)  # the kernel overshoots, integers are clipped
+
+
+INTERPOLATIONS = {
+    "nearest": sample_nearest,
+    "bilinear": sample_bilinear,
+    "bicubic": sample_bicubic,
+}
+
+
+def sample(img: np.ndarray, rows: np.ndarray, cols: np.ndarray, interpolation: str = "nearest") -> np.ndarray:
+    """
+    Samples an image at real coordinates with the given interpolation.
+
+    Args:
+        img (np.ndarray): Source image, (height, width) or (height, width, channels).
+        rows (np.ndarray): Real rows to be sampled.
+        cols (np.ndarray): Real columns to be sampled, same shape as rows.
+        interpolation (str, optional): One of INTERPOLATIONS. Defaults to "nearest".
+
+    Returns:
+        np.ndarray: The sampled pixels, with shape rows.shape + img.shape[2:].
+
+    Raises:
+        ValueError: If the interpolation is unknown.
+    """
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(f"Unknown interpolation {interpolation}, expected one of {list(INTERPOLATIONS)}")
+    return INTERPOLATIONS[interpolation](img, rows, cols)
@@ -0,0 +1,283 @@
+from collections import OrderedDict
+from threading import Lock
+from image import ImageOperations
+from interpolation import INTERPOLATIONS, _cast_like, get_cubic_weights
+
+import numpy as np
+
+
+# Total bytes of the plans kept by the cache of every process
+MAX_PLAN_CACHE_BYTES = 256*2**20
+
+
+class TransformPlan:
+    """
+    Precomputed inverse mapping of a rotation, reusable for every image of the same height and width.
+
+    The matrices, the canvas and the source index of every output pixel are computed once,
+    applying the plan is a single gather over a batch of images. Plans are meant to be
+    obtained through get_transform_plan, which caches them.
+
+    A plan stores every tap of every output pixel the image covers, an 8 bytes index and
+    its weight: about 9 bytes per pixel for nearest, 48 for bilinear and 192 for bicubic,
+    so the bicubic plan of a 4K frame takes well over 1 GB.
+    """
+
+    def __init__(self, img_xy_shape: tuple, angle: int, canvas="expand", interpolation: str = "nearest"):
+        """
+        Args:
+            img_xy_shape (tuple): Height and width of the images.
+            angle (int): Rotation angle in degrees.
+            canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+            interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+
+        Raises:
+            ValueError: If the interpolation is unknown.
+        """
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation {interpolation}, expected one of {list(INTERPOLATIONS)}")
+        img_ops = ImageOperations()
+        self.img_xy_shape = tuple(img_xy_shape)
+        self.interpolation = interpolation
+        self.result_mat, self.new_xy_shape = img_ops.calc_rotation_canvas(angle, self.img_xy_shape, canvas)
+        self.rows, self.cols = img_ops.calc_covered_block(self.result_mat, self.img_xy_shape, self.new_xy_shape)
+        src_rows, src_cols = img_ops.calc_source_coords(self.result_mat, self.rows, self.cols)
+        if interpolation == "nearest":
+            self._taps, self._weights = self._get_taps(np.floor(src_rows + 0.5), np.floor(src_cols + 0.5), [(0, 0)])
+            return
+        top, left = np.floor(src_rows), np.floor(src_cols)
+        # same weights and order as the samplers of interpolation, taps outside the image weight 0
+        if interpolation == "bilinear":
+            row_weight, col_weight = (src_rows - top).astype(np.float32), (src_cols - left).astype(np.float32)
+            offsets = [(0, 0), (0, 1), (1, 0), (1, 1)]
+            weights = [(1 - row_weight)*(1 - col_weight), (1 - row_weight)*col_weight,
+                       row_weight*(1 - col_weight), row_weight*col_weight]
+        else:
+            row_weights, col_weights = get_cubic_weights(src_rows - top), get_cubic_weights(src_cols - left)
+            offsets = [(d_row, d_col) for d_row in range(-1, 3) for d_col in range(-1, 3)]
+            weights = [row_weight*col_weight for row_weight in row_weights for col_weight in col_weights]
+        self._taps, valid = self._get_taps(top, left, offsets)
+        self._weights = np.stack(weights).reshape(valid.shape) * valid
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: Bytes taken by the taps and the weights of the plan.
+        """
+        return self._taps.nbytes + self._weights.nbytes
+
+    def _get_taps(self, rows: np.ndarray, cols: np.ndarray, offsets: list) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Computes the flat source index of every tap of every output pixel of the block.
+
+        Args:
+            rows (np.ndarray): Integer valued source rows of the first tap.
+            cols (np.ndarray): Integer valued source columns of the first tap.
+            offsets (list): (row, column) offset of every tap from the first one.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The (taps, pixels) flat indexes, clipped into the image,
+                and whether every tap falls inside the image.
+        """
+        height, width = self.img_xy_shape
+        rows, cols = rows.astype(np.intp).ravel(), cols.astype(np.intp).ravel()
+        taps, valid = [], []
+        for d_row, d_col in offsets:
+            tap_rows, tap_cols = rows + d_row, cols + d_col
+            valid.append((tap_rows >= 0) & (tap_rows < height) & (tap_cols >= 0) & (tap_cols < width))
+            taps.append(np.clip(tap_rows, 0, height - 1)*width + np.clip(tap_cols, 0, width - 1))
+        return np.stack(taps), np.stack(valid)
+
+    def _apply_chunk(self, imgs: np.ndarray, new_imgs: np.ndarray) -> None:
+        """
+        Rotates a chunk of a batch of images into its output.
+
+        Args:
+            imgs (np.ndarray): A (N, height, width) or (N, height, width, channels) stack of images.
+            new_imgs (np.ndarray): The black (N,) + output shape stack the images are rotated into.
+        """
+        num_imgs, channels = imgs.shape[0], imgs.shape[3:]
+        flat_imgs = imgs.reshape((num_imgs, -1) + channels)
+        gathered = np.take(flat_imgs, self._taps, axis=1)  # a single gather, (N, taps, pixels) + channels
+        weights = self._weights[(None, ...) + (None,)*len(channels)]
+        if self.interpolation == "nearest":
+            pixels = gathered[:, 0] * weights[:, 0].astype(imgs.dtype)
+        else:
+            values = np.zeros(gathered.shape[0:1] + gathered.shape[2:], dtype=np.float32)
+            for tap in range(gathered.shape[1]):
+                values += weights[:, tap] * gathered[:, tap]
+            pixels = _cast_like(values, imgs.dtype)
+        new_imgs[:, self.rows.start:self.rows.stop, self.cols.start:self.cols.stop] = \
+            pixels.reshape((num_imgs, len(self.rows), len(self.cols)) + channels)
+
+    def apply(self, imgs: np.ndarray, chunk_size: int = 1) -> np.ndarray:
+        """
+        Rotates a batch of images.
+
+        Args:
+            imgs (np.ndarray): A (N, height, width) or (N, height, width, channels) stack of images.
+            chunk_size (int, optional): Number of images gathered at once, small chunks keep the
+                gathered taps in cache. Defaults to 1.
+
+        Returns:
+            np.ndarray: The (N,) + output shape stack of rotated images.
+
+        Raises:
+            ValueError: If the images do not have the height and width of the plan.
+        """
+        if tuple(imgs.shape[1:3]) != self.img_xy_shape:
+            raise ValueError(f"The plan rotates {self.img_xy_shape} images, got {tuple(imgs.shape[1:3])}")
+        new_imgs = np.zeros((imgs.shape[0],) + tuple(self.new_xy_shape) + imgs.shape[3:], dtype=imgs.dtype)
+        if len(self.rows) and len(self.cols):
+            for start in range(0, imgs.shape[0], chunk_size):
+                self._apply_chunk(imgs[start:start + chunk_size], new_imgs[start:start + chunk_size])
+        return new_imgs
+
+    def apply_one(self, img: np.ndarray) -> np.ndarray:
+        """
+        Rotates a single image.
+
+        Args:
+            img (np.ndarray): A (height, width) or (height, width, channels) image.
+
+        Returns:
+            np.ndarray: The rotated image.
+        """
+        return self.apply(img[None])[0]
+
+
+class PlanCache:
+    """
+    Keeps the most recently used plans whose total size fits in a budget of bytes.
+
+    The least recently used plans are evicted first, a plan larger than the whole budget
+    is returned without being kept.
+    """
+
+    def __init__(self, max_bytes: int = MAX_PLAN_CACHE_BYTES):
+        """
+        Args:
+            max_bytes (int, optional): Total bytes of the kept plans, 0 disables the cache.
+                Defaults to MAX_PLAN_CACHE_BYTES.
+
+        Raises:
+            ValueError: If max_bytes is negative.
+        """
+        if max_bytes < 0:
+            raise ValueError(f"The plan cache budget can not be negative, got max_bytes={max_bytes}")
+        self._max_bytes = max_bytes
+        self._plans: OrderedDict[tuple, TransformPlan] = OrderedDict()
+        self._nbytes = 0
+        self._lock = Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns:
+            int: Bytes taken by the kept plans.
+        """
+        return self._nbytes
+
+    def get(self, img_xy_shape: tuple, angle: int, canvas="expand", interpolation: str = "nearest") -> TransformPlan:
+        """
+        Returns the plan of a rotation, it is built if it is not kept.
+
+        Args:
+            img_xy_shape (tuple): Height and width of the images.
+            angle (int): Rotation angle in degrees.
+            canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+            interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+
+        Returns:
+            TransformPlan: The plan of the rotation.
+        """
+        key = (tuple(img_xy_shape), angle, canvas, interpolation)
+        with self._lock:
+            if key in self._plans:
+                self._plans.move_to_end(key)
+                return self._plans[key]
+        plan = TransformPlan(img_xy_shape, angle, canvas, interpolation)  # built outside the lock, it may take long
+        with self._lock:
+            if plan.nbytes > self._max_bytes or key in self._plans:
+                return plan
+            self._plans[key] = plan
+            self._nbytes += plan.nbytes
+            while self._nbytes > self._max_bytes:
+                _, evicted_plan = self._plans.popitem(last=False)
+                self._nbytes -= evicted_plan.nbytes
+        return plan
+
+    def clear(self) -> None:
+        """
+        Drops every kept plan.
+        """
+        with self._lock:
+            self._plans.clear()
+            self._nbytes = 0
+
+
+_plan_cache = PlanCache()
+
+
+def get_plan_cache() -> PlanCache:
+    """
+    Returns the plan cache shared by the whole process.
+    """
+    return _plan_cache
+
+
+def get_transform_plan(img_xy_shape: tuple, angle: int, canvas="expand", interpolation: str = "nearest") -> TransformPlan:
+    """
+    Returns the plan of a rotation from the plan cache of the process, see PlanCache.
+
+    The cache keeps at most MAX_PLAN_CACHE_BYTES of plans, see TransformPlan for their size,
+    and every worker process using plans has its own cache.
+
+    Args:
+        img_xy_shape (tuple): Height and width of the images.
+        angle (int): Rotation angle in degrees.
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+
+    Returns:
+        TransformPlan: The plan of the rotation.
+    """
+    return _plan_cache.get(img_xy_shape, angle, canvas, interpolation)
+
+
+def rotate_batch(imgs: np.ndarray, angle: int, interpolation: str = "nearest", canvas="expand") -> np.ndarray:
+    """
+    Rotates a stack of same size images by the same angle with a cached plan,
+    multiples of 90 degrees are np.rot90 views of the stack.
+
+    Args:
+        imgs (np.ndarray): A (N, height, width) or (N, height, width, channels) stack of images.
+        angle (int): Rotation angle in degrees.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+
+    Returns:
+        np.ndarray: The stack of rotated images.
+    """
+    turns = ImageOperations().calc_right_angle_turns(angle, imgs.shape[1:3], canvas)
+    if turns is not None:
+        return np.rot90(imgs, turns, axes=(1, 2))  # exact, no plan is needed
+    canvas = tuple(canvas) if isinstance(canvas, list) else canvas  # the cache key must be hashable
+    return get_transform_plan(tuple(imgs.shape[1:3]), angle, canvas, interpolation).apply(imgs)
+
+
+def rotate_batch_angles(imgs: np.ndarray, angles: list[int], interpolation: str = "nearest", canvas="expand") -> dict:
+    """
+    Rotates a stack of same size images by every angle of a list with cached plans.
+
+    Args:
+        imgs (np.ndarray): A (N, height, width) or (N, height, width, channels) stack of images.
+        angles (list[int]): Rotation angles in degrees.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+
+    Returns:
+        dict: The stack of rotated images of every angle.
+    """
+    return {angle: rotate_batch(imgs, angle, interpolation, canvas) for angle in angles}
@@ -0,0 +1,155 @@
+from multiprocessing.shared_memory import SharedMemory
+from shared_processing.pool import get_executor
+from image import Image, ImageOperations
+from interpolation import sample
+
+import numpy as np
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Attaches to a shared memory block owned by the parent process.
+
+    Pool workers share the resource tracker of the parent, so the block stays
+    registered once and is only unlinked by the parent.
+
+    Args:
+        name (str): Name of the shared memory block.
+
+    Returns:
+        SharedMemory: The attached block.
+    """
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def get_tiles(rows: range, cols: range, tile_size: tuple) -> list[tuple[range, range]]:
+    """
+    Partitions a block of the output into tiles.
+
+    Args:
+        rows (range): Rows of the block.
+        cols (range): Columns of the block.
+        tile_size (tuple): Height and width of a tile, the last tiles of a row or column may be smaller.
+
+    Returns:
+        list[tuple[range, range]]: The rows and columns of every tile.
+    """
+    return [(range(row_start, min(row_start + tile_size[0], rows.stop)), range(col_start, min(col_start + tile_size[1], cols.stop)))
+            for row_start in range(rows.start, rows.stop, tile_size[0])
+            for col_start in range(cols.start, cols.stop, tile_size[1])]
+
+
+def _transform_tile(img_name: str,
+                    img_shape: tuple,
+                    out_name: str,
+                    out_shape: tuple,
+                    img_dtype: str,
+                    result_mat: np.ndarray,
+                    tile: tuple[range, range],
+                    interpolation: str) -> None:
+    """
+    Inverse maps a tile of the output and writes it straight into the shared output.
+
+    Args:
+        img_name (str): Name of the shared memory block holding the image.
+        img_shape (tuple): Shape of the image.
+        out_name (str): Name of the shared memory block holding the output.
+        out_shape (tuple): Shape of the output.
+        img_dtype (str): Dtype of the image and the output.
+        result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+        tile (tuple[range, range]): Rows and columns of the tile.
+        interpolation (str): "nearest", "bilinear" or "bicubic".
+    """
+    img_memory, out_memory = _attach_shared_memory(img_name), _attach_shared_memory(out_name)
+    try:
+        img = np.ndarray(img_shape, dtype=np.dtype(img_dtype), buffer=img_memory.buf)
+        out = np.ndarray(out_shape, dtype=np.dtype(img_dtype), buffer=out_memory.buf)
+        rows, cols = tile
+        src_rows, src_cols = ImageOperations().calc_source_coords(result_mat, rows, cols)
+        out[rows.start:rows.stop, cols.start:cols.stop] = sample(img, src_rows, src_cols, interpolation)
+        del img, out  # the buffers can not be closed while views over them exist
+    finally:
+        img_memory.close()
+        out_memory.close()
+
+
+def shared_parallel_transform(img: np.ndarray,
+                              result_mat: np.ndarray,
+                              new_img_shape: tuple,
+                              interpolation: str = "nearest",
+                              num_processes: int = None,
+                              tile_size: tuple = (128, 256)) -> np.ndarray:
+    """
+    Inverse maps an image in parallel over shared memory.
+
+    The image is copied once into shared memory and the output block covered by the
+    transformed image is split into tiles, every worker samples its tiles and writes them
+    in place into a shared output, so no fragment or canvas is pickled and nothing is
+    merged afterwards. The worker pool is kept alive and reused across calls.
+
+    Args:
+        img (np.ndarray): Source image.
+        result_mat (np.ndarray): 3x3 matrix mapping source (row, col, 1) to output coordinates.
+        new_img_shape (tuple): Shape of the output, channels included.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+        tile_size (tuple, optional): Height and width of a tile. Defaults to (128, 256).
+
+    Returns:
+        np.ndarray: The output image.
+    """
+    rows, cols = ImageOperations().calc_covered_block(result_mat, img.shape[0:2], new_img_shape[0:2])
+    new_img_size = int(np.prod(new_img_shape))*img.dtype.itemsize
+    img_memory = SharedMemory(create=True, size=max(1, img.nbytes))
+    out_memory = SharedMemory(create=True, size=max(1, new_img_size))
+    try:
+        shared_img = np.ndarray(img.shape, dtype=img.dtype, buffer=img_memory.buf)
+        shared_img[...] = img
+        shared_out = np.ndarray(new_img_shape, dtype=img.dtype, buffer=out_memory.buf)
+        shared_out.fill(0)
+        executor = get_executor(num_processes, img.shape[0]*img.shape[1])
+        futures = [
+            executor.submit(_transform_tile, img_memory.name, img.shape, out_memory.name, new_img_shape,
+                            img.dtype.str, result_mat, tile, interpolation)
+            for tile in get_tiles(rows, cols, tile_size)
+        ]
+        for future in futures:
+            future.result()
+        new_img = shared_out.copy()
+        del shared_img, shared_out
+        return new_img
+    finally:
+        img_memory.close()
+        img_memory.unlink()
+        out_memory.close()
+        out_memory.unlink()
+
+
+def rotate_shared(img: np.ndarray,
+                  angle: int,
+                  interpolation: str = "nearest",
+                  canvas="expand",
+                  num_processes: int = None,
+                  tile_size: tuple = (128, 256)) -> np.ndarray:
+    """
+    Rotates an image in parallel over shared memory, the result equals Image.rotate.
+
+    Args:
+        img (np.ndarray): Source image.
+        angle (int): Rotation angle in degrees.
+        interpolation (str, optional): "nearest", "bilinear" or "bicubic". Defaults to "nearest".
+        canvas (Union[str, tuple], optional): Canvas mode, see Image.calc_rotation_canvas. Defaults to "expand".
+        num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+        tile_size (tuple, optional): Height and width of a tile. Defaults to (128, 256).
+
+    Returns:
+        np.ndarray: The rotated image.
+    """
+    turns = ImageOperations().calc_right_angle_turns(angle, img.shape[0:2], canvas)
+    if turns is not None:
+        return np.rot90(img, turns)  # exact, nothing to share
+    result_mat, new_img_shape = Image(img).calc_rotation_canvas(angle, canvas)
+    return shared_parallel_transform(img, result_mat, new_img_shape, interpolation, num_processes, tile_size)
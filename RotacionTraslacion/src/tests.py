@@ -1,82 +1,211 @@
-import timeit
 import os
-from image import Image
+from image import Image, ImageOperations
+from shared_parallel import rotate_shared, get_tiles
+from utils import multiply_mats, apply_mat, apply_mats, find_available_cores
+from shared_processing.benchmarking import measure_func_time, summarize_times, echo, measure_pool_overheads
+from shared_processing.benchmarking import save_results, compare_with_baseline  # noqa: F401, kept importable from tests
 
 import cv2
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 from numpy import ndarray
 
 
-def _measure_func_time(func) -> float:
+def _get_file_name(file_path: str):
     """
-    Measures the execution time of a given function.
+    Extracts the file name from the given file path.
 
     Args:
-        func (Callable): The function for which the execution time needs to be measured.
+        file_path (str): A string representing the full path of the file.
 
     Returns:
-        float: The elapsed time in milliseconds for the execution of the provided function.
+        str: The file name extracted from the provided file path.
     """
-    start_time = timeit.default_timer()
-    func
-    end_time = timeit.default_timer()
-    elapsed_time = (end_time - start_time) * 1000 #Miliseconds
-    return elapsed_time
+    return os.path.basename(file_path)
 
 
-def _get_file_name(file_path: str):
+def measure_rotate_paralelized_overheads(img: ndarray,
+                                         angle: int = 15,
+                                         num_processes: int = None,
+                                         warmup: int = 1,
+                                         repeat: int = 5,
+                                         tile_size: tuple = (128, 256)) -> dict:
     """
-    Extracts the file name from the given file path.
+    Splits the cost of rotate_paralelized into its parts on the persistent pool it uses,
+    see shared_processing.benchmarking.measure_pool_overheads.
+
+    rotate_paralelized runs rotate_shared, the image and the output travel through shared
+    memory, so the only IPC is sending the arguments of every tile task.
 
     Args:
-        file_path (str): A string representing the full path of the file.
+        img (ndarray): Matrix representation of the image.
+        angle (int, optional): Rotation angle in degrees. Defaults to 15.
+        num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+        warmup (int, optional): Number of untimed calls. Defaults to 1.
+        repeat (int, optional): Number of timed calls. Defaults to 5.
+        tile_size (tuple, optional): Height and width of a tile. Defaults to (128, 256).
 
     Returns:
-        str: The file name extracted from the provided file path.
+        dict: The median milliseconds of getting the pool, of starting a new one, of sending
+            the arguments of every tile task to the workers, and of rotating the image in the
+            calling process.
     """
-    return os.path.basename(file_path)
+    result_mat, new_img_shape = Image(img).calc_rotation_canvas(angle)
+    rows, cols = ImageOperations().calc_covered_block(result_mat, img.shape[0:2], new_img_shape[0:2])
+    tile_args = [("img", img.shape, "out", new_img_shape, img.dtype.str, result_mat, tile, "nearest")
+                 for tile in get_tiles(rows, cols, tile_size)]  # what _transform_tile receives
+    return measure_pool_overheads([(echo, tile_args)], lambda: Image(img).rotate(angle), num_processes,
+                                  img.shape[0]*img.shape[1], warmup, repeat)
 
 
 def benchmark(img_paths: list[str], 
               img_sizes:list[tuple] = [(300, 300), (900, 900), (2700, 2700)],
-              use_cv2: bool = False) -> list[pd.DataFrame]:
+              use_cv2: bool = False,
+              warmup: int = 1,
+              repeat: int = 5) -> list[pd.DataFrame]:
     """
     Benchmarks image processing algorithms on a set of images with different sizes.
-    In case the use_cv2 argument is False the custom_thresholding simple_image_thresholding algorithm
-    is used.
 
     Args:
         img_paths (list[str]): A list of file paths to the images for benchmarking.
         img_sizes (list[tuple], optional): A list of tuples representing different image sizes to be tested.
             Defaults to [(300, 300), (900, 900), (2700, 2700)].
-        use_cv2 (bool, optional): A flag indicating whether to use the OpenCV library for image processing.
+        use_cv2 (bool, optional): Unused, kept for compatibility with the thresholding benchmarks.
             Defaults to False.
+        warmup (int, optional): Number of untimed calls of every algorithm. Defaults to 1.
+        repeat (int, optional): Number of timed calls of every algorithm. Defaults to 5.
 
     Returns:
-        list[pd.DataFrame]: A list of Pandas DataFrames containing benchmarking results for each image.
+        list[pd.DataFrame]: A list of Pandas DataFrames containing benchmarking results for each image,
+            the median time of every algorithm and its 95th percentile in the _p95 columns.
     """
-    #thresholding_algorithm = simple_image_thresholding if use_cv2 is False else threshold_image
+    algorithms = {
+        "Non parallel img rotation": lambda img: Image(img).rotate(15),
+        "Parallel img rotation": lambda img: Image(img).rotate_paralelized(15),
+        "Shared memory img rotation": lambda img: rotate_shared(img, 15),
+    }
     results = []
     for path in img_paths:
-        img = cv2.imread(path)
+        original_img = cv2.imread(path)
         total_times = []
         for size in img_sizes:
-            img = cv2.resize(img, size)
-            non_parallel_img_rot: float = _measure_func_time(Image(img).rotate(15))
-            parallel_img_rot = _measure_func_time(Image(img).rotate_paralelized(15))
-            times_taken = [non_parallel_img_rot,
-                           parallel_img_rot,
-                           size]
+            img = cv2.resize(original_img, size)
+            times_taken = {"size": size}
+            for name, algorithm in algorithms.items():
+                summary = summarize_times(measure_func_time(lambda: algorithm(img), warmup, repeat))
+                times_taken[name] = summary["median_ms"]
+                times_taken[f"{name} p95"] = summary["p95_ms"]
             total_times.append(times_taken)
-        time_df = pd.DataFrame(columns=["Non parallel img rotation", "Parallel img rotation", "size"],
-                               data= total_times)
+        time_df = pd.DataFrame(total_times)
         time_df["file_name"] = _get_file_name(path)
         results.append(time_df)
     return results
 
 
+def benchmark_scaling(img_paths: list[str],
+                      img_sizes: list[tuple] = [(100, 100), (200, 200), (300, 300)],
+                      workers: list[int] = None,
+                      angle: int = 15,
+                      warmup: int = 1,
+                      repeat: int = 3) -> pd.DataFrame:
+    """
+    Measures how every rotation scales with the image size and the number of workers.
+
+    Args:
+        img_paths (list[str]): A list of file paths to the images for benchmarking.
+        img_sizes (list[tuple], optional): A list of tuples representing different image sizes to be tested.
+            Defaults to [(100, 100), (200, 200), (300, 300)].
+        workers (list[int], optional): Numbers of worker processes to be tested.
+            Defaults to the powers of two up to the number of cores.
+        angle (int, optional): Rotation angle in degrees. Defaults to 15.
+        warmup (int, optional): Number of untimed calls of every algorithm. Defaults to 1.
+        repeat (int, optional): Number of timed calls of every algorithm. Defaults to 3.
+
+    Returns:
+        pd.DataFrame: One row per image, size, algorithm and number of workers with its
+            time summary and, for rotate_paralelized, the startup, IPC and compute costs of its persistent pool.
+    """
+    if workers is None:
+        workers = [2**i for i in range(find_available_cores().bit_length()) if 2**i <= find_available_cores()]
+    rows = []
+    for path in img_paths:
+        original_img = cv2.imread(path)
+        for size in img_sizes:
+            img = cv2.resize(original_img, size)
+            key = {"file_name": _get_file_name(path), "size": f"{size[0]}x{size[1]}", "pixels": size[0]*size[1]}
+            single_node = summarize_times(measure_func_time(lambda: Image(img).rotate(angle), warmup, repeat))
+            rows.append({**key, "algorithm": "rotate", "workers": 1, **single_node})
+            for num_processes in workers:
+                parallel = summarize_times(measure_func_time(
+                    lambda: Image(img).rotate_paralelized(angle, num_processes), warmup, repeat))
+                overheads = measure_rotate_paralelized_overheads(img, angle, num_processes, warmup, repeat)
+                rows.append({**key, "algorithm": "rotate_paralelized", "workers": num_processes, **parallel, **overheads})
+                shared = summarize_times(measure_func_time(
+                    lambda: rotate_shared(img, angle, num_processes=num_processes), warmup, repeat))
+                rows.append({**key, "algorithm": "rotate_shared", "workers": num_processes, **shared})
+    return pd.DataFrame(rows)
+
+
+def _multiply_mats_recursive(*mats: ndarray):
+    """
+    The former recursive multiply_mats, kept as the reference of benchmark_mat_chain.
+    """
+    if len(mats) < 2:
+        raise Exception("Not enough matrices")
+    if len(mats) == 2:
+        return np.matmul(mats[0], mats[1])
+    return np.matmul(mats[0], _multiply_mats_recursive(*mats[1:]))
+
+
+def benchmark_mat_chain(chain_lengths: list[int] = [2, 4, 8, 16],
+                        num_points: int = 10000,
+                        num_sets: int = 16,
+                        warmup: int = 1,
+                        repeat: int = 5) -> pd.DataFrame:
+    """
+    Microbenchmark of the matrix chain facility against the former recursion.
+
+    Every chain is reduced with both functions, then its product is applied to a set of
+    points once per point with the recursion, as calc_new_img did, and in a single call
+    with apply_mat. Stacks of per set matrices are also applied with one apply_mats call
+    and with a loop of apply_mat calls.
+
+    Args:
+        chain_lengths (list[int], optional): Numbers of matrices of the chains. Defaults to [2, 4, 8, 16].
+        num_points (int, optional): Number of points of a set. Defaults to 10000.
+        num_sets (int, optional): Number of point sets of the batched case. Defaults to 16.
+        warmup (int, optional): Number of untimed calls of every case. Defaults to 1.
+        repeat (int, optional): Number of timed calls of every case. Defaults to 5.
+
+    Returns:
+        pd.DataFrame: One row per case and chain length with its time summary.
+    """
+    img_ops = ImageOperations()
+    rng = np.random.default_rng(0)
+    points = np.concatenate([rng.uniform(0, 1000, (num_points, 2)), np.ones((num_points, 1))], axis=1)
+    point_sets = np.broadcast_to(points, (num_sets,) + points.shape)
+    rows = []
+    for chain_length in chain_lengths:
+        mats = [img_ops.calc_rotation_mat(angle) if i % 2 else img_ops.calc_transfer_mat(angle, -angle)
+                for i, angle in enumerate(rng.integers(-90, 90, chain_length))]
+        product = multiply_mats(*mats)
+        per_set_mats = np.stack([product]*num_sets)
+        cases = {
+            "chain recursive": lambda: _multiply_mats_recursive(*mats),
+            "chain multiply_mats": lambda: multiply_mats(*mats),
+            "points recursive per point": lambda: [_multiply_mats_recursive(product, point) for point in points],
+            "points apply_mat": lambda: apply_mat(product, points),
+            "sets apply_mat loop": lambda: [apply_mat(mat, point_set) for mat, point_set in zip(per_set_mats, point_sets)],
+            "sets apply_mats": lambda: apply_mats(per_set_mats, point_sets),
+        }
+        for name, case in cases.items():
+            rows.append({"chain_length": chain_length, "case": name,
+                         **summarize_times(measure_func_time(case, warmup, repeat))})
+    return pd.DataFrame(rows)
+
+
 def plot_benchmarking(img_paths: list[str], 
                      img_sizes:list[tuple] = [(100, 100), (200, 200), (300, 300)]
                      ) -> list[pd.DataFrame]:
@@ -86,9 +215,7 @@ def plot_benchmarking(img_paths: list[str],
     Args:
         img_paths (List[str]): A list of file paths to the images for benchmarking.
         img_sizes (List[Tuple[int, int]], optional): A list of tuples representing different image sizes to be tested.
-            Defaults to [(1000, 1000), (2000, 2000), (3000, 3000), (4000, 4000), (5000, 5000)].
-        use_cv2 (bool, optional): A flag indicating whether to use the OpenCV library for image processing.
-            Defaults to False.
+            Defaults to [(100, 100), (200, 200), (300, 300)].
 
     Returns:
         List[pd.DataFrame]: A list of Pandas DataFrames containing benchmarking results for each image.
@@ -133,4 +260,17 @@ def plot_benchmarking(img_paths: list[str],
     _, axes = plt.subplots(ncols=len(results), 
                            figsize=(12, 5))
     axes = plot_results(results, axes)
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+def plot_scaling(results: pd.DataFrame) -> None:
+    """
+    Plots the scaling curves of benchmark_scaling, median time against size for every
+    algorithm and number of workers.
+
+    Args:
+        results (pd.DataFrame): The results of benchmark_scaling.
+    """
+    results = results.assign(curve=results["algorithm"] + " x" + results["workers"].astype(str))
+    sns.lineplot(data=results, x="pixels", y="median_ms", hue="curve", marker="o")
+    plt.show()
@@ -1,23 +1,59 @@
-import os
+from functools import reduce
+from shared_processing.pool import find_available_cores  # noqa: F401, kept importable from utils
 
 import numpy as np
 
 
 
 def multiply_mats(*mats: np.ndarray):
-    operation = lambda M1, M2 : np.matmul(M1, M2)
+    """
+    Reduces a chain of matrices to their product, M1 @ M2 @ ... @ Mn.
+
+    The chain is reduced right to left in a loop, in the same order as the former
+    recursion, so the product is the same without slicing the arguments once per matrix.
+
+    Args:
+        *mats (np.ndarray): The matrices, the last one may be a vector.
+
+    Returns:
+        np.ndarray: The product of the chain.
+
+    Raises:
+        Exception: If less than 2 matrices are given.
+    """
     if len(mats) < 2:
         raise Exception("Not enough matrices")
-    if len(mats) == 2:
-        return operation(mats[0], mats[1])
-    return operation(mats[0], multiply_mats(*mats[1:]))
+    return reduce(lambda product, mat: np.matmul(mat, product), reversed(mats[:-1]), mats[-1])
 
 
-def find_available_cores() -> int:
+def apply_mat(mat: np.ndarray, points: np.ndarray, normalize: bool = False) -> np.ndarray:
     """
-    Returns the number of available CPU cores on the current system.
+    Applies a 3x3 homogeneous matrix to a set of points in a single call.
+
+    Args:
+        mat (np.ndarray): 3x3 matrix.
+        points (np.ndarray): (N, 3) homogeneous points, one per row.
+        normalize (bool, optional): If True, the points are divided by their last coordinate,
+            needed after projective transforms. Defaults to False.
+
+    Returns:
+        np.ndarray: The (N, 3) transformed points.
+    """
+    mapped = np.matmul(points, np.swapaxes(mat, -1, -2))  # (mat @ points.T).T, batched over leading axes
+    return mapped / mapped[..., 2:3] if normalize else mapped
+
+
+def apply_mats(mats: np.ndarray, points: np.ndarray, normalize: bool = False) -> np.ndarray:
+    """
+    Applies a stack of 3x3 homogeneous matrices to a stack of point sets in a single batched call.
+
+    Args:
+        mats (np.ndarray): (B, 3, 3) matrices, one per point set.
+        points (np.ndarray): (B, N, 3) point sets, or (N, 3) points shared by every matrix.
+        normalize (bool, optional): If True, the points are divided by their last coordinate,
+            needed after projective transforms. Defaults to False.
 
     Returns:
-        int: The number of available CPU cores.
+        np.ndarray: The (B, N, 3) transformed point sets.
     """
-    return os.cpu_count()
\ No newline at end of file
+    return apply_mat(mats, points if points.ndim == 3 else points[None], normalize)
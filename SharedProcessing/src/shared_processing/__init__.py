@@ -0,0 +1,5 @@
+"""
+Processing utilities shared by the thresholding and RotacionTraslacion packages.
+
+Install it next to either package with pip install -e SharedProcessing.
+"""
@@ -0,0 +1,162 @@
+import timeit
+import json
+import platform
+from typing import Callable, Union
+from shared_processing.pool import PoolManager, get_executor, find_available_cores
+
+import numpy as np
+import pandas as pd
+from numpy import median, percentile
+
+
+def measure_func_time(func: Callable, warmup: int = 1, repeat: int = 5) -> list[float]:
+    """
+    Measures the execution time of a given function.
+    The function is called warmup times without being timed, so caches, lazy imports
+    and persistent pools are ready, then it is timed repeat times.
+
+    Args:
+        func (Callable): The function for which the execution time needs to be measured,
+            it is called without arguments.
+        warmup (int, optional): Number of untimed calls. Defaults to 1.
+        repeat (int, optional): Number of timed calls. Defaults to 5.
+
+    Returns:
+        list[float]: The elapsed time in milliseconds of every timed call.
+    """
+    for _ in range(warmup):
+        func()
+    elapsed_times = []
+    for _ in range(repeat):
+        start_time = timeit.default_timer()
+        func()
+        end_time = timeit.default_timer()
+        elapsed_times.append((end_time - start_time) * 1000) #Miliseconds
+    return elapsed_times
+
+
+def summarize_times(elapsed_times: list[float]) -> dict:
+    """
+    Summarizes the elapsed times of the timed calls of a function.
+
+    Args:
+        elapsed_times (list[float]): The elapsed time in milliseconds of every call.
+
+    Returns:
+        dict: The median, 95th percentile, minimum and mean times in milliseconds.
+    """
+    return {
+        "median_ms": float(median(elapsed_times)),
+        "p95_ms": float(percentile(elapsed_times, 95)),
+        "min_ms": float(min(elapsed_times)),
+        "mean_ms": float(sum(elapsed_times) / len(elapsed_times)),
+    }
+
+
+def echo(data):
+    """
+    Returns its argument, a pool task whose cost is only the transfer of the data.
+    """
+    return data
+
+
+def measure_pool_overheads(ipc_tasks: list[tuple[Callable, list]],
+                           compute: Callable,
+                           num_processes: int = None,
+                           pixels: int = None,
+                           warmup: int = 1,
+                           repeat: int = 5) -> dict:
+    """
+    Splits the cost of a call running on the persistent pool into its parts.
+
+    The pool measured is the one shared_processing.pool.get_executor returns for the same
+    number of processes and pixels, so the figures describe the timed calls using it, a
+    thread pool for small inputs included.
+
+    Args:
+        ipc_tasks (list[tuple[Callable, list]]): Picklable functions doing no work, e.g. echo,
+            and the arguments a call sends to the workers, every function is mapped over its arguments.
+        compute (Callable): Does the work of the call in the calling process, it is called without arguments.
+        num_processes (int, optional): Number of workers. Defaults to the number of cores.
+        pixels (int, optional): Number of pixels the call passes to get_executor. Defaults to None.
+        warmup (int, optional): Number of untimed calls. Defaults to 1.
+        repeat (int, optional): Number of timed calls. Defaults to 5.
+
+    Returns:
+        dict: The median milliseconds of getting the persistent pool, as every call does,
+            of starting a new pool of the same kind, which is what keeping it alive saves,
+            of sending the arguments to the workers and back, and of the work in the calling process.
+    """
+    num_processes = find_available_cores() if num_processes is None else num_processes
+    executor = get_executor(num_processes, pixels)
+
+    def start_new_pool():
+        with PoolManager() as pool_manager:
+            new_executor = pool_manager.get_executor(num_processes, pixels)
+            list(new_executor.map(echo, range(num_processes)))
+
+    def round_trip():
+        for func, args in ipc_tasks:
+            list(executor.map(func, args))
+
+    return {
+        "pool_startup_ms": summarize_times(measure_func_time(lambda: get_executor(num_processes, pixels), warmup, repeat))["median_ms"],
+        "new_pool_startup_ms": summarize_times(measure_func_time(start_new_pool, 0, repeat))["median_ms"],
+        "ipc_ms": summarize_times(measure_func_time(round_trip, warmup, repeat))["median_ms"],
+        "compute_ms": summarize_times(measure_func_time(compute, warmup, repeat))["median_ms"],
+    }
+
+
+def save_results(results: pd.DataFrame, json_path: str) -> dict:
+    """
+    Saves benchmark results as JSON along with a description of the machine.
+
+    Args:
+        results (pd.DataFrame): The results of a benchmark_scaling.
+        json_path (str): Path of the JSON file.
+
+    Returns:
+        dict: The saved document.
+    """
+    document = {
+        "machine": {
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": find_available_cores(),
+        },
+        "results": json.loads(results.to_json(orient="records")),
+    }
+    with open(json_path, "w") as json_file:
+        json.dump(document, json_file, indent=2)
+    return document
+
+
+def compare_with_baseline(results: Union[pd.DataFrame, str],
+                          baseline_path: str,
+                          tolerance: float = 0.10) -> pd.DataFrame:
+    """
+    Compares benchmark results against a baseline saved with save_results.
+
+    Args:
+        results (Union[pd.DataFrame, str]): The results of a benchmark_scaling or the path of their JSON file.
+        baseline_path (str): Path of the baseline JSON file.
+        tolerance (float, optional): Relative slowdown of the median time above which a
+            result is a regression. Defaults to 0.10.
+
+    Returns:
+        pd.DataFrame: Every result found in the baseline with its baseline median, the ratio
+            between both medians and whether it regressed.
+    """
+    def load(json_path: str) -> pd.DataFrame:
+        with open(json_path, "r") as json_file:
+            return pd.DataFrame(json.load(json_file)["results"])
+
+    if isinstance(results, str):
+        results = load(results)
+    keys = ["file_name", "size", "algorithm", "workers"]
+    baseline = load(baseline_path)[keys + ["median_ms"]].rename(columns={"median_ms": "baseline_median_ms"})
+    comparison = results[keys + ["median_ms"]].merge(baseline, on=keys)
+    comparison["ratio"] = comparison["median_ms"] / comparison["baseline_median_ms"]
+    comparison["regression"] = comparison["ratio"] > 1 + tolerance
+    return comparison
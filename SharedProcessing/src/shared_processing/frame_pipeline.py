@@ -0,0 +1,238 @@
+import os
+import time
+from queue import Queue, Empty, Full
+from concurrent.futures import Executor
+from threading import Thread, Event
+from typing import Callable, Iterator
+
+import cv2
+from numpy import ndarray
+
+
+FRAME_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff")
+_END = object()  # marks the end of a stage
+
+
+def iter_video_frames(video_path: str) -> Iterator[ndarray]:
+    """
+    Decodes the frames of a video one at a time.
+
+    Args:
+        video_path (str): Path of the video.
+
+    Yields:
+        ndarray: The next BGR frame.
+
+    Raises:
+        FileNotFoundError: If the video can not be opened.
+    """
+    capture = cv2.VideoCapture(video_path)
+    if not capture.isOpened():
+        raise FileNotFoundError(f"Can not open the video {video_path}")
+    try:
+        while True:
+            read, frame = capture.read()
+            if not read:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def iter_directory_frames(dir_path: str) -> Iterator[ndarray]:
+    """
+    Reads the images of a directory one at a time, sorted by file name.
+
+    Args:
+        dir_path (str): Path of the directory.
+
+    Yields:
+        ndarray: The next frame, as read by cv2.imread.
+
+    Raises:
+        ValueError: If an image of the directory can not be read.
+    """
+    for file_name in sorted(os.listdir(dir_path)):
+        if file_name.lower().endswith(FRAME_EXTENSIONS):
+            frame_path = os.path.join(dir_path, file_name)
+            frame = cv2.imread(frame_path, cv2.IMREAD_UNCHANGED)
+            if frame is None:
+                raise ValueError(f"Can not read the frame {frame_path}")
+            yield frame
+
+
+def iter_frames(source_path: str) -> Iterator[ndarray]:
+    """
+    Reads the frames of a video or of a directory of frames.
+
+    Args:
+        source_path (str): Path of a video or of a directory of frames.
+
+    Returns:
+        Iterator[ndarray]: The frames in order.
+    """
+    return iter_directory_frames(source_path) if os.path.isdir(source_path) else iter_video_frames(source_path)
+
+
+def get_video_fps(source_path: str, default: float = 30.0) -> float:
+    """
+    Reads the frame rate of a video.
+
+    Args:
+        source_path (str): Path of a video or of a directory of frames.
+        default (float, optional): Frame rate of directories and of videos without one. Defaults to 30.0.
+
+    Returns:
+        float: The frame rate.
+    """
+    if os.path.isdir(source_path):
+        return default
+    capture = cv2.VideoCapture(source_path)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    capture.release()
+    return fps if fps > 0 else default
+
+
+class FrameWriter:
+    """
+    Writes frames to a video, when the output path has an extension, or to a directory of
+    numbered PNG frames otherwise.
+    """
+
+    def __init__(self, output_path: str, fps: float = 30.0, fourcc: str = "mp4v"):
+        """
+        Args:
+            output_path (str): Path of the output video or directory.
+            fps (float, optional): Frame rate of the output video. Defaults to 30.0.
+            fourcc (str, optional): Codec of the output video. Defaults to "mp4v".
+        """
+        self._output_path = output_path
+        self._fps = fps
+        self._fourcc = fourcc
+        self._video_writer = None
+        self._is_video = os.path.splitext(output_path)[1] != ""
+        self.num_frames = 0
+        if not self._is_video:
+            os.makedirs(output_path, exist_ok=True)
+
+    def write(self, frame: ndarray) -> None:
+        """
+        Writes the next frame, the video is opened with the size of the first frame.
+
+        Args:
+            frame (ndarray): A gray or BGR frame.
+        """
+        if not self._is_video:
+            cv2.imwrite(os.path.join(self._output_path, f"{self.num_frames:06d}.png"), frame)
+        else:
+            if self._video_writer is None:
+                self._video_writer = cv2.VideoWriter(self._output_path, cv2.VideoWriter_fourcc(*self._fourcc), self._fps,
+                                                     (frame.shape[1], frame.shape[0]), frame.ndim == 3)
+            self._video_writer.write(frame)
+        self.num_frames += 1
+
+    def close(self) -> None:
+        """
+        Closes the output video.
+        """
+        if self._video_writer is not None:
+            self._video_writer.release()
+            self._video_writer = None
+
+
+def _put(stage_queue: Queue, item, stop: Event) -> bool:
+    """
+    Puts an item into a bounded queue, waiting while it is full unless the pipeline stops.
+
+    Returns:
+        bool: False if the pipeline stopped before the item was put.
+    """
+    while not stop.is_set():
+        try:
+            stage_queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _get(stage_queue: Queue, stop: Event):
+    """
+    Gets an item from a queue, waiting while it is empty unless the pipeline stops.
+
+    Returns:
+        The item, or the end marker if the pipeline stopped.
+    """
+    while not stop.is_set():
+        try:
+            return stage_queue.get(timeout=0.1)
+        except Empty:
+            continue
+    return _END
+
+
+def run_frame_pipeline(frames: Iterator[ndarray],
+                       process_frame: Callable[[ndarray], ndarray],
+                       write_frame: Callable[[ndarray], None],
+                       executor: Executor,
+                       queue_size: int = 8) -> dict:
+    """
+    Processes a sequence of frames overlapping their decoding, processing and encoding.
+
+    A thread decodes frames into a bounded queue, the calling thread submits them to the
+    given worker pool and another thread writes the results in submission order, so
+    the output keeps the order of the frames. The bounded queues cap the frames held in
+    memory and let a slow stage hold back the others.
+
+    Args:
+        frames (Iterator[ndarray]): The frames to be processed.
+        process_frame (Callable[[ndarray], ndarray]): Picklable function processing a frame.
+        write_frame (Callable[[ndarray], None]): Function writing a processed frame.
+        executor (Executor): Pool processing the frames, usually a persistent pool of
+            shared_processing.pool.get_executor.
+        queue_size (int, optional): Capacity of every queue. Defaults to 8.
+
+    Returns:
+        dict: The number of frames, the elapsed seconds and the frames per second.
+    """
+    decoded, processed = Queue(maxsize=queue_size), Queue(maxsize=queue_size)
+    stop, errors = Event(), []
+    num_frames = [0]
+
+    def decode():
+        try:
+            for frame in frames:
+                if not _put(decoded, frame, stop):
+                    return
+            _put(decoded, _END, stop)
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+
+    def encode():
+        try:
+            while (future := _get(processed, stop)) is not _END:
+                write_frame(future.result())
+                num_frames[0] += 1
+        except Exception as error:
+            errors.append(error)
+            stop.set()
+
+    start = time.perf_counter()
+    decoder, encoder = Thread(target=decode, daemon=True), Thread(target=encode, daemon=True)
+    decoder.start()
+    encoder.start()
+    try:
+        while (frame := _get(decoded, stop)) is not _END:
+            if not _put(processed, executor.submit(process_frame, frame), stop):
+                break
+        _put(processed, _END, stop)
+        encoder.join()
+    finally:
+        stop.set()  # releases the decoder if the encoder stopped early, and both if submitting failed
+        encoder.join()
+        decoder.join()
+    if errors:
+        raise errors[0]
+    seconds = time.perf_counter() - start
+    return {"frames": num_frames[0], "seconds": seconds, "fps": num_frames[0] / seconds if seconds > 0 else 0.0}
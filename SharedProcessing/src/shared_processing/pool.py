@@ -0,0 +1,170 @@
+import atexit
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from importlib import import_module
+from threading import Lock
+from typing import Callable
+
+
+# Images with fewer pixels are processed by threads, the IPC of processes is not worth it
+MIN_PROCESS_PIXELS = 512*512
+# Number of pools of different sizes kept alive, for processes and for threads
+MAX_POOLS = 2
+# Imported once by every worker process when it starts, the ones not installed are skipped
+WARM_MODULES = ("numpy", "cv2")
+
+
+def find_available_cores() -> int:
+    """
+    Returns the number of available CPU cores on the current system.
+
+    Returns:
+        int: The number of available CPU cores.
+    """
+    return os.cpu_count()
+
+
+def _warm_worker(module_names: tuple[str, ...]) -> None:
+    """
+    Imports the heavy modules once when a worker starts, instead of during its first task.
+
+    Args:
+        module_names (tuple[str, ...]): Modules to be imported, the ones not installed are skipped.
+    """
+    for module_name in module_names:
+        try:
+            import_module(module_name)
+        except ImportError:  # cv2 is not a requirement of every package using the pool
+            continue
+
+
+def _ping(_: int) -> None:
+    """
+    Empty task, makes the pool start all its workers.
+    """
+
+
+class PoolManager:
+    """
+    Keeps worker pools alive across calls so their startup is only paid once.
+
+    Process pools serve large inputs and thread pools small ones. A pool is created the first
+    time its size is requested and only the pools of the MAX_POOLS most recently requested
+    sizes are kept. A pool dropped from the manager is not shut down, so callers still
+    holding it can keep using it, it finishes its pending work and exits once the last of
+    them releases it. Every kept pool is shut down explicitly or when leaving a with block.
+    """
+
+    def __init__(self,
+                 min_process_pixels: int = MIN_PROCESS_PIXELS,
+                 max_pools: int = MAX_POOLS,
+                 warm_modules: tuple[str, ...] = WARM_MODULES):
+        """
+        Args:
+            min_process_pixels (int, optional): Inputs with fewer pixels are sent to a
+                thread pool. Defaults to MIN_PROCESS_PIXELS.
+            max_pools (int, optional): Number of pools of different sizes kept alive, for
+                processes and for threads. Defaults to MAX_POOLS.
+            warm_modules (tuple[str, ...], optional): Modules imported by every worker process
+                when it starts. Defaults to WARM_MODULES.
+
+        Raises:
+            ValueError: If max_pools is not positive.
+        """
+        if max_pools <= 0:
+            raise ValueError(f"At least one pool must be kept, got max_pools={max_pools}")
+        self._min_process_pixels = min_process_pixels
+        self._max_pools = max_pools
+        self._warm_modules = tuple(warm_modules)
+        self._process_executors: OrderedDict[int, ProcessPoolExecutor] = OrderedDict()
+        self._thread_executors: OrderedDict[int, ThreadPoolExecutor] = OrderedDict()
+        self._lock = Lock()
+
+    def _get_or_create(self,
+                       executors: OrderedDict,
+                       num_workers: int,
+                       create_executor: Callable[[int], Executor]) -> Executor:
+        """
+        Returns the pool of a size, the least recently used pool is dropped when too many are kept.
+
+        Args:
+            executors (OrderedDict): The kept pools by size, least recently used first.
+            num_workers (int): Number of workers of the pool.
+            create_executor (Callable[[int], Executor]): Creates a pool of a size.
+
+        Returns:
+            Executor: The pool.
+        """
+        if num_workers in executors:
+            executors.move_to_end(num_workers)
+        else:
+            executors[num_workers] = create_executor(num_workers)
+            if len(executors) > self._max_pools:
+                executors.popitem(last=False)  # not shut down, it may still be in use
+        return executors[num_workers]
+
+    def _create_process_executor(self, num_processes: int) -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=num_processes, initializer=_warm_worker,
+                                       initargs=(self._warm_modules,))
+        list(executor.map(_ping, range(num_processes)))  # starts the workers now
+        return executor
+
+    def get_executor(self, num_processes: int = None, pixels: int = None) -> Executor:
+        """
+        Returns the persistent pool suited to an input.
+
+        Args:
+            num_processes (int, optional): Number of workers. Defaults to the number of cores.
+            pixels (int, optional): Number of pixels of the input, small inputs get a
+                thread pool. If None, a process pool is returned. Defaults to None.
+
+        Returns:
+            Executor: The process or the thread pool.
+        """
+        num_processes = find_available_cores() if num_processes is None else num_processes
+        with self._lock:
+            if pixels is not None and pixels < self._min_process_pixels:
+                return self._get_or_create(self._thread_executors, num_processes, ThreadPoolExecutor)
+            return self._get_or_create(self._process_executors, num_processes, self._create_process_executor)
+
+    def shutdown(self) -> None:
+        """
+        Shuts every kept pool down, the next call creates them again.
+        """
+        with self._lock:
+            for executor in [*self._process_executors.values(), *self._thread_executors.values()]:
+                executor.shutdown()
+            self._process_executors.clear()
+            self._thread_executors.clear()
+
+    def __enter__(self) -> "PoolManager":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+_pool_manager = PoolManager()
+atexit.register(_pool_manager.shutdown)
+
+
+def get_pool_manager() -> PoolManager:
+    """
+    Returns the pool manager shared by the whole process.
+    """
+    return _pool_manager
+
+
+def get_executor(num_processes: int = None, pixels: int = None) -> Executor:
+    """
+    Returns a persistent pool of the shared pool manager, see PoolManager.get_executor.
+    """
+    return _pool_manager.get_executor(num_processes, pixels)
+
+
+def shutdown() -> None:
+    """
+    Shuts the pools of the shared pool manager down.
+    """
+    _pool_manager.shutdown()
@@ -0,0 +1,5 @@
+"""
+Definitions of the .aku file format shared by formatReader and formatWriter.
+
+Install it next to either app with pip install -e akuFormat.
+"""
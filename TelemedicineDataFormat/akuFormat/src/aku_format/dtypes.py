@@ -0,0 +1,49 @@
+class Dtypes:
+    DTYPE_CODES = {  # codes stored in the header of versioned .aku files, never reuse or reorder them
+        'uint8': 1,
+        'int8': 2,
+        'uint16': 3,
+        'int16': 4,
+        'uint32': 5,
+        'int32': 6,
+        'uint64': 7,
+        'int64': 8,
+        'float16': 9,
+        'float32': 10,
+        'float64': 11,
+    }
+
+    @classmethod
+    def get_dtype_code(cls, dtype: str) -> int:
+        """Get the code of a dtype.
+
+        Args:
+            dtype (str): Name of the dtype, e.g. 'uint16'.
+
+        Raises:
+            ValueError: If the dtype can not be stored in a .aku file.
+
+        Returns:
+            int: The code stored in the header.
+        """
+        if dtype not in cls.DTYPE_CODES:
+            raise ValueError(f"Unsupported .aku dtype {dtype}, expected one of {list(cls.DTYPE_CODES)}")
+        return cls.DTYPE_CODES[dtype]
+
+    @classmethod
+    def get_dtype_from_code(cls, code: int) -> str:
+        """Get the dtype of a code.
+
+        Args:
+            code (int): The code stored in the header.
+
+        Raises:
+            ValueError: If the code is unknown.
+
+        Returns:
+            str: Name of the dtype.
+        """
+        for dtype, dtype_code in cls.DTYPE_CODES.items():
+            if dtype_code == code:
+                return dtype
+        raise ValueError(f"Unknown dtype code {code}")
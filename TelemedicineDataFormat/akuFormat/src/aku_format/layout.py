@@ -0,0 +1,197 @@
+import os
+import lzma
+import struct
+import zlib
+from io import BufferedReader
+from typing import Iterator, NamedTuple
+from aku_format.dtypes import Dtypes
+
+from numpy import ndarray, dtype
+
+
+HEADER = struct.Struct("<IIB")  # rows, cols, dims. Byte compatible with the legacy "IIc" layout
+
+# Versioned container:
+#   PREAMBLE | IMAGE_INFO | SECTION_COUNT | SECTION_ENTRY * count | sections...
+MAGIC = b"\x89AKU"
+PREAMBLE = struct.Struct("<4sB")  # magic, version
+IMAGE_INFO = struct.Struct("<IIBB")  # rows, cols, dims, dtype code
+SECTION_COUNT = struct.Struct("<H")
+SECTION_ENTRY = struct.Struct("<4sQQ")  # tag, absolute offset, length in bytes
+SUPPORTED_VERSIONS = (2,)  # legacy (v1) files have no preamble, versioned containers start at 2
+METADATA_TAG = b"META"
+PIXELS_TAG = b"PIXL"
+COMPRESSED_PIXELS_TAG = b"PIXZ"
+MASK_TAG = b"MASK"
+
+# Compressed pixel section:
+#   CHUNKS_HEADER | CHUNK_ENTRY * num_chunks | chunks...
+CHUNKS_HEADER = struct.Struct("<BII")  # compressor code, rows per chunk, number of chunks
+CHUNK_ENTRY = struct.Struct("<QQ")  # offset relative to the start of the section, length in bytes
+
+DECOMPRESSORS = {
+    1: zlib.decompress,
+    2: lzma.decompress,
+}
+
+
+class AkuLayout(NamedTuple):
+    """Where everything lives inside a .aku file, regardless of its version.
+
+    Attributes:
+        version (int): Format version of the file.
+        rows (int): Number of rows of the image.
+        cols (int): Number of columns of the image.
+        dims (int): Number of channels of the image.
+        dtype (dtype): Little-endian dtype of the pixels.
+        sections (dict[bytes, tuple[int, int]]): Absolute offset and length of every section by tag.
+    """
+    version: int
+    rows: int
+    cols: int
+    dims: int
+    dtype: dtype
+    sections: dict[bytes, tuple[int, int]]
+
+    @property
+    def compressed(self) -> bool:
+        """Whether the pixels are stored as compressed row chunks.
+
+        Returns:
+            bool: True if the pixels are compressed, False otherwise.
+        """
+        return COMPRESSED_PIXELS_TAG in self.sections
+
+    @property
+    def shape(self) -> tuple[int, int, int]:
+        """Shape of the image.
+
+        Returns:
+            tuple[int, int, int]: The rows, cols and dims of the image.
+        """
+        return (self.rows, self.cols, self.dims)
+
+def read_exactly(bin_file: BufferedReader, num_bytes: int) -> bytes:
+    """
+    Read exactly num_bytes from a binary file.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        num_bytes (int): Number of bytes to be read.
+
+    Raises:
+        ValueError: If the file ends before num_bytes were read.
+
+    Returns:
+        bytes: The bytes read.
+    """
+    data = bin_file.read(num_bytes)
+    if len(data) != num_bytes:
+        raise ValueError("Truncated .aku file")
+    return data
+
+def decode_header(bin_file: BufferedReader) -> tuple[int, int, int]:
+    """
+    Read and decode the image header of a legacy (v1) .aku file.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream positioned at the header.
+
+    Raises:
+        ValueError: If the file is too short to hold a header.
+
+    Returns:
+        tuple[int, int, int]: The rows, cols and dims of the image.
+    """
+    return HEADER.unpack(read_exactly(bin_file, HEADER.size))
+
+def read_layout(bin_file: BufferedReader) -> AkuLayout:
+    """
+    Read the layout of a .aku file of any supported version.
+
+    Legacy (v1) files have no offsets table, their pixels follow the header and
+    their metadata, if any, runs from the end of the pixels to the end of the file.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream, it is left positioned after the header.
+
+    Raises:
+        ValueError: If the file is truncated or its version is not supported.
+
+    Returns:
+        AkuLayout: The layout of the file.
+    """
+    bin_file.seek(0)
+    magic, version = PREAMBLE.unpack(read_exactly(bin_file, PREAMBLE.size))
+    if magic != MAGIC:
+        bin_file.seek(0)
+        rows, cols, dims = decode_header(bin_file)
+        pixels_length = rows*cols*dims
+        file_size = os.fstat(bin_file.fileno()).st_size
+        return AkuLayout(1, rows, cols, dims, dtype("uint8"), {
+            PIXELS_TAG: (HEADER.size, pixels_length),
+            METADATA_TAG: (HEADER.size + pixels_length, file_size - HEADER.size - pixels_length)
+        })
+    if version not in SUPPORTED_VERSIONS:
+        raise ValueError(f"Unsupported .aku version {version}")
+
+    rows, cols, dims, dtype_code = IMAGE_INFO.unpack(read_exactly(bin_file, IMAGE_INFO.size))
+    num_sections = SECTION_COUNT.unpack(read_exactly(bin_file, SECTION_COUNT.size))[0]
+    table = read_exactly(bin_file, num_sections*SECTION_ENTRY.size)
+    sections = {tag: (offset, length) for tag, offset, length in SECTION_ENTRY.iter_unpack(table)}
+    pixels_dtype = dtype(Dtypes.get_dtype_from_code(dtype_code)).newbyteorder("<")
+    return AkuLayout(version, rows, cols, dims, pixels_dtype, sections)
+
+def read_chunk_index(bin_file: BufferedReader, layout: AkuLayout) -> tuple[int, int, list[tuple[int, int]]]:
+    """
+    Read the index of a compressed pixel section.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        layout (AkuLayout): The layout of the file.
+
+    Raises:
+        ValueError: If the compressor is unknown.
+
+    Returns:
+        tuple[int, int, list[tuple[int, int]]]: The compressor code, the rows per chunk and
+            the absolute offset and length of every chunk.
+    """
+    section_offset, _ = layout.sections[COMPRESSED_PIXELS_TAG]
+    bin_file.seek(section_offset)
+    compressor_code, rows_per_chunk, num_chunks = CHUNKS_HEADER.unpack(read_exactly(bin_file, CHUNKS_HEADER.size))
+    if compressor_code not in DECOMPRESSORS:
+        raise ValueError(f"Unknown .aku compressor code {compressor_code}")
+    index = read_exactly(bin_file, num_chunks*CHUNK_ENTRY.size)
+    chunks = [(section_offset + offset, length) for offset, length in CHUNK_ENTRY.iter_unpack(index)]
+    return compressor_code, rows_per_chunk, chunks
+
+
+def iter_compressed_chunks(bin_file: BufferedReader, layout: AkuLayout) -> Iterator[ndarray]:
+    """
+    Decompress the pixels of a compressed .aku file one chunk at a time.
+
+    Only one decompressed chunk is held at a time, so the memory used is bounded by
+    the rows per chunk and not by the size of the image.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        layout (AkuLayout): The layout of the file, its pixels must be compressed.
+
+    Raises:
+        ValueError: If the file is truncated, the compressor is unknown or a chunk
+            does not decompress to the expected size.
+
+    Yields:
+        ndarray: The (rows, cols, dims) rows of the next chunk.
+    """
+    compressor_code, rows_per_chunk, chunks = read_chunk_index(bin_file, layout)
+    decompress = DECOMPRESSORS[compressor_code]
+    row_bytes = layout.cols*layout.dims*layout.dtype.itemsize
+    for chunk_number, (offset, length) in enumerate(chunks):
+        bin_file.seek(offset)
+        chunk = decompress(read_exactly(bin_file, length))
+        num_rows = min(rows_per_chunk, layout.rows - chunk_number*rows_per_chunk)
+        if len(chunk) != num_rows*row_bytes:
+            raise ValueError("Corrupted .aku compressed chunk")
+        yield ndarray((num_rows,) + layout.shape[1:], dtype=layout.dtype, buffer=chunk)
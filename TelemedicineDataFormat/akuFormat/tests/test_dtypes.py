@@ -0,0 +1,37 @@
+import unittest
+from aku_format.dtypes import Dtypes
+
+
+class TestDtypes(unittest.TestCase):
+    # The codes are written into every versioned .aku file, changing one breaks the files already written
+    PINNED_CODES = {
+        'uint8': 1,
+        'int8': 2,
+        'uint16': 3,
+        'int16': 4,
+        'uint32': 5,
+        'int32': 6,
+        'uint64': 7,
+        'int64': 8,
+        'float16': 9,
+        'float32': 10,
+        'float64': 11,
+    }
+
+    def test_codes_are_pinned(self):
+        self.assertEqual(Dtypes.DTYPE_CODES, self.PINNED_CODES)
+
+    def test_codes_round_trip(self):
+        for dtype, code in self.PINNED_CODES.items():
+            self.assertEqual(Dtypes.get_dtype_code(dtype), code)
+            self.assertEqual(Dtypes.get_dtype_from_code(code), dtype)
+
+    def test_unknown_dtype_and_code(self):
+        with self.assertRaises(ValueError):
+            Dtypes.get_dtype_code('complex64')
+        with self.assertRaises(ValueError):
+            Dtypes.get_dtype_from_code(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import io
+import unittest
+import zlib
+from aku_format.dtypes import Dtypes
+from aku_format.layout import (MAGIC, PREAMBLE, IMAGE_INFO, SECTION_COUNT, SECTION_ENTRY, CHUNKS_HEADER, CHUNK_ENTRY,
+                               COMPRESSED_PIXELS_TAG, read_layout, iter_compressed_chunks)
+
+from numpy import arange, concatenate, uint16
+
+
+def _compressed_container(img, rows_per_chunk: int) -> bytes:
+    """Builds a v2 file holding a (rows, cols) image as zlib compressed row chunks."""
+    rows, cols = img.shape
+    chunks = [zlib.compress(img[start:start + rows_per_chunk].tobytes()) for start in range(0, rows, rows_per_chunk)]
+    index_size = CHUNKS_HEADER.size + len(chunks)*CHUNK_ENTRY.size
+    section = bytearray(CHUNKS_HEADER.pack(1, rows_per_chunk, len(chunks)))
+    offset = index_size
+    for chunk in chunks:
+        section += CHUNK_ENTRY.pack(offset, len(chunk))
+        offset += len(chunk)
+    section += b"".join(chunks)
+    head = PREAMBLE.pack(MAGIC, 2) + IMAGE_INFO.pack(rows, cols, 1, Dtypes.get_dtype_code(img.dtype.name))
+    section_offset = len(head) + SECTION_COUNT.size + SECTION_ENTRY.size
+    return (head + SECTION_COUNT.pack(1) + SECTION_ENTRY.pack(COMPRESSED_PIXELS_TAG, section_offset, len(section))
+            + bytes(section))
+
+
+class TestLayout(unittest.TestCase):
+    def test_compressed_chunks(self):
+        img = arange(10*7, dtype=uint16).reshape(10, 7)
+        bin_file = io.BytesIO(_compressed_container(img, rows_per_chunk=4))
+        layout = read_layout(bin_file)
+        self.assertTrue(layout.compressed)
+        self.assertEqual(layout.shape, (10, 7, 1))
+        chunks = list(iter_compressed_chunks(bin_file, layout))
+        self.assertEqual([chunk.shape[0] for chunk in chunks], [4, 4, 2])
+        self.assertTrue((concatenate(chunks)[..., 0] == img).all())
+
+    def test_unsupported_version(self):
+        with self.assertRaises(ValueError):
+            read_layout(io.BytesIO(PREAMBLE.pack(MAGIC, 9)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import struct
+import tempfile
+import timeit
+from aku_format.layout import HEADER
+from file.dot_aku_codec import read_image
+
+from numpy import ndarray, zeros, random, uint8, array_equal
+
+
+def _legacy_read_image(bin_file) -> ndarray:
+    """
+    Per-byte reader the .aku format used before the bulk codec, kept as the benchmark reference.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream positioned at the header.
+
+    Returns:
+        ndarray: The (rows, cols, dims) uint8 image.
+    """
+    rows, cols, dims = struct.unpack("IIc", bin_file.read(9))
+    dims = dims[0]
+    img_data: ndarray = zeros((rows, cols, dims))
+    for i in range(rows):
+        for j in range(cols):
+            for k in range(dims):
+                img_data[i,j,k] = struct.unpack("c", bin_file.read(1))[0][0]
+    return img_data.astype('uint8')
+
+
+def _measure_func_time(func, repetitions: int = 3) -> float:
+    """
+    Measures the best execution time of a given callable.
+
+    Args:
+        func (Callable): The callable for which the execution time needs to be measured.
+        repetitions (int, optional): Number of times the callable is run. Defaults to 3.
+
+    Returns:
+        float: The best elapsed time in milliseconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repetitions)) * 1000  # Miliseconds
+
+
+def benchmark(img_sizes: list[tuple] = [(64, 64), (256, 256), (512, 512)]) -> list[dict]:
+    """
+    Benchmarks the legacy per-byte reader against the bulk codec reader.
+
+    Args:
+        img_sizes (list[tuple], optional): Image sizes to be tested.
+            Defaults to [(64, 64), (256, 256), (512, 512)].
+
+    Returns:
+        list[dict]: Timings in milliseconds and speedup for every image size.
+    """
+    results = []
+    for rows, cols in img_sizes:
+        img = random.randint(0, 256, (rows, cols, 3), dtype=uint8)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "aku.bin")
+            with open(file_path, "wb") as bin_file:
+                bin_file.write(HEADER.pack(rows, cols, 3))
+                bin_file.write(img.tobytes())
+
+            def read_with(reader):
+                with open(file_path, "rb") as bin_file:
+                    return reader(bin_file)
+
+            assert array_equal(read_with(_legacy_read_image), read_with(read_image)), "Codecs disagree"
+            legacy_time = _measure_func_time(lambda: read_with(_legacy_read_image), repetitions=1)
+            bulk_time = _measure_func_time(lambda: read_with(read_image))
+        results.append({
+            "size": (rows, cols),
+            "legacy_ms": legacy_time,
+            "bulk_ms": bulk_time,
+            "speedup": legacy_time / bulk_time
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark():
+        print(result)
@@ -0,0 +1,225 @@
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from io import BufferedReader
+from typing import Union
+from aku_format.layout import (AkuLayout, read_exactly, read_layout, read_chunk_index, DECOMPRESSORS,
+                               METADATA_TAG, PIXELS_TAG, MASK_TAG)
+
+from numpy import ndarray, memmap, empty, frombuffer, unpackbits, uint8
+
+
+# Mask section:
+#   MASK_INFO | packed rows, 8 pixels per byte in numpy.packbits layout, every row padded to a whole byte
+MASK_INFO = struct.Struct("<IIB")  # rows, cols, dims of the mask
+# Metadata record:
+#   METADATA_PREFIX | date | METADATA_DESCRIPTION_LENGTH | description
+METADATA_PREFIX = struct.Struct("<HBB")  # patient id, gender bit and 7 bits age, date length
+METADATA_DESCRIPTION_LENGTH = struct.Struct("<B")
+MAX_METADATA_SIZE = METADATA_PREFIX.size + 255 + METADATA_DESCRIPTION_LENGTH.size + 255
+GENDER_SHIFT = 7
+AGE_MASK = 0x7F
+
+
+def decode_metadata(buffer, offset: int = 0) -> tuple[tuple[int, int, int, str, str], int]:
+    """
+    Decode a single metadata record with the precompiled record layout.
+
+    Args:
+        buffer (bytes-like): Buffer holding the record.
+        offset (int, optional): Position of the record in the buffer. Defaults to 0.
+
+    Raises:
+        ValueError: If the buffer ends before the record does.
+
+    Returns:
+        tuple[tuple[int, int, int, str, str], int]: The id, gender bit, age, date and description
+            of the record, and the position right after it.
+    """
+    try:
+        id, gender_n_age, num_bytes_date = METADATA_PREFIX.unpack_from(buffer, offset)
+        offset += METADATA_PREFIX.size
+        date = bytes(buffer[offset:offset + num_bytes_date])
+        offset += num_bytes_date
+        num_bytes_description, = METADATA_DESCRIPTION_LENGTH.unpack_from(buffer, offset)
+        offset += METADATA_DESCRIPTION_LENGTH.size
+        description = bytes(buffer[offset:offset + num_bytes_description])
+        offset += num_bytes_description
+    except struct.error as error:
+        raise ValueError("Truncated .aku metadata record") from error
+    if len(date) != num_bytes_date or len(description) != num_bytes_description:
+        raise ValueError("Truncated .aku metadata record")
+    gender, age = gender_n_age >> GENDER_SHIFT, gender_n_age & AGE_MASK
+    return (id, gender, age, date.decode("utf-8"), description.decode("utf-8")), offset
+
+
+def read_rows(bin_file: BufferedReader,
+              layout: AkuLayout,
+              start: int = 0,
+              stop: int = None,
+              max_workers: int = None) -> ndarray:
+    """
+    Read a range of rows of the image, only the compressed chunks overlapping it are decoded.
+
+    Chunks are decompressed concurrently in threads, both zlib and lzma release the GIL
+    while decompressing so this scales across cores.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        layout (AkuLayout): The layout of the file.
+        start (int, optional): First row to be read. Defaults to 0.
+        stop (int, optional): Row where the reading stops, excluded. Defaults to the number of rows.
+        max_workers (int, optional): Number of decompressing threads, if not provided
+            ThreadPoolExecutor picks it from the available cores. Defaults to None.
+
+    Raises:
+        ValueError: If a chunk does not decompress to the expected size.
+
+    Returns:
+        ndarray: The (stop - start, cols, dims) rows.
+    """
+    start, stop, _ = slice(start, stop).indices(layout.rows)
+    stop = max(start, stop)
+    rows = empty((stop - start, layout.cols, layout.dims), dtype=layout.dtype)
+    if rows.size == 0:
+        return rows
+    row_bytes = layout.cols*layout.dims*layout.dtype.itemsize
+    if not layout.compressed:
+        offset, _ = layout.sections[PIXELS_TAG]
+        bin_file.seek(offset + start*row_bytes)
+        if bin_file.readinto(memoryview(rows).cast("B")) != rows.nbytes:
+            raise ValueError("Truncated .aku pixel block")
+        return rows
+
+    compressor_code, rows_per_chunk, chunks = read_chunk_index(bin_file, layout)
+    first_chunk, last_chunk = start // rows_per_chunk, -(-stop // rows_per_chunk)
+    compressed_chunks = []
+    for offset, length in chunks[first_chunk:last_chunk]:  # sequential reads, parallel decompression
+        bin_file.seek(offset)
+        compressed_chunks.append(read_exactly(bin_file, length))
+
+    rows_buffer = memoryview(rows).cast("B")
+    decompress = DECOMPRESSORS[compressor_code]
+
+    def decode_chunk(chunk_number: int) -> None:
+        chunk_start = (first_chunk + chunk_number)*rows_per_chunk
+        chunk_stop = min(chunk_start + rows_per_chunk, layout.rows)
+        chunk = decompress(compressed_chunks[chunk_number])
+        if len(chunk) != (chunk_stop - chunk_start)*row_bytes:
+            raise ValueError("Corrupted .aku compressed chunk")
+        copy_start, copy_stop = max(start, chunk_start), min(stop, chunk_stop)
+        rows_buffer[(copy_start - start)*row_bytes:(copy_stop - start)*row_bytes] = \
+            chunk[(copy_start - chunk_start)*row_bytes:(copy_stop - chunk_start)*row_bytes]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(decode_chunk, range(len(compressed_chunks))))
+    return rows
+
+
+def read_pixels(bin_file: BufferedReader, layout: AkuLayout) -> ndarray:
+    """
+    Read the whole pixel block straight into a preallocated array.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        layout (AkuLayout): The layout of the file.
+
+    Raises:
+        ValueError: If the file ends before the whole pixel block was read.
+
+    Returns:
+        ndarray: The (rows, cols, dims) image.
+    """
+    if layout.compressed:
+        return read_rows(bin_file, layout)
+    offset, _ = layout.sections[PIXELS_TAG]
+    img = empty(layout.shape, dtype=layout.dtype)
+    bin_file.seek(offset)
+    num_bytes = bin_file.readinto(memoryview(img).cast("B"))
+    if num_bytes != img.nbytes:
+        raise ValueError(f"Truncated .aku pixel block, expected {img.nbytes} bytes got {num_bytes}")
+    return img
+
+
+def read_image(bin_file: BufferedReader) -> ndarray:
+    """
+    Read the pixel block of a .aku file of any supported version.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+
+    Returns:
+        ndarray: The (rows, cols, dims) image.
+    """
+    return read_pixels(bin_file, read_layout(bin_file))
+
+
+def read_mask(bin_file: BufferedReader, layout: AkuLayout, packed: bool = False) -> Union[None, ndarray]:
+    """
+    Read the bit packed binary mask stored along the image, if any.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        layout (AkuLayout): The layout of the file.
+        packed (bool, optional): If True, the (rows, packed row bytes) packed mask is returned
+            as stored, otherwise it is unpacked into a 0/255 (rows, cols, dims) mask. Defaults to False.
+
+    Raises:
+        ValueError: If the mask section is truncated.
+
+    Returns:
+        Union[None, ndarray]: The mask, None if the file has none.
+    """
+    if MASK_TAG not in layout.sections:
+        return None
+    offset, length = layout.sections[MASK_TAG]
+    bin_file.seek(offset)
+    rows, cols, dims = MASK_INFO.unpack(read_exactly(bin_file, MASK_INFO.size))
+    row_bytes = -(-cols*dims // 8)
+    if length != MASK_INFO.size + rows*row_bytes:
+        raise ValueError("Corrupted .aku mask section")
+    packed_mask = frombuffer(read_exactly(bin_file, rows*row_bytes), dtype=uint8).reshape(rows, row_bytes)
+    if packed:
+        return packed_mask
+    mask = unpackbits(packed_mask, axis=-1, count=cols*dims).reshape(rows, cols, dims)
+    mask *= 255
+    return mask
+
+
+def seek_metadata(bin_file: BufferedReader) -> bool:
+    """
+    Seek straight to the metadata record of a .aku file, skipping the pixels.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+
+    Returns:
+        bool: True if the file has a metadata record, False otherwise.
+    """
+    layout = read_layout(bin_file)
+    offset, length = layout.sections.get(METADATA_TAG, (0, 0))
+    bin_file.seek(offset)
+    return length > 0
+
+
+def map_image(dot_bin_file_path: str) -> memmap:
+    """
+    Map the pixel block of a .aku file as a read-only array without reading it.
+
+    Pages are only loaded from disk when the returned array is sliced, so a tile,
+    a channel or a strided thumbnail costs only the bytes it touches.
+
+    Args:
+        dot_bin_file_path (str): Path of the .aku file.
+
+    Raises:
+        ValueError: If the pixels are compressed, use read_rows instead.
+
+    Returns:
+        memmap: Read-only (rows, cols, dims) view over the file.
+    """
+    with open(dot_bin_file_path, "rb") as bin_file:
+        layout = read_layout(bin_file)
+    if layout.compressed:
+        raise ValueError("Compressed .aku pixels can not be memory-mapped")
+    offset, _ = layout.sections[PIXELS_TAG]
+    return memmap(dot_bin_file_path, dtype=layout.dtype, mode="r", offset=offset, shape=layout.shape)
@@ -1,5 +1,5 @@
-from io import BufferedWriter
-import struct
+from io import BufferedReader
+from file.dot_aku_codec import decode_metadata, MAX_METADATA_SIZE
 
 class DotAkuMetadata:
     """Represents metadata extracted from a binary file.
@@ -8,7 +8,6 @@ class DotAkuMetadata:
 
     Attributes:
         _id (int): Patient ID.
-        _gender_n_age (str): Binary representation of gender and age.
         _gender (str): Gender of the patient ('M' for male, 'F' for female).
         _age (int): Age of the patient.
         _date (str): Date of the patient record.
@@ -19,24 +18,78 @@ class DotAkuMetadata:
         __str__: Return a formatted string representation of patient information.
         get_metadata: Return metadata as a list.
     """
-    def __init__(self, bin_file: BufferedWriter):
+    def __init__(self, bin_file: BufferedReader):
         """Initialize DotAkuMetadata instance.
 
+        The whole record is fetched with a single read and decoded in one call.
+
         Args:
-            bin_file (BufferedWriter): Binary file stream.
+            bin_file (BufferedReader): Binary file stream positioned at the metadata record.
         """
-        self._id = struct.unpack("H", bin_file.read(2))[0]
-        self._gender_n_age = '{0:08b}'.format(struct.unpack("c", bin_file.read(1))[0][0])
-        self._gender = "M" if int(self._gender_n_age[0],2) == 1 else "F"
-        self._age = int(self._gender_n_age[1:],2)
-        self._num_bytes_date = struct.unpack("c", bin_file.read(1))[0][0]
-        self._date = struct.unpack("<" + str(self._num_bytes_date) + "s",\
-                                   bin_file.read(self._num_bytes_date))[0].decode("utf-8")
-        self._num_bytes_description = struct.unpack("c", bin_file.read(1))[0][0]
-        self._description: list = struct.unpack("<" + str(self._num_bytes_description) + "s",\
-                                   bin_file.read(self._num_bytes_description))[0].decode("utf-8").split(".") 
+        self._set_fields(*decode_metadata(bin_file.read(MAX_METADATA_SIZE))[0])
+
+    def _set_fields(self, id: int, gender: int, age: int, date: str, description: str) -> None:
+        """Set the decoded fields of the record.
+
+        Args:
+            id (int): Patient ID.
+            gender (int): Gender bit, 1 for male.
+            age (int): Age of the patient.
+            date (str): Date of the patient record.
+            description (str): Dot separated description of the patient.
+        """
+        self._id = id
+        self._gender = "M" if gender == 1 else "F"
+        self._age = age
+        self._date = date
+        self._description: list = description.split(".")
         
     
+    @property
+    def id(self) -> int:
+        """Patient ID.
+
+        Returns:
+            int: Patient ID.
+        """
+        return self._id
+    
+    @property
+    def gender(self) -> str:
+        """Gender of the patient.
+
+        Returns:
+            str: 'M' for male, 'F' for female.
+        """
+        return self._gender
+    
+    @property
+    def age(self) -> int:
+        """Age of the patient.
+
+        Returns:
+            int: Age of the patient.
+        """
+        return self._age
+    
+    @property
+    def date(self) -> str:
+        """Date of the patient record.
+
+        Returns:
+            str: Date of the patient record.
+        """
+        return self._date
+    
+    @property
+    def description(self) -> list:
+        """Description of the patient.
+
+        Returns:
+            list: Sentences of the description.
+        """
+        return self._description
+    
     def __str__(self) -> str:
         """Return a formatted string representation of patient information.
 
@@ -1,24 +1,30 @@
 import os
-import struct
 from file.dot_aku_metadata import DotAkuMetadata
+from file.dot_aku_codec import read_pixels, map_image, seek_metadata, read_layout, read_rows
 from typing import Union
 from services.pdf_creator import PdfCreator
 
-from numpy import (
-    ndarray,
-    zeros
-)
+from numpy import ndarray
 
 
 class DotAkuReader:
     """Reads DotAku files and parses image data and metadata."""
-    def __init__(self, proyect_parent_folder: str):
+    def __init__(self,
+                 proyect_parent_folder: str,
+                 use_mmap: bool = False,
+                 dot_bin_file_path: str = None):
         """Initialize DotAkuReader instance.
 
         Args:
             proyect_parent_folder (str): Path to the parent folder of the project.
+            use_mmap (bool, optional): Whether to expose the pixel block as a read-only
+                memory-mapped view instead of reading it into memory. Defaults to False.
+            dot_bin_file_path (str, optional): Path of the DotAku binary file when it is already
+                known, otherwise it is searched inside the project. Defaults to None.
         """
         self._proyect_parent_folder = os.path.abspath(proyect_parent_folder)
+        self._use_mmap = use_mmap
+        self._dot_bin_file_path = None if dot_bin_file_path is None else os.path.abspath(dot_bin_file_path)
         self.FILE_EXTENSION = ".bin"
         self._img: Union[None, ndarray] = None
         self._metadata: Union[None, DotAkuMetadata] = None
@@ -32,10 +38,13 @@ class DotAkuReader:
         Returns:
             str: Path of the DotAku binary file.
         """
+        if self._dot_bin_file_path is not None:
+            return self._dot_bin_file_path
         for root, _, files in os.walk(self._proyect_parent_folder):
             for file in files:
                 if file.endswith(self.FILE_EXTENSION):
-                    return os.path.abspath(os.path.join(root, file))
+                    self._dot_bin_file_path = os.path.abspath(os.path.join(root, file))  # walk the project only once
+                    return self._dot_bin_file_path
         raise ValueError("")
     
     def _read_image(self, dot_bin_file_path: str) -> ndarray:
@@ -45,45 +54,85 @@ class DotAkuReader:
             dot_bin_file_path (str): Path of the DotAku binary file.
 
         Returns:
-            ndarray: Image data extracted from the binary file.
+            ndarray: Image data extracted from the binary file, a read-only memmap if use_mmap is set and the pixels are not compressed.
         """
         with open(dot_bin_file_path, "rb") as bin_file:
-            rows, cols, dims = struct.unpack("IIc", bin_file.read(9))
-            DTYPE_BYTES, dims = 1, dims[0]
-            img_data: ndarray = zeros((rows, cols, dims))
-            
-            for i in range(rows):
-                for j in range(cols):
-                    for k in range(dims):
-                        bin_number = bin_file.read(DTYPE_BYTES)
-                        img_data[i,j,k] = struct.unpack("c", bin_number)[0][0]
-        
-        bin_file.close()
-        return img_data.astype('uint8')
+            layout = read_layout(bin_file)
+            if self._use_mmap and not layout.compressed:  # compressed chunks have to be decoded anyway
+                return map_image(dot_bin_file_path)
+            img_data: ndarray = read_pixels(bin_file, layout)
+        return img_data
     
-    def _read_metadata(self, dot_bin_file_path: str) -> DotAkuMetadata:
+    def _read_metadata(self, dot_bin_file_path: str) -> Union[None, DotAkuMetadata]:
         """Read and return metadata from the DotAku binary file.
 
         Args:
             dot_bin_file_path (str): Path of the DotAku binary file.
 
         Returns:
-            DotAkuMetadata: Metadata extracted from the binary file.
+            Union[None, DotAkuMetadata]: Metadata extracted from the binary file, None if the file has no metadata.
         """
         with open(dot_bin_file_path, "rb") as bin_file:
-            rows, cols, dims = struct.unpack("IIc", bin_file.read(9))
-            dims = dims[0]
-            ####
-            
-            bin_file.seek(9 + (rows*cols*dims))  # search the metadata after looping all headers and image data
-            metadata = DotAkuMetadata(bin_file)
+            # jump over the pixel block, its pages are never read
+            metadata = DotAkuMetadata(bin_file) if seek_metadata(bin_file) else None
             
             bin_file.close()     
         return metadata
          
-    def parse(self) -> None:
-        """Parse DotAku binary file and create a PDF document with image and metadata."""
+    def read_region(self,
+                    rows: slice = slice(None),
+                    cols: slice = slice(None),
+                    channels: slice = slice(None)) -> ndarray:
+        """Read a region of interest of the image without reading the whole pixel block.
+
+        Slices may carry a step, e.g. slice(None, None, 4) for a downsampled stride.
+
+        Args:
+            rows (slice, optional): Rows to be read. Defaults to every row.
+            cols (slice, optional): Columns to be read. Defaults to every column.
+            channels (slice, optional): Channels to be read. Defaults to every channel.
+
+        Returns:
+            ndarray: In-memory copy of the requested region.
+        """
+        bin_file_path: str = self._get_dot_bin_file_path()
+        with open(bin_file_path, "rb") as bin_file:
+            layout = read_layout(bin_file)
+            if layout.compressed:  # only the chunks holding the requested rows are decoded
+                start, stop, step = rows.indices(layout.rows)
+                first, last = (start, stop) if step > 0 else (stop + 1, start + 1)
+                img_rows: ndarray = read_rows(bin_file, layout, first, last)
+                return img_rows[slice(start - first, stop - first if stop - first >= 0 else None, step), cols, channels]
+        img_view = map_image(bin_file_path)
+        return img_view[rows, cols, channels].copy()
+    
+    def read_thumbnail(self, max_side: int) -> ndarray:
+        """Read a strided thumbnail whose longest side is at most max_side pixels.
+
+        Args:
+            max_side (int): Maximum length in pixels of the longest side of the thumbnail.
+
+        Returns:
+            ndarray: In-memory thumbnail of the image.
+
+        Raises:
+            ValueError: If max_side is not a positive number of pixels.
+        """
+        if max_side <= 0:
+            raise ValueError(f"The longest side of a thumbnail must be a positive number of pixels, got {max_side}")
+        with open(self._get_dot_bin_file_path(), "rb") as bin_file:
+            layout = read_layout(bin_file)
+        step = max(1, -(-max(layout.rows, layout.cols) // max_side))  # ceil division
+        return self.read_region(slice(None, None, step), slice(None, None, step))
+         
+    def parse(self, max_side: int = None) -> None:
+        """Parse DotAku binary file and create a PDF document with image and metadata.
+
+        Args:
+            max_side (int, optional): If provided, only a strided thumbnail whose longest side
+                is at most max_side pixels is read for the PDF. Defaults to None.
+        """
         bin_file_path: str = self._get_dot_bin_file_path()
-        img: ndarray = self._read_image(bin_file_path)
-        metadata: DotAkuMetadata = self._read_metadata(bin_file_path)
+        img: ndarray = self._read_image(bin_file_path) if max_side is None else self.read_thumbnail(max_side)
+        metadata: Union[None, DotAkuMetadata] = self._read_metadata(bin_file_path)
         PdfCreator(self._proyect_parent_folder).create(img, metadata)
\ No newline at end of file
@@ -1,12 +1,45 @@
 from services.flags_parser import FlagsParser
+from services.batch_reader import BatchReader
+from services.metadata_index import MetadataIndex
 from file.dot_aku_reader import DotAkuReader
 
 
+def main_batch(flags: dict[str, str]):
+    summary: dict = BatchReader(root_folder=flags["proyects_root_folder"],
+                                num_processes=flags["num_processes"],
+                                max_in_flight=flags["max_in_flight"],
+                                use_mmap=flags["use_mmap"],
+                                max_side=flags["max_side"],
+                                force=flags["force"]).parse()
+    for error in summary["errors"]:
+        print(error)
+    print(f"Parsed {summary['parsed']}/{summary['proyects']} projects, {summary['skipped']} up to date, "
+          f"in {summary['elapsed_seconds']:.2f} s ({summary['proyects_per_second']:.2f} projects/s)")
+
+
+def main_index(flags: dict[str, str]):
+    with MetadataIndex(flags["index_path"]) as index:
+        if flags["proyects_root_folder"] is not None:
+            print(index.refresh(flags["proyects_root_folder"]))
+        for study in index.query(patient_id=flags["patient_id"],
+                                 gender=flags["gender"],
+                                 min_age=flags["min_age"],
+                                 max_age=flags["max_age"],
+                                 date=flags["date"],
+                                 keyword=flags["keyword"]):
+            print(study)
+
+
 def main():
     fg = FlagsParser().build()
     flags: dict[str, str] = fg.get_flags()
+    if flags["index_path"] is not None:
+        return main_index(flags)
+    if flags["proyects_root_folder"] is not None:
+        return main_batch(flags)
     
-    DotAkuReader(proyect_parent_folder=flags["proyect_parent_folder"]).parse()
+    DotAkuReader(proyect_parent_folder=flags["proyect_parent_folder"],
+                 use_mmap=flags["use_mmap"]).parse(max_side=flags["max_side"])
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,234 @@
+import os
+import timeit
+import traceback
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from queue import Queue
+from threading import Thread
+from typing import Union
+from file.dot_aku_reader import DotAkuReader
+from services.pdf_creator import PdfCreator
+
+
+_END_OF_DISCOVERY = None
+
+
+def _parse_proyect(proyect_parent_folder: str,
+                   dot_bin_file_path: str,
+                   use_mmap: bool,
+                   max_side: int) -> dict:
+    """Decode a project and render its PDF report, runs inside a pool worker.
+
+    The image never leaves the worker, only the outcome is sent back to the parent.
+
+    Args:
+        proyect_parent_folder (str): Path to the parent folder of the project.
+        dot_bin_file_path (str): Path of the DotAku binary file of the project.
+        use_mmap (bool): Whether to memory-map the pixel block.
+        max_side (int): If provided, the longest side of the image thumbnail in the report.
+
+    Returns:
+        dict: The outcome of the parsing.
+    """
+    start_time = timeit.default_timer()
+    try:
+        DotAkuReader(proyect_parent_folder,
+                     use_mmap=use_mmap,
+                     dot_bin_file_path=dot_bin_file_path).parse(max_side=max_side)
+        return {"proyect": proyect_parent_folder, "ok": True, "seconds": timeit.default_timer() - start_time}
+    except Exception:
+        return {
+            "proyect": proyect_parent_folder,
+            "ok": False,
+            "error": traceback.format_exc(),
+            "seconds": timeit.default_timer() - start_time
+        }
+
+
+class BatchReader:
+    """Renders the PDF reports of every project under a root folder concurrently.
+
+    A discovery thread walks the root once and feeds a bounded queue, the main thread
+    drains it into a process pool where every project is decoded and rendered.
+    Decoding and rendering run in the same pool task instead of as two stages with a
+    queue between them, so the decoded image never crosses a process boundary, only
+    the outcome of every project is sent back.
+
+    Attributes:
+        _root_folder (str): Folder holding the projects.
+        _num_processes (int): Number of worker processes.
+        _max_in_flight (int): Maximum number of projects queued or being parsed at once.
+        _use_mmap (bool): Whether to memory-map the pixel blocks.
+        _max_side (int): If provided, the longest side of the image thumbnails in the reports.
+        _force (bool): Whether to rebuild reports that are already up to date.
+        _results (list[dict]): The outcome of every parsed project.
+        _skipped (list[str]): The projects whose report was already up to date.
+    """
+    FILE_EXTENSION = ".bin"
+    IGNORED_FOLDERS = ("out", "data")  # folders the writer and PdfCreator create inside a project, never holding .aku files
+
+    def __init__(self,
+                 root_folder: str,
+                 num_processes: int = None,
+                 max_in_flight: int = None,
+                 use_mmap: bool = False,
+                 max_side: int = None,
+                 force: bool = False):
+        """Initialize BatchReader instance.
+
+        Args:
+            root_folder (str): Folder holding the projects.
+            num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+            max_in_flight (int, optional): Maximum number of projects queued or being parsed at once.
+                Defaults to twice the number of processes.
+            use_mmap (bool, optional): Whether to memory-map the pixel blocks. Defaults to False.
+            max_side (int, optional): If provided, the longest side of the image thumbnails in the reports.
+                Defaults to None.
+            force (bool, optional): Whether to rebuild reports that are already up to date. Defaults to False.
+        """
+        self._root_folder = os.path.abspath(root_folder)
+        self._num_processes = os.cpu_count() if num_processes is None else num_processes
+        self._max_in_flight = 2*self._num_processes if max_in_flight is None else max_in_flight
+        self._use_mmap = use_mmap
+        self._max_side = max_side
+        self._force = force
+        self._results: list[dict] = []
+        self._skipped: list[str] = []
+        assert self._max_in_flight > 0, "max_in_flight must be positive"
+
+    @property
+    def results(self) -> list[dict]:
+        """Outcome of every parsed project, in completion order.
+
+        Returns:
+            list[dict]: The outcome of every parsed project.
+        """
+        return self._results
+
+    def _scan(self, folder: str) -> tuple[list[str], Union[None, str]]:
+        """List a folder once.
+
+        Args:
+            folder (str): Path of the folder.
+
+        Returns:
+            tuple[list[str], Union[None, str]]: The paths of its subfolders and of its first
+                DotAku binary file, None if it has none. Unreadable folders are empty.
+        """
+        subfolders, dot_bin_file_path = [], None
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subfolders.append(entry.path)
+                    elif dot_bin_file_path is None and entry.name.endswith(self.FILE_EXTENSION):
+                        dot_bin_file_path = entry.path  # one .aku file per project
+        except OSError:
+            pass
+        return subfolders, dot_bin_file_path
+
+    def _discover_under(self, folder: str, subfolders: list[str]):
+        """Yield every project under a folder whose subfolders are already listed.
+
+        The folder is a project when one of its subfolders holds a DotAku binary file,
+        only then are its IGNORED_FOLDERS skipped, so a project or a folder of projects
+        may itself be named like one of them.
+
+        Args:
+            folder (str): Path of the folder.
+            subfolders (list[str]): Paths of its subfolders.
+
+        Yields:
+            tuple[str, str]: The project parent folder and the path of its DotAku binary file.
+        """
+        scanned = [(subfolder, *self._scan(subfolder)) for subfolder in subfolders]
+        is_proyect = any(dot_bin_file_path is not None for _, _, dot_bin_file_path in scanned)
+        for subfolder, inner_subfolders, dot_bin_file_path in scanned:
+            if is_proyect and os.path.basename(subfolder) in self.IGNORED_FOLDERS:
+                continue
+            if dot_bin_file_path is not None:
+                yield folder, dot_bin_file_path
+            yield from self._discover_under(subfolder, inner_subfolders)
+
+    def discover(self):
+        """Walk the root folder once and yield every project with its DotAku binary file.
+
+        A project is the parent of the folder holding its binary file, as laid out by the writer.
+        Every folder is listed once.
+
+        Yields:
+            tuple[str, str]: The project parent folder and the path of its DotAku binary file.
+        """
+        yield from self._discover_under(self._root_folder, self._scan(self._root_folder)[0])
+
+    def _is_up_to_date(self, proyect_parent_folder: str, dot_bin_file_path: str) -> bool:
+        """Check whether the PDF report of a project is newer than its DotAku binary file.
+
+        Args:
+            proyect_parent_folder (str): Path to the parent folder of the project.
+            dot_bin_file_path (str): Path of the DotAku binary file of the project.
+
+        Returns:
+            bool: True if the report does not need to be rebuilt, False otherwise.
+        """
+        pdf_path: str = PdfCreator(proyect_parent_folder).pdf_path
+        try:
+            return os.path.getmtime(pdf_path) >= os.path.getmtime(dot_bin_file_path)
+        except FileNotFoundError:
+            return False
+
+    def _discover_into(self, proyects_queue: Queue) -> None:
+        """Discovery stage, put every project needing a report into the queue.
+
+        Args:
+            proyects_queue (Queue): Bounded queue towards the parsing stage.
+        """
+        try:
+            for proyect_parent_folder, dot_bin_file_path in self.discover():
+                if not self._force and self._is_up_to_date(proyect_parent_folder, dot_bin_file_path):
+                    self._skipped.append(proyect_parent_folder)
+                    continue
+                proyects_queue.put((proyect_parent_folder, dot_bin_file_path))  # blocks while the queue is full
+        finally:
+            proyects_queue.put(_END_OF_DISCOVERY)
+
+    def parse(self) -> dict:
+        """Render the PDF report of every project that needs one.
+
+        Returns:
+            dict: The throughput summary of the run.
+        """
+        start_time = timeit.default_timer()
+        proyects_queue = Queue(maxsize=self._max_in_flight)
+        discovery = Thread(target=self._discover_into, args=(proyects_queue,), daemon=True)
+        discovery.start()
+
+        in_flight: set[Future] = set()
+        with ProcessPoolExecutor(max_workers=self._num_processes) as executor:
+            while (proyect := proyects_queue.get()) is not _END_OF_DISCOVERY:
+                if len(in_flight) >= self._max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._results.extend(future.result() for future in done)
+                in_flight.add(executor.submit(_parse_proyect, *proyect, self._use_mmap, self._max_side))
+            self._results.extend(future.result() for future in wait(in_flight).done)
+        discovery.join()
+        return self._summarize(timeit.default_timer() - start_time)
+
+    def _summarize(self, elapsed_time: float) -> dict:
+        """Summarize the throughput of the run.
+
+        Args:
+            elapsed_time (float): The wall time of the run in seconds.
+
+        Returns:
+            dict: The throughput summary of the run.
+        """
+        succeeded = sum(1 for result in self._results if result["ok"])
+        return {
+            "proyects": len(self._results) + len(self._skipped),
+            "parsed": succeeded,
+            "failed": len(self._results) - succeeded,
+            "skipped": len(self._skipped),
+            "errors": [result["error"] for result in self._results if not result["ok"]],
+            "elapsed_seconds": elapsed_time,
+            "proyects_per_second": len(self._results) / elapsed_time if elapsed_time else 0.0
+        }
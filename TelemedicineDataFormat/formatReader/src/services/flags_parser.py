@@ -44,6 +44,19 @@ class FlagsParser:
             FlagsParser: The FlagsParser instance.
         """
         self.parser.add_argument("-proyect", "--proyect_parent_folder", type=str, help="Path to the folder where the project was saved.")
+        self.parser.add_argument("-mmap", "--use_mmap", action="store_true", help="Memory-map the pixel block instead of reading it into memory.")
+        self.parser.add_argument("-max_side", "--max_side", type=int, help="Only read a thumbnail whose longest side is at most this many pixels.")
+        self.parser.add_argument("-root", "--proyects_root_folder", type=str, help="Path to a folder of projects whose reports are built in batch.")
+        self.parser.add_argument("-workers", "--num_processes", type=int, help="Number of worker processes of the batch mode.")
+        self.parser.add_argument("-max_in_flight", "--max_in_flight", type=int, help="Maximum number of projects being parsed at once in batch mode.")
+        self.parser.add_argument("-force", "--force", action="store_true", help="Rebuild reports that are newer than their .aku file in batch mode.")
+        self.parser.add_argument("-index", "--index_path", type=str, help="Path to the sqlite metadata index. Refreshed from -root if given, then queried.")
+        self.parser.add_argument("-patient_id", "--patient_id", type=int, help="Query the index by patient ID.")
+        self.parser.add_argument("-gender", "--gender", type=str, choices=["M", "F"], help="Query the index by gender.")
+        self.parser.add_argument("-min_age", "--min_age", type=int, help="Query the index by minimum age.")
+        self.parser.add_argument("-max_age", "--max_age", type=int, help="Query the index by maximum age.")
+        self.parser.add_argument("-date", "--date", type=str, help="Query the index by date or date prefix.")
+        self.parser.add_argument("-keyword", "--keyword", type=str, help="Query the index by a description keyword.")
         self._args = (self.parser).parse_args()
         return self
     
@@ -0,0 +1,196 @@
+import os
+import re
+import sqlite3
+import struct
+from typing import Union
+from file.dot_aku_metadata import DotAkuMetadata
+from file.dot_aku_codec import seek_metadata
+from services.batch_reader import BatchReader
+
+
+class MetadataIndex:
+    """Persistent sqlite index of the patient metadata of every .aku file under a root folder.
+
+    Refreshing only re-reads the metadata record of files whose size or modification
+    time changed, lookups never open the .aku files.
+
+    Attributes:
+        _index_path (str): Path of the sqlite database.
+        _connection (sqlite3.Connection): Connection to the database.
+    """
+    KEYWORD_PATTERN = re.compile(r"[^\W_]{3,}")  # words of at least 3 letters or digits
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS studies (
+        path TEXT PRIMARY KEY,
+        proyect TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        patient_id INTEGER,
+        gender TEXT,
+        age INTEGER,
+        date TEXT,
+        description TEXT,
+        failed INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE TABLE IF NOT EXISTS keywords (
+        path TEXT NOT NULL REFERENCES studies(path) ON DELETE CASCADE,
+        keyword TEXT NOT NULL,
+        PRIMARY KEY (keyword, path)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS studies_patient_id ON studies(patient_id);
+    CREATE INDEX IF NOT EXISTS studies_date ON studies(date);
+    CREATE INDEX IF NOT EXISTS keywords_path ON keywords(path);
+    """
+
+    def __init__(self, index_path: str):
+        """Initialize MetadataIndex instance, the database is created if it does not exist.
+
+        Args:
+            index_path (str): Path of the sqlite database.
+        """
+        self._index_path = os.path.abspath(index_path)
+        self._connection = sqlite3.connect(self._index_path)
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(self.SCHEMA)
+
+    def __enter__(self) -> 'MetadataIndex':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection to the database."""
+        self._connection.close()
+
+    def _read_metadata(self, dot_bin_file_path: str) -> Union[None, DotAkuMetadata]:
+        """Read only the metadata record of a .aku file.
+
+        Args:
+            dot_bin_file_path (str): Path of the DotAku binary file.
+
+        Returns:
+            Union[None, DotAkuMetadata]: The metadata, None if the file has none.
+        """
+        with open(dot_bin_file_path, "rb") as bin_file:
+            return DotAkuMetadata(bin_file) if seek_metadata(bin_file) else None
+
+    def _get_keywords(self, metadata: DotAkuMetadata) -> set[str]:
+        """Get the lower case keywords of the description of a record.
+
+        Args:
+            metadata (DotAkuMetadata): The metadata.
+
+        Returns:
+            set[str]: The keywords.
+        """
+        return set(self.KEYWORD_PATTERN.findall(" ".join(metadata.description).lower()))
+
+    def refresh(self, root_folder: str) -> dict:
+        """Bring the index up to date with the .aku files under a root folder.
+
+        Files whose metadata can not be read are kept as failed entries with their size and
+        modification time, so they are not read again until they change and queries skip them.
+        Files that disappear while refreshing are removed.
+
+        Args:
+            root_folder (str): Folder holding the projects.
+
+        Returns:
+            dict: Number of indexed, unchanged, removed and failed files.
+        """
+        root_folder = os.path.abspath(root_folder)
+        root_prefix = os.path.join(root_folder, "")
+        known: dict[str, tuple[int, int, int]] = {
+            row["path"]: (row["size"], row["mtime_ns"], row["failed"])
+            for row in self._connection.execute(
+                "SELECT path, size, mtime_ns, failed FROM studies WHERE substr(path, 1, length(?)) = ?", (root_prefix, root_prefix))
+        }
+        summary = {"indexed": 0, "unchanged": 0, "removed": 0, "failed": 0}
+        with self._connection:  # a single transaction for the whole refresh
+            for proyect_parent_folder, dot_bin_file_path in BatchReader(root_folder).discover():
+                try:
+                    stat = os.stat(dot_bin_file_path)
+                except OSError:  # deleted since it was discovered, its entry is removed below
+                    continue
+                known_entry = known.pop(dot_bin_file_path, None)
+                if known_entry is not None and known_entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                    summary["failed" if known_entry[2] else "unchanged"] += 1
+                    continue
+                try:
+                    metadata = self._read_metadata(dot_bin_file_path)
+                except (OSError, ValueError, UnicodeDecodeError, struct.error):
+                    self._upsert(proyect_parent_folder, dot_bin_file_path, stat, None, failed=True)
+                    summary["failed"] += 1
+                    continue
+                self._upsert(proyect_parent_folder, dot_bin_file_path, stat, metadata)
+                summary["indexed"] += 1
+            self._connection.executemany("DELETE FROM studies WHERE path = ?", [(path,) for path in known])
+            summary["removed"] = len(known)
+        return summary
+
+    def _upsert(self,
+                proyect_parent_folder: str,
+                dot_bin_file_path: str,
+                stat: os.stat_result,
+                metadata: Union[None, DotAkuMetadata],
+                failed: bool = False) -> None:
+        """Insert or replace the entry of a .aku file.
+
+        Args:
+            proyect_parent_folder (str): Path to the parent folder of the project.
+            dot_bin_file_path (str): Path of the DotAku binary file.
+            stat (os.stat_result): Status of the DotAku binary file.
+            metadata (Union[None, DotAkuMetadata]): Metadata of the file.
+            failed (bool, optional): Whether the metadata of the file could not be read. Defaults to False.
+        """
+        fields = (None,)*5 if metadata is None else (
+            metadata.id, metadata.gender, metadata.age, metadata.date, ".".join(metadata.description)
+        )
+        self._connection.execute("DELETE FROM studies WHERE path = ?", (dot_bin_file_path,))
+        self._connection.execute(
+            "INSERT INTO studies VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (dot_bin_file_path, proyect_parent_folder, stat.st_size, stat.st_mtime_ns, *fields, int(failed))
+        )
+        if metadata is not None:
+            self._connection.executemany(
+                "INSERT INTO keywords VALUES (?, ?)",
+                [(dot_bin_file_path, keyword) for keyword in self._get_keywords(metadata)]
+            )
+
+    def query(self,
+              patient_id: int = None,
+              gender: str = None,
+              min_age: int = None,
+              max_age: int = None,
+              date: str = None,
+              keyword: str = None) -> list[dict]:
+        """Find the studies matching every given filter.
+
+        Args:
+            patient_id (int, optional): Patient ID. Defaults to None.
+            gender (str, optional): 'M' or 'F'. Defaults to None.
+            min_age (int, optional): Minimum age, included. Defaults to None.
+            max_age (int, optional): Maximum age, included. Defaults to None.
+            date (str, optional): Date of the record, or its prefix, e.g. '2024-04'. Defaults to None.
+            keyword (str, optional): Word the description must contain. Defaults to None.
+
+        Returns:
+            list[dict]: The matching studies ordered by date, files whose metadata could not be read are skipped.
+        """
+        conditions, params = ["failed = 0"], []
+        for condition, value in (
+            ("patient_id = ?", patient_id),
+            ("gender = ?", gender),
+            ("age >= ?", min_age),
+            ("age <= ?", max_age),
+            ("substr(date, 1, length(?)) = ?", date),  # a literal prefix, % and _ are not wildcards
+            ("path IN (SELECT path FROM keywords WHERE keyword = ?)", None if keyword is None else keyword.lower()),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.extend([value]*condition.count("?"))
+        where = f"WHERE {' AND '.join(conditions)}"
+        rows = self._connection.execute(f"SELECT * FROM studies {where} ORDER BY date, path", params)
+        return [dict(row) for row in rows]
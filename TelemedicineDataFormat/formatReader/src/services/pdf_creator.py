@@ -21,13 +21,22 @@ class PdfCreator:
         self._out_img_path = os.path.abspath(os.path.join(self._out_folder_path, f"{self._proyect_name}{self.IMG_EXTENSION}"))
         self._pdf_path = os.path.abspath(os.path.join(self._out_folder_path, f"{self._proyect_name}.pdf"))
       
+    @property
+    def pdf_path(self) -> str:
+        """Path of the PDF document.
+
+        Returns:
+            str: Path of the PDF document.
+        """
+        return self._pdf_path
+    
     def _create_out_dir(self) -> 'PdfCreator':
         """Create the output directory.
 
         Returns:
             PdfCreator: Instance of PdfCreator.
         """
-        os.mkdir(self._out_folder_path)
+        os.makedirs(self._out_folder_path, exist_ok=True)  # it already exists when a stale report is rebuilt
         return self   
         
     def _save_img(self, img: ndarray) -> 'PdfCreator':
@@ -0,0 +1,77 @@
+import os
+import struct
+import tempfile
+import timeit
+from file.dot_aku_codec import write_image
+
+from numpy import ndarray, random, uint8
+
+
+def _legacy_write_image(aku_file, img: ndarray) -> None:
+    """
+    Per-byte writer the .aku format used before the bulk codec, kept as the benchmark reference.
+
+    Args:
+        aku_file (BufferedWriter): The .aku file object.
+        img (ndarray): The (rows, cols, dims) image to be written.
+    """
+    rows, cols, dims = img.shape
+    aku_file.write(struct.pack("IIc", rows, cols, bytes([dims])))
+    for i in range(rows):
+        for j in range(cols):
+            for k in range(dims):
+                aku_file.write(struct.pack("c", bytes([img[i,j,k]])))
+
+
+def _measure_func_time(func, repetitions: int = 3) -> float:
+    """
+    Measures the best execution time of a given callable.
+
+    Args:
+        func (Callable): The callable for which the execution time needs to be measured.
+        repetitions (int, optional): Number of times the callable is run. Defaults to 3.
+
+    Returns:
+        float: The best elapsed time in milliseconds.
+    """
+    return min(timeit.repeat(func, number=1, repeat=repetitions)) * 1000  # Miliseconds
+
+
+def benchmark(img_sizes: list[tuple] = [(64, 64), (256, 256), (512, 512)]) -> list[dict]:
+    """
+    Benchmarks the legacy per-byte writer against the bulk codec writer.
+
+    Args:
+        img_sizes (list[tuple], optional): Image sizes to be tested.
+            Defaults to [(64, 64), (256, 256), (512, 512)].
+
+    Returns:
+        list[dict]: Timings in milliseconds and speedup for every image size.
+    """
+    results = []
+    for rows, cols in img_sizes:
+        img = random.randint(0, 256, (rows, cols, 3), dtype=uint8)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            legacy_path = os.path.join(tmp_dir, "legacy.bin")
+            bulk_path = os.path.join(tmp_dir, "bulk.bin")
+
+            def write_with(writer, file_path):
+                with open(file_path, "wb") as aku_file:
+                    writer(aku_file, img)
+
+            legacy_time = _measure_func_time(lambda: write_with(_legacy_write_image, legacy_path), repetitions=1)
+            bulk_time = _measure_func_time(lambda: write_with(write_image, bulk_path))
+            with open(legacy_path, "rb") as legacy_file, open(bulk_path, "rb") as bulk_file:
+                assert legacy_file.read() == bulk_file.read(), "Codecs disagree"
+        results.append({
+            "size": (rows, cols),
+            "legacy_ms": legacy_time,
+            "bulk_ms": bulk_time,
+            "speedup": legacy_time / bulk_time
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for result in benchmark():
+        print(result)
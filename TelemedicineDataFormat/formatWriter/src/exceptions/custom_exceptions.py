@@ -31,3 +31,6 @@ class CapturedException(Exception):
 
 
 class FolderNotFoundException(CapturedException): ...
+
+
+class ProyectBuildException(CapturedException): ...
@@ -0,0 +1,295 @@
+import lzma
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from io import BufferedWriter
+from aku_format.dtypes import Dtypes
+from aku_format.layout import (HEADER, MAGIC, PREAMBLE, IMAGE_INFO, SECTION_COUNT, SECTION_ENTRY,
+                               METADATA_TAG, PIXELS_TAG, COMPRESSED_PIXELS_TAG, MASK_TAG, CHUNKS_HEADER, CHUNK_ENTRY)
+
+from numpy import ndarray, ascontiguousarray, packbits, dtype as np_dtype, uint8
+
+
+# Versioned container, see aku_format.layout:
+# every section starts at an absolute offset aligned to SECTION_ALIGNMENT,
+# the metadata section is written before the pixels.
+VERSION = 2
+SECTION_ALIGNMENT = 64
+# Compressed pixel section, see aku_format.layout:
+# every chunk holds rows_per_chunk rows (the last one may hold less) compressed independently.
+# Mask section:
+#   MASK_INFO | packed rows
+# a binary mask with 8 pixels per byte in numpy.packbits layout, every row padded to a whole byte.
+MASK_INFO = struct.Struct("<IIB")  # rows, cols, dims of the mask
+# Metadata record:
+#   METADATA_PREFIX | date | METADATA_DESCRIPTION_LENGTH | description
+METADATA_PREFIX = struct.Struct("<HBB")  # patient id, gender bit and 7 bits age, date length
+METADATA_DESCRIPTION_LENGTH = struct.Struct("<B")
+MALE_BIT = 0x80
+AGE_MASK = 0x7F
+COMPRESSOR_CODES = {
+    "zlib": 1,
+    "lzma": 2,
+}
+
+
+def encode_header(rows: int, cols: int, dims: int) -> bytes:
+    """
+    Encode the image header of a .aku file.
+
+    Args:
+        rows (int): Number of rows of the image.
+        cols (int): Number of columns of the image.
+        dims (int): Number of channels of the image.
+
+    Returns:
+        bytes: The packed header.
+    """
+    return HEADER.pack(rows, cols, dims)
+
+
+def pack_gender_n_age(gender: str, age: int) -> int:
+    """
+    Pack gender and age in a single byte, the most significant bit is set for males.
+
+    Args:
+        gender (str): Gender of the patient, 'M' for male.
+        age (int): Age of the patient, 0-127.
+
+    Raises:
+        ValueError: If the age does not fit in 7 bits.
+
+    Returns:
+        int: The packed byte.
+    """
+    if not 0 <= age <= AGE_MASK:
+        raise ValueError(f"Age must be between 0 and {AGE_MASK}, got {age}")
+    return (MALE_BIT if gender == "M" else 0) | age
+
+
+def encode_metadata(id: int, gender_n_age: int, date: bytes, description: bytes) -> bytes:
+    """
+    Encode a metadata record with the precompiled record layout.
+
+    Args:
+        id (int): Patient ID.
+        gender_n_age (int): Gender and age packed by pack_gender_n_age.
+        date (bytes): UTF-8 date, at most 255 bytes.
+        description (bytes): UTF-8 description, at most 255 bytes.
+
+    Returns:
+        bytes: The packed metadata record.
+    """
+    return b"".join((
+        METADATA_PREFIX.pack(id, gender_n_age, len(date)),
+        date,
+        METADATA_DESCRIPTION_LENGTH.pack(len(description)),
+        description
+    ))
+
+
+def _get_image_shape(img: ndarray) -> tuple[int, int, int]:
+    """
+    Get the rows, cols and dims of an image, grayscale images have a single dim.
+
+    Args:
+        img (ndarray): Either a (rows, cols) or (rows, cols, dims) image.
+
+    Returns:
+        tuple[int, int, int]: The rows, cols and dims of the image.
+    """
+    rows, cols = img.shape[:2]
+    dims = img.shape[2] if img.ndim == 3 else 1
+    return rows, cols, dims
+
+
+def _pixel_buffer(img: ndarray, dtype=uint8) -> memoryview:
+    """
+    Get a flat byte view over the pixels of an image in row-major little-endian order.
+
+    Args:
+        img (ndarray): The image.
+        dtype (optional): The dtype the pixels are stored as. Defaults to uint8.
+
+    Returns:
+        memoryview: Byte view of the pixels, only copied if the image is not already laid out as required.
+    """
+    pixels = ascontiguousarray(img, dtype=np_dtype(img.dtype if dtype is None else dtype).newbyteorder("<"))
+    return memoryview(pixels).cast("B")
+
+
+def write_pixels(aku_file: BufferedWriter, img: ndarray) -> int:
+    """
+    Write the whole pixel block of an image in a single call.
+
+    The image is written in row-major (rows, cols, dims) order, which is the same
+    order the legacy per-byte loop used, so the output is byte compatible.
+
+    Args:
+        aku_file (BufferedWriter): The .aku file object.
+        img (ndarray): The image to be written.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    return aku_file.write(_pixel_buffer(img))
+
+
+def write_image(aku_file: BufferedWriter, img: ndarray) -> int:
+    """
+    Write the header and the pixel block of an image in the legacy (v1) layout.
+
+    Args:
+        aku_file (BufferedWriter): The .aku file object.
+        img (ndarray): The image to be written, either (rows, cols) or (rows, cols, dims).
+
+    Returns:
+        int: The number of bytes written.
+    """
+    return aku_file.write(encode_header(*_get_image_shape(img))) + write_pixels(aku_file, img)
+
+
+def write_sections(aku_file: BufferedWriter,
+                   img: ndarray,
+                   sections: list[tuple[bytes, list]]) -> int:
+    """
+    Write a versioned (v2) .aku container.
+
+    Args:
+        aku_file (BufferedWriter): The .aku file object.
+        img (ndarray): The image described by the container header.
+        sections (list[tuple[bytes, list]]): Pairs of 4 bytes tag and list of byte buffers
+            making up the section payload, written in the given order.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    rows, cols, dims = _get_image_shape(img)
+    dtype_code = Dtypes.get_dtype_code(img.dtype.name)
+    offset = PREAMBLE.size + IMAGE_INFO.size + SECTION_COUNT.size + len(sections)*SECTION_ENTRY.size
+    entries, paddings = [], []
+    for tag, buffers in sections:
+        padding = -offset % SECTION_ALIGNMENT
+        offset += padding
+        length = sum(len(buffer) for buffer in buffers)
+        entries.append(SECTION_ENTRY.pack(tag, offset, length))
+        paddings.append(bytes(padding))
+        offset += length
+
+    num_bytes = aku_file.write(
+        PREAMBLE.pack(MAGIC, VERSION) +
+        IMAGE_INFO.pack(rows, cols, dims, dtype_code) +
+        SECTION_COUNT.pack(len(sections)) +
+        b"".join(entries)
+    )
+    for padding, (_, buffers) in zip(paddings, sections):
+        num_bytes += aku_file.write(padding)
+        for buffer in buffers:
+            num_bytes += aku_file.write(buffer)
+    return num_bytes
+
+
+def _compress_chunk(chunk: memoryview, compression: str, level: int) -> bytes:
+    """
+    Compress a single chunk of rows.
+
+    Args:
+        chunk (memoryview): Byte view of the rows.
+        compression (str): Name of the compressor, one of COMPRESSOR_CODES.
+        level (int): Compression level, 0-9.
+
+    Returns:
+        bytes: The compressed chunk.
+    """
+    if compression == "zlib":
+        return zlib.compress(chunk, level)
+    return lzma.compress(chunk, preset=level)
+
+
+def compress_pixels(img: ndarray,
+                    compression: str = "zlib",
+                    level: int = 6,
+                    rows_per_chunk: int = 64,
+                    max_workers: int = None) -> list:
+    """
+    Split the pixels of an image into row chunks and compress every chunk independently.
+
+    Chunks are compressed concurrently in threads, both zlib and lzma release the GIL
+    while compressing so this scales across cores.
+
+    Args:
+        img (ndarray): The image to be compressed.
+        compression (str, optional): Name of the compressor, one of COMPRESSOR_CODES. Defaults to "zlib".
+        level (int, optional): Compression level, 0-9. Defaults to 6.
+        rows_per_chunk (int, optional): Number of image rows per chunk. Defaults to 64.
+        max_workers (int, optional): Number of compressing threads, if not provided
+            ThreadPoolExecutor picks it from the available cores. Defaults to None.
+
+    Returns:
+        list: The buffers making up the compressed pixel section.
+    """
+    assert compression in COMPRESSOR_CODES, f"Unsupported compression {compression}"
+    assert rows_per_chunk > 0, "rows_per_chunk must be positive"
+    rows = img.shape[0]
+    pixels = _pixel_buffer(img, dtype=None)
+    row_bytes = len(pixels) // rows if rows else 0
+    chunks = [pixels[start*row_bytes:(start + rows_per_chunk)*row_bytes] for start in range(0, rows, rows_per_chunk)]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        compressed_chunks = list(executor.map(lambda chunk: _compress_chunk(chunk, compression, level), chunks))
+
+    offset = CHUNKS_HEADER.size + len(compressed_chunks)*CHUNK_ENTRY.size
+    entries = []
+    for compressed_chunk in compressed_chunks:
+        entries.append(CHUNK_ENTRY.pack(offset, len(compressed_chunk)))
+        offset += len(compressed_chunk)
+    header = CHUNKS_HEADER.pack(COMPRESSOR_CODES[compression], rows_per_chunk, len(compressed_chunks))
+    return [header + b"".join(entries)] + compressed_chunks
+
+
+def encode_mask(mask: ndarray) -> list:
+    """
+    Pack a binary mask, 8 pixels per byte, into the buffers of a mask section.
+
+    Args:
+        mask (ndarray): A boolean mask or a thresholded image, any non zero value is set.
+
+    Returns:
+        list: The buffers making up the mask section.
+    """
+    rows, cols, dims = _get_image_shape(mask)
+    packed = packbits(mask.reshape(rows, cols*dims) != 0, axis=-1)
+    return [MASK_INFO.pack(rows, cols, dims), memoryview(packed).cast("B")]
+
+
+def write_container(aku_file: BufferedWriter,
+                    img: ndarray,
+                    metadata: bytes = None,
+                    compression: str = None,
+                    level: int = 6,
+                    rows_per_chunk: int = 64,
+                    mask: ndarray = None) -> int:
+    """
+    Write an image and its optional metadata as a versioned (v2) .aku container.
+
+    Args:
+        aku_file (BufferedWriter): The .aku file object.
+        img (ndarray): The image to be written, its dtype is kept and stored in the header.
+        metadata (bytes, optional): The packed metadata record. Defaults to None.
+        compression (str, optional): If provided, the pixels are stored as independently
+            compressed row chunks with this compressor, one of COMPRESSOR_CODES. Defaults to None.
+        level (int, optional): Compression level, 0-9. Defaults to 6.
+        rows_per_chunk (int, optional): Number of image rows per compressed chunk. Defaults to 64.
+        mask (ndarray, optional): If provided, a binary mask of the image, e.g. its thresholded
+            version, stored bit packed after the pixels. Defaults to None.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    sections = [] if metadata is None else [(METADATA_TAG, [metadata])]
+    if compression is None:
+        sections.append((PIXELS_TAG, [_pixel_buffer(img, dtype=None)]))
+    else:
+        sections.append((COMPRESSED_PIXELS_TAG, compress_pixels(img, compression, level, rows_per_chunk)))
+    if mask is not None:
+        sections.append((MASK_TAG, encode_mask(mask)))
+    return write_sections(aku_file, img, sections)
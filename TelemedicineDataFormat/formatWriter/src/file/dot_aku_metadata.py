@@ -1,3 +1,6 @@
+from file.dot_aku_codec import pack_gender_n_age, encode_metadata
+
+
 class DotAkuMetadata:
     """Represents metadata for DotAku.
 
@@ -5,7 +8,6 @@ class DotAkuMetadata:
 
     Attributes:
         _id (int): The ID of the metadata.
-        _gender (str): The gender of the person associated with the metadata.
         _age (int): The age of the person associated with the metadata.
         _gender_n_age (bytes): The binary representation of gender and age.
         _date (bytes): The date associated with the metadata.
@@ -29,9 +31,8 @@ class DotAkuMetadata:
             description (str): The description associated with the metadata.
         """
         self._id = int(id)
-        self._gender = "1" if gender == "M" else "0"
         self._age = int(age)
-        self._gender_n_age =  bytes([int(self._gender + '{0:07b}'.format(self._age), 2)])
+        self._gender_n_age = bytes([pack_gender_n_age(gender, self._age)])
         self._date = bytes(date, "utf-8")
         self._description = bytes(description, "utf-8")
         self._num_bytes_date = bytes([len(self._date)])
@@ -89,4 +90,12 @@ class DotAkuMetadata:
         Returns:
             str: The description associated with the metadata.
         """
-        return self._description
\ No newline at end of file
+        return self._description
+    
+    def to_bytes(self) -> bytes:
+        """Packs the metadata record as it is stored in .aku files.
+
+        Returns:
+            bytes: The packed metadata record.
+        """
+        return encode_metadata(self._id, self._gender_n_age[0], self._date, self._description)
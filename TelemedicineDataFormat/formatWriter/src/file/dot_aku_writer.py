@@ -1,7 +1,8 @@
 import os
-import struct
 from io import BufferedWriter
+from typing import Union
 from file.dot_aku_metadata import DotAkuMetadata
+from file.dot_aku_codec import write_image, write_container
 from services.text_parser import TextParser
 
 import cv2
@@ -18,11 +19,19 @@ class DotAkuWriter:
         _bin_folder_path (str): The path to the binary folder.
         BIN_FILE_NAME (str): The name of the .aku file.
         _aku_file_path (str): The path to the .aku file.
+        _version (int): The .aku format version to write.
+        _compression (str): The compressor of the pixel chunks, None for raw pixels.
+        _compression_level (int): The compression level.
+        _rows_per_chunk (int): The number of image rows per compressed chunk.
     """
     def __init__(self,
                  img_path: str,
                  text_path: str,
-                 bin_file_path: str):
+                 bin_file_path: str,
+                 version: int = 2,
+                 compression: str = None,
+                 compression_level: int = 6,
+                 rows_per_chunk: int = 64):
         """
         Initializes a DotAkuWriter.
 
@@ -30,12 +39,56 @@ class DotAkuWriter:
             img_path (str): The path to the image file.
             text_path (str): The path to the text file.
             bin_file_path (str): The path to the binary folder.
+            version (int, optional): The .aku format version to write, 1 for the legacy
+                header-pixels-metadata layout or 2 for the versioned container. Defaults to 2.
+            compression (str, optional): If provided, the pixels are stored as independently
+                compressed row chunks, either "zlib" or "lzma". Only supported by version 2. Defaults to None.
+            compression_level (int, optional): The compression level, 0-9. Defaults to 6.
+            rows_per_chunk (int, optional): The number of image rows per compressed chunk. Defaults to 64.
         """
+        assert version in (1, 2), f"Unsupported .aku version {version}"
+        assert compression is None or version == 2, "Compressed pixels require the .aku version 2"
         self._img_path = os.path.abspath(img_path)
         self._text_path = os.path.abspath(text_path) if text_path is not None else None  # text_path is optional
         self._bin_folder_path = os.path.abspath(bin_file_path)
         self.BIN_FILE_NAME = "aku.bin"  # TODO: Make this dynamic according to the users needs
         self._aku_file_path = os.path.abspath(os.path.join(self._bin_folder_path, self.BIN_FILE_NAME))
+        self._version = version
+        self._compression = compression
+        self._compression_level = compression_level
+        self._rows_per_chunk = rows_per_chunk
+    
+    @property
+    def aku_file_path(self) -> str:
+        """
+        Get the path to the .aku file.
+
+        Returns:
+            str: The path to the .aku file.
+        """
+        return self._aku_file_path
+    
+    def _get_image(self) -> ndarray:
+        """
+        Read the image to be written.
+
+        Returns:
+            ndarray: The image.
+        """
+        assert self._img_path is not None, ""
+        return cv2.imread(self._img_path)
+    
+    def _get_metadata(self) -> Union[None, DotAkuMetadata]:
+        """
+        Parse the metadata to be written.
+
+        Returns:
+            Union[None, DotAkuMetadata]: The metadata, None if the project has no text file.
+        """
+        if self._text_path is None:
+            return None
+        file_content: list[str] = TextParser(self._text_path).get_file_content()
+        return DotAkuMetadata(*file_content)
     
     def _write_image(self, aku_file: BufferedWriter, keep_open = False) -> 'DotAkuWriter':
         """
@@ -48,16 +101,7 @@ class DotAkuWriter:
         Returns:
             DotAkuWriter: The DotAkuWriter instance.
         """
-        assert self._img_path is not None, ""
-        img_array: ndarray = cv2.imread(self._img_path)
-        rows, cols, dims = img_array.shape
-        
-        aku_file.write(struct.pack("IIc", rows, cols, bytes([dims])))
-        
-        for i in range(rows):
-            for j in range(cols):
-                for k in range(dims):
-                    aku_file.write(struct.pack("c", bytes([img_array[i,j,k]])))
+        write_image(aku_file, self._get_image())
 
         if not keep_open:
             aku_file.close()
@@ -80,15 +124,33 @@ class DotAkuWriter:
         if self._text_path is None:
             return self
         
-        file_content: list[str] = TextParser(self._text_path).get_file_content()
-        metadata = DotAkuMetadata(*file_content)
+        aku_file.write(self._get_metadata().to_bytes())
+        
+        if not keep_open:
+            aku_file.close()
+        
+        return self
         
-        aku_file.write(struct.pack("H", metadata.id))
-        aku_file.write(struct.pack("c", metadata.gender_n_age))
-        aku_file.write(struct.pack("c", metadata.num_bytes_date))
-        aku_file.write(struct.pack("<" + str(len(metadata.date)) + "s", metadata.date))
-        aku_file.write(struct.pack("c", metadata.num_bytes_description))
-        aku_file.write(struct.pack("<" + str(len(metadata.description)) + "s", metadata.description))
+    def _write_container(self,
+                         aku_file: BufferedWriter,
+                         keep_open = False) -> 'DotAkuWriter':
+        """
+        Write image data and metadata as a versioned .aku container, metadata first.
+
+        Args:
+            aku_file (BufferedWriter): The .aku file object.
+            keep_open (bool, optional): Whether to keep the file open after writing. Defaults to False.
+
+        Returns:
+            DotAkuWriter: The DotAkuWriter instance.
+        """
+        metadata: Union[None, DotAkuMetadata] = self._get_metadata()
+        write_container(aku_file,
+                        self._get_image(),
+                        metadata=None if metadata is None else metadata.to_bytes(),
+                        compression=self._compression,
+                        level=self._compression_level,
+                        rows_per_chunk=self._rows_per_chunk)
         
         if not keep_open:
             aku_file.close()
@@ -103,11 +165,14 @@ class DotAkuWriter:
             DotAkuWriter: The DotAkuWriter instance.
         """
         with open(self._aku_file_path, "wb") as aku_file:
-            (
-                self
-                ._write_image(aku_file, keep_open=True)
-                ._write_metadata(aku_file, keep_open=True)
-            )
+            if self._version == 1:
+                (
+                    self
+                    ._write_image(aku_file, keep_open=True)
+                    ._write_metadata(aku_file, keep_open=True)
+                )
+            else:
+                self._write_container(aku_file, keep_open=True)
             aku_file.close()
         return self
             
\ No newline at end of file
@@ -1,10 +1,35 @@
 from services.flags_parser import FlagsParser
 from services.proyect_builder import ProyectBuilder
+from services.batch_builder import BatchBuilder
 from file.dot_aku_writer import DotAkuWriter
 
+
+def _get_writer_options(flags: dict[str, str]) -> dict:
+    return {
+        "version": flags["aku_version"],
+        "compression": flags["compression"],
+        "compression_level": flags["compression_level"],
+        "rows_per_chunk": flags["rows_per_chunk"]
+    }
+
+
+def main_batch(flags: dict[str, str]):
+    summary: dict = BatchBuilder(manifest_path=flags["manifest_path"],
+                                 output_folder_path=flags["output_folder_path"],
+                                 num_processes=flags["num_processes"],
+                                 max_in_flight=flags["max_in_flight"],
+                                 writer_options=_get_writer_options(flags)).build()
+    for error in summary["errors"]:
+        print(error)
+    print(f"Built {summary['succeeded']}/{summary['projects']} projects in {summary['elapsed_seconds']:.2f} s "
+          f"({summary['projects_per_second']:.2f} projects/s, {summary['written_mb_per_second']:.2f} MB/s)")
+
+
 def main():
     fg = FlagsParser().build()
     flags: dict[str, str] = fg.get_flags()
+    if flags["manifest_path"] is not None:
+        return main_batch(flags)
     proyect = (
         ProyectBuilder(proyect_name=flags["proyect_name"])
         .build_parent_folder(flags["output_folder_path"])
@@ -17,7 +42,8 @@ def main():
     
     DotAkuWriter(img_path=proyect.img_path,
                  text_path=proyect.text_path,
-                 bin_file_path=proyect.bin_folder).write_file()
+                 bin_file_path=proyect.bin_folder,
+                 **_get_writer_options(flags)).write_file()
 
 
 if __name__ == "__main__":
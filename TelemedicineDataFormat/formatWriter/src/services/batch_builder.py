@@ -0,0 +1,236 @@
+import csv
+import json
+import os
+import timeit
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Union
+from exceptions.custom_exceptions import ProyectBuildException
+from file.dot_aku_writer import DotAkuWriter
+from services.proyect_builder import ProyectBuilder
+
+
+def _build_proyect(item: dict[str, str],
+                   output_folder_path: Union[None, str],
+                   writer_options: dict) -> dict:
+    """
+    Build a single project and write its .aku file, runs inside a pool worker.
+
+    Errors are captured here, where the traceback is still available, and sent back
+    as the JSON representation of a ProyectBuildException.
+
+    Args:
+        item (dict[str, str]): Manifest entry with the img, text and name keys.
+        output_folder_path (Union[None, str]): The folder where the project is saved.
+        writer_options (dict): Keyword arguments forwarded to DotAkuWriter.
+
+    Returns:
+        dict: The outcome of the build.
+    """
+    start_time = timeit.default_timer()
+    try:
+        proyect = (
+            ProyectBuilder(proyect_name=item["name"])
+            .build_parent_folder(output_folder_path)
+            .build_data_folder()
+            .build_bin_folder()
+            .create_proyect()
+            .copy_img_2_proyect(item["img"])
+            .copy_text_2_proyect(item["text"])
+        )
+        writer = DotAkuWriter(img_path=proyect.img_path,
+                              text_path=proyect.text_path,
+                              bin_file_path=proyect.bin_folder,
+                              **writer_options).write_file()
+        return {
+            "name": item["name"],
+            "ok": True,
+            "bytes": os.path.getsize(writer.aku_file_path),
+            "seconds": timeit.default_timer() - start_time
+        }
+    except Exception as error:
+        return {
+            "name": item["name"],
+            "ok": False,
+            "error": str(ProyectBuildException(f"Could not build project {item['name']}", error)),
+            "seconds": timeit.default_timer() - start_time
+        }
+
+
+class BatchBuilder:
+    """
+    A class for building many projects from a manifest with a process pool.
+
+    Every worker process imports cv2 and the writer once and then builds many projects,
+    so the interpreter start up is paid once per worker instead of once per project.
+
+    Attributes:
+        _manifest_path (str): The path to the manifest, either .csv or .jsonl.
+        _output_folder_path (str): The folder where the projects are saved.
+        _num_processes (int): The number of worker processes.
+        _max_in_flight (int): The maximum number of projects submitted and not finished yet.
+        _writer_options (dict): Keyword arguments forwarded to DotAkuWriter.
+        _results (list[dict]): The outcome of every built project.
+    """
+    MANIFEST_FIELDS = ("img", "text", "name")
+
+    def __init__(self,
+                 manifest_path: str,
+                 output_folder_path: str = None,
+                 num_processes: int = None,
+                 max_in_flight: int = None,
+                 writer_options: dict = None):
+        """
+        Initializes a BatchBuilder.
+
+        Args:
+            manifest_path (str): The path to the manifest. A .csv file with an img, text, name
+                header or a .jsonl file with one object with those keys per line.
+            output_folder_path (str, optional): The folder where the projects are saved. Defaults to None.
+            num_processes (int, optional): The number of worker processes. Defaults to the number of cores.
+            max_in_flight (int, optional): The maximum number of projects submitted and not finished yet,
+                it bounds the memory held by pending images. Defaults to twice the number of processes.
+            writer_options (dict, optional): Keyword arguments forwarded to DotAkuWriter. Defaults to None.
+        """
+        self._manifest_path = os.path.abspath(manifest_path)
+        self._output_folder_path = output_folder_path
+        self._num_processes = os.cpu_count() if num_processes is None else num_processes
+        self._max_in_flight = 2*self._num_processes if max_in_flight is None else max_in_flight
+        self._writer_options = {} if writer_options is None else writer_options
+        self._results: list[dict] = []
+        assert self._max_in_flight > 0, "max_in_flight must be positive"
+
+    @property
+    def results(self) -> list[dict]:
+        """
+        Get the outcome of every built project, in completion order.
+
+        Returns:
+            list[dict]: The outcome of every built project.
+        """
+        return self._results
+
+    def _resolve_path(self, path: Union[None, str]) -> Union[None, str]:
+        """
+        Resolve a path of the manifest, relative paths are relative to the folder of the manifest.
+
+        Args:
+            path (Union[None, str]): The path as written in the manifest.
+
+        Returns:
+            Union[None, str]: The absolute path, None if there is no path.
+        """
+        if path is None:
+            return None
+        return os.path.normpath(os.path.join(os.path.dirname(self._manifest_path), os.path.expanduser(path)))
+
+    def _parse_item(self, item) -> dict[str, str]:
+        """
+        Validate and normalize a manifest entry.
+
+        Args:
+            item: The raw manifest entry.
+
+        Raises:
+            ValueError: If the entry is not an object or has no img.
+
+        Returns:
+            dict[str, str]: The entry with the img, text and name keys, empty values as None.
+        """
+        if not isinstance(item, dict):
+            raise ValueError(f"Manifest entry is not an object: {item!r}")
+        item = {field: (item.get(field) or None) for field in self.MANIFEST_FIELDS}
+        if item["img"] is None:
+            raise ValueError(f"Manifest entry without img: {item}")
+        if item["name"] is None:
+            item["name"] = os.path.splitext(os.path.basename(item["img"]))[0]
+        item["img"], item["text"] = self._resolve_path(item["img"]), self._resolve_path(item["text"])
+        return item
+
+    def _capture_invalid_entry(self, line_number: int, error: Exception) -> dict:
+        """
+        Build the failed outcome of a manifest entry that could not be read.
+
+        Args:
+            line_number (int): The line of the entry in the manifest.
+            error (Exception): The error raised while reading it.
+
+        Returns:
+            dict: The outcome of the entry, as a failed build.
+        """
+        name = f"{os.path.basename(self._manifest_path)}:{line_number}"
+        return {
+            "name": name,
+            "ok": False,
+            "error": str(ProyectBuildException(f"Invalid manifest entry {name}", error)),
+            "seconds": 0.0
+        }
+
+    def _read_manifest(self):
+        """
+        Lazily read the manifest entries.
+
+        Invalid entries do not stop the batch, they are yielded as failed outcomes.
+
+        Yields:
+            tuple[Union[None, dict[str, str]], Union[None, dict]]: A valid entry and None,
+                or None and the failed outcome of an invalid entry.
+        """
+        with open(self._manifest_path, "r", newline="") as manifest:
+            if self._manifest_path.endswith(".jsonl"):
+                rows = ((line_number, line) for line_number, line in enumerate(manifest, start=1) if line.strip())
+                parse_row = lambda line: self._parse_item(json.loads(line))
+            else:
+                reader = csv.DictReader(manifest)
+                rows = ((reader.line_num, row) for row in reader)
+                parse_row = lambda row: self._parse_item({key.strip(): (value or "").strip()
+                                                          for key, value in row.items() if key})
+            for line_number, row in rows:
+                try:
+                    item = parse_row(row)
+                except Exception as error:  # captured here, where the traceback is still available
+                    yield None, self._capture_invalid_entry(line_number, error)
+                    continue
+                yield item, None
+
+    def build(self) -> dict:
+        """
+        Build every project of the manifest.
+
+        Returns:
+            dict: The throughput summary of the run.
+        """
+        start_time = timeit.default_timer()
+        in_flight: set[Future] = set()
+        with ProcessPoolExecutor(max_workers=self._num_processes) as executor:
+            for item, invalid_entry in self._read_manifest():
+                if invalid_entry is not None:
+                    self._results.append(invalid_entry)
+                    continue
+                if len(in_flight) >= self._max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._results.extend(future.result() for future in done)
+                in_flight.add(executor.submit(_build_proyect, item, self._output_folder_path, self._writer_options))
+            self._results.extend(future.result() for future in wait(in_flight).done)
+        return self._summarize(timeit.default_timer() - start_time)
+
+    def _summarize(self, elapsed_time: float) -> dict:
+        """
+        Summarize the throughput of the run.
+
+        Args:
+            elapsed_time (float): The wall time of the run in seconds.
+
+        Returns:
+            dict: The throughput summary of the run.
+        """
+        succeeded = [result for result in self._results if result["ok"]]
+        written_mb = sum(result["bytes"] for result in succeeded) / 2**20
+        return {
+            "projects": len(self._results),
+            "succeeded": len(succeeded),
+            "failed": len(self._results) - len(succeeded),
+            "errors": [result["error"] for result in self._results if not result["ok"]],
+            "elapsed_seconds": elapsed_time,
+            "projects_per_second": len(self._results) / elapsed_time if elapsed_time else 0.0,
+            "written_mb_per_second": written_mb / elapsed_time if elapsed_time else 0.0
+        }
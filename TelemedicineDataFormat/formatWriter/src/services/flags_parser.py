@@ -58,6 +58,13 @@ class FlagsParser:
         self.parser.add_argument("-bin_folder", "--proyect_bin_folder", type=str, help="Path to the folder containing project binary files.")
         self.parser.add_argument("-img", "--input_img_path", type=str, help="Path to the input image file.")
         self.parser.add_argument("-text", "--input_text_path", type=str, help="Path to the input text file.")
+        self.parser.add_argument("-version", "--aku_version", type=int, default=2, choices=[1, 2], help="Version of the .aku format to write.")
+        self.parser.add_argument("-compression", "--compression", type=str, choices=["zlib", "lzma"], help="Compress the pixels in independent row chunks.")
+        self.parser.add_argument("-level", "--compression_level", type=int, default=6, help="Compression level, 0-9.")
+        self.parser.add_argument("-rows_per_chunk", "--rows_per_chunk", type=int, default=64, help="Number of image rows per compressed chunk.")
+        self.parser.add_argument("-manifest", "--manifest_path", type=str, help="Path to a .csv or .jsonl manifest of img, text and name entries to build in batch.")
+        self.parser.add_argument("-workers", "--num_processes", type=int, help="Number of worker processes of the batch mode.")
+        self.parser.add_argument("-max_in_flight", "--max_in_flight", type=int, help="Maximum number of projects being built at once in batch mode.")
         self._args = (self.parser).parse_args()
         return self
     
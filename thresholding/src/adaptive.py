@@ -0,0 +1,274 @@
+from multiprocessing.shared_memory import SharedMemory
+from parallel import _get_or_check_processes, get_band_bounds
+from shared_processing.pool import get_executor
+from shared_parallel import _attach_shared_memory
+from custom_thresholding import _find_optimal_thresholds_from_histograms
+
+from numpy import (
+    ndarray,
+    array,
+    asarray,
+    bincount,
+    clip,
+    cumsum,
+    concatenate,
+    empty,
+    floor,
+    greater,
+    minimum,
+    searchsorted,
+    stack,
+    unique,
+    zeros,
+    dtype,
+    float32,
+    int64,
+    intp,
+    uint8,
+    bool_
+)
+
+
+def _get_windows(length: int, tile_length: int, halo: int) -> tuple[list[tuple[int, int]], ndarray, ndarray]:
+    """
+    Computes the tiles along one axis and the windows, tiles grown by the halo, where
+    their histograms are taken.
+
+    Args:
+        length (int): Number of pixels along the axis.
+        tile_length (int): Approximate number of pixels of a tile along the axis.
+        halo (int): Number of pixels every window overlaps its neighbours.
+
+    Returns:
+        tuple[list[tuple[int, int]], ndarray, ndarray]: The tile bounds, the window starts and
+            the window stops.
+    """
+    tiles = get_band_bounds(length, -(-length // tile_length))
+    starts = array([max(0, start - halo) for start, _ in tiles], dtype=intp)
+    stops = array([min(length, stop + halo) for _, stop in tiles], dtype=intp)
+    return tiles, starts, stops
+
+
+def _to_gray_levels(img: ndarray) -> ndarray:
+    """
+    Maps an image to the 256 gray levels used by the histograms.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+
+    Returns:
+        ndarray: The image as uint8, values out of [0, 256) are clipped.
+    """
+    return img if img.dtype == uint8 else clip(img, 0, 255).astype(uint8)
+
+
+def _get_window_histograms(band: ndarray, col_starts: ndarray, col_stops: ndarray) -> ndarray:
+    """
+    Computes the histograms of every window of a band of rows with a single bincount.
+
+    The columns are cut at every window bound, so the histogram of a window is the
+    difference of two cumulative histograms of the cuts.
+
+    Args:
+        band (ndarray): The rows of the image covered by a row of windows.
+        col_starts (ndarray): First column of every window.
+        col_stops (ndarray): Column where every window stops, excluded.
+
+    Returns:
+        ndarray: The 256 bins histogram of every window of the band.
+    """
+    cuts = unique(concatenate([[0, band.shape[1]], col_starts, col_stops]))
+    segment_per_col = searchsorted(cuts, range(band.shape[1]), side="right") - 1
+    labels = segment_per_col.reshape((1, -1) + (1,)*(band.ndim - 2)) * 256 + _to_gray_levels(band)
+    hists = bincount(labels.ravel(), minlength=len(cuts)*256).reshape(len(cuts), 256)
+    cumulative_hists = concatenate([zeros((1, 256), dtype=int64), cumsum(hists, axis=0)])
+    return cumulative_hists[searchsorted(cuts, col_stops)] - cumulative_hists[searchsorted(cuts, col_starts)]
+
+
+def _get_shared_window_histograms(img_name: str,
+                                  shape: tuple,
+                                  img_dtype: str,
+                                  row_start: int,
+                                  row_stop: int,
+                                  col_starts: ndarray,
+                                  col_stops: ndarray) -> ndarray:
+    """
+    Computes the window histograms of a band of rows of the shared image, runs inside a pool worker.
+
+    Args:
+        img_name (str): Name of the shared memory block holding the image.
+        shape (tuple): Shape of the image.
+        img_dtype (str): Dtype of the image.
+        row_start (int): First row of the band.
+        row_stop (int): Row where the band stops, excluded.
+        col_starts (ndarray): First column of every window.
+        col_stops (ndarray): Column where every window stops, excluded.
+
+    Returns:
+        ndarray: The 256 bins histogram of every window of the band.
+    """
+    img_memory = _attach_shared_memory(img_name)
+    try:
+        band = ndarray(shape, dtype=dtype(img_dtype), buffer=img_memory.buf)[row_start:row_stop]
+        hists = _get_window_histograms(band, col_starts, col_stops)
+        del band
+        return hists
+    finally:
+        img_memory.close()
+
+
+def _get_tile_histograms(img: ndarray,
+                         row_starts: ndarray,
+                         row_stops: ndarray,
+                         col_starts: ndarray,
+                         col_stops: ndarray,
+                         num_processes: int) -> ndarray:
+    """
+    Computes the histogram of every window of the grid, one row of windows at a time.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        row_starts (ndarray): First row of every row of windows.
+        row_stops (ndarray): Row where every row of windows stops, excluded.
+        col_starts (ndarray): First column of every column of windows.
+        col_stops (ndarray): Column where every column of windows stops, excluded.
+        num_processes (int): Number of processes, 1 computes them in the calling process.
+
+    Returns:
+        ndarray: The (tile rows, tile cols, 256) histograms.
+    """
+    if num_processes == 1:
+        return stack([_get_window_histograms(img[row_start:row_stop], col_starts, col_stops)
+                      for row_start, row_stop in zip(row_starts, row_stops)])
+    img_memory = SharedMemory(create=True, size=max(1, img.nbytes))
+    try:
+        shared_img = ndarray(img.shape, dtype=img.dtype, buffer=img_memory.buf)
+        shared_img[...] = img
+        executor = get_executor(num_processes, img.size)
+        futures = [
+            executor.submit(_get_shared_window_histograms, img_memory.name, img.shape, img.dtype.str,
+                            int(row_start), int(row_stop), col_starts, col_stops)
+            for row_start, row_stop in zip(row_starts, row_stops)
+        ]
+        hists = stack([future.result() for future in futures])
+        del shared_img
+        return hists
+    finally:
+        img_memory.close()
+        img_memory.unlink()
+
+
+def _get_lerp_weights(positions: ndarray, centers: ndarray) -> tuple[ndarray, ndarray, ndarray]:
+    """
+    Computes the neighbouring tile centers of every position and its weight between them.
+    Positions before the first center or after the last one take the nearest center.
+
+    Args:
+        positions (ndarray): Pixel positions along an axis.
+        centers (ndarray): Tile centers along the same axis, increasing.
+
+    Returns:
+        tuple[ndarray, ndarray, ndarray]: The lower center, the upper center and the weight of the upper one.
+    """
+    lower = clip(searchsorted(centers, positions, side="right") - 1, 0, len(centers) - 1)
+    upper = minimum(lower + 1, len(centers) - 1)
+    span = (centers[upper] - centers[lower]).astype(float32)
+    span[span == 0] = 1
+    weight = clip((positions - centers[lower]) / span, 0, 1).astype(float32)
+    return lower, upper, weight
+
+
+def _interpolate_thresholds(thresholds: ndarray,
+                            row_centers: ndarray,
+                            col_centers: ndarray,
+                            row_start: int,
+                            row_stop: int,
+                            width: int) -> ndarray:
+    """
+    Bilinearly interpolates the tile thresholds over a band of rows.
+
+    Args:
+        thresholds (ndarray): The (tile rows, tile cols) thresholds.
+        row_centers (ndarray): Center row of every row of tiles.
+        col_centers (ndarray): Center column of every column of tiles.
+        row_start (int): First row of the band.
+        row_stop (int): Row where the band stops, excluded.
+        width (int): Number of columns of the image.
+
+    Returns:
+        ndarray: The threshold of every pixel of the band.
+    """
+    left, right, col_weight = _get_lerp_weights(array(range(width)), col_centers)
+    per_col = thresholds[:, left] * (1 - col_weight) + thresholds[:, right] * col_weight
+    top, bottom, row_weight = _get_lerp_weights(array(range(row_start, row_stop)), row_centers)
+    return per_col[top] * (1 - row_weight[:, None]) + per_col[bottom] * row_weight[:, None]
+
+
+def find_tile_thresholds(img: ndarray,
+                         tile_size: tuple[int, int] = (64, 64),
+                         halo: int = 16,
+                         num_processes: int = 1) -> ndarray:
+    """
+    Finds the Otsu threshold of every tile of a grid over the image.
+
+    The histogram of a tile is taken over the tile grown by the halo on every side, so
+    neighbouring thresholds share pixels and change smoothly across the grid.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        tile_size (tuple[int, int], optional): Approximate height and width of a tile. Defaults to (64, 64).
+        halo (int, optional): Number of pixels every tile window overlaps its neighbours. Defaults to 16.
+        num_processes (int, optional): Number of processes of the persistent pool used for the
+            histograms, 1 computes them in the calling process. Defaults to 1.
+
+    Returns:
+        ndarray: The (tile rows, tile cols) thresholds.
+
+    Raises:
+        AssertionError: If the tile size is not positive or the halo is negative.
+    """
+    assert min(tile_size) > 0 and halo >= 0, "Tile size must be positive and halo non negative"
+    num_processes: int = _get_or_check_processes(num_processes)
+    _, row_starts, row_stops = _get_windows(img.shape[0], tile_size[0], halo)
+    _, col_starts, col_stops = _get_windows(img.shape[1], tile_size[1], halo)
+    hists = _get_tile_histograms(img, row_starts, row_stops, col_starts, col_stops, num_processes)
+    return _find_optimal_thresholds_from_histograms(hists)
+
+
+def adaptive_thresholding(img: ndarray,
+                          tile_size: tuple[int, int] = (64, 64),
+                          halo: int = 16,
+                          num_processes: int = 1) -> ndarray:
+    """
+    Applies tiled adaptive thresholding to an image.
+
+    Otsu's method runs on every tile of a grid, then the threshold of every pixel is
+    bilinearly interpolated between the centers of its neighbouring tiles, so unevenly
+    lit images are segmented without seams at the tile borders.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        tile_size (tuple[int, int], optional): Approximate height and width of a tile. Defaults to (64, 64).
+        halo (int, optional): Number of pixels every tile window overlaps its neighbours. Defaults to 16.
+        num_processes (int, optional): Number of processes of the persistent pool used for the
+            histograms, 1 computes them in the calling process. Defaults to 1.
+
+    Returns:
+        ndarray: Thresholded image matrix.
+    """
+    height, width = img.shape[:2]
+    thresholds = find_tile_thresholds(img, tile_size, halo, num_processes).astype(float32)
+    row_tiles, _, _ = _get_windows(height, tile_size[0], halo)
+    col_tiles, _, _ = _get_windows(width, tile_size[1], halo)
+    row_centers = asarray([(start + stop - 1) / 2 for start, stop in row_tiles], dtype=float32)
+    col_centers = asarray([(start + stop - 1) / 2 for start, stop in col_tiles], dtype=float32)
+
+    thresholded_img = empty(img.shape, dtype=uint8)
+    for row_start, row_stop in row_tiles:  # one row of tiles at a time bounds the threshold map
+        band_thresholds = floor(_interpolate_thresholds(thresholds, row_centers, col_centers, row_start, row_stop, width))
+        if img.ndim == 3:
+            band_thresholds = band_thresholds[..., None]
+        out_band = thresholded_img[row_start:row_stop]
+        greater(img[row_start:row_stop], band_thresholds, out=out_band.view(bool_))
+        out_band *= 255
+    return thresholded_img
@@ -1,12 +1,77 @@
+from functools import lru_cache
+
 from numpy import (
     ndarray,
     where,
     histogram,
-    sum,
+    bincount,
+    cumsum,
     arange,
+    argmax,
+    asarray,
+    errstate,
+    stack,
+    concatenate,
+    zeros,
+    full,
+    tril,
+    ones,
+    searchsorted,
+    empty,
+    greater,
+    inf,
+    float64,
+    bool_,
+    intp,
     uint8
 )
 
+
+def _get_histogram(img: ndarray) -> ndarray:
+    """
+    Computes the 256 bins gray level histogram of an image.
+
+    Args:
+        img (ndarray): The input image as a NumPy array.
+
+    Returns:
+        ndarray: The count of pixels of every gray level.
+    """
+    if img.dtype == uint8:
+        return bincount(img.ravel(), minlength=256)  # ravel does not copy contiguous images
+    hist, _ = histogram(img, bins=256, range=[0,256])
+    return hist
+
+
+def _find_optimal_thresholds_from_histograms(hists: ndarray) -> ndarray:
+    """
+    Finds the Otsu threshold of one or many histograms in a single vectorized pass.
+
+    The between-class variance of every candidate threshold is computed at once
+    from the cumulative sums of the histogram instead of iterating over the bins.
+
+    Args:
+        hists (ndarray): Histograms with 256 bins in the last axis.
+
+    Returns:
+        ndarray: The optimal threshold of every histogram.
+    """
+    hists = asarray(hists, dtype=float64)
+    grays = arange(hists.shape[-1])
+    weight_background = cumsum(hists, axis=-1)  # pixels at or below every threshold
+    sum_background = cumsum(hists * grays, axis=-1)
+    total = weight_background[..., -1:]
+    total_sum = sum_background[..., -1:]
+    weight_foreground = total - weight_background
+    with errstate(divide="ignore", invalid="ignore"):
+        mean_background = sum_background / weight_background
+        mean_foreground = (total_sum - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground)**2
+    # thresholds leaving a class empty are not candidates, as in the iterative search
+    variance = where((weight_background > 0) & (weight_foreground > 0), variance, 0)
+    return argmax(variance, axis=-1)
+
+
 def _find_optimal_threshold_otsu(img: ndarray):
     """
     Finds the optimal threshold for image segmentation using Otsu's method.
@@ -17,37 +82,164 @@ def _find_optimal_threshold_otsu(img: ndarray):
     Returns:
         int: The optimal threshold value for image segmentation.
     """
-    # Obtain image's histogram
-    hist, _ = histogram(img.flatten(), bins=256, range=[0,256])
-    # Normalize the histogram
-    norm_hist = hist / hist.sum()
-    
-    total_sum = sum(arange(256) * norm_hist)
-    sumB, wB, threshold = (0, 0, 0)
-    max_variance = 0 # Max variance between classes
-    
-    # Iterate over all grays for finding the optimal threshold
-    for i in range(256):
-        wB += norm_hist[i]
-        if wB == 0: continue
-        
-        wF = 1 - wB
-        if wF == 0: break
-        
-        sumB += i * norm_hist[i]
-        mB = sumB / wB
-        mF = (total_sum - sumB) / wF
-
-        variance = wB * wF * (mB - mF)**2
-        
-        if variance > max_variance:
-            max_variance = variance
-            threshold = i
-    
+    threshold = int(_find_optimal_thresholds_from_histograms(_get_histogram(img)))
     print(f"The optimal threshold is: {threshold}")
     return threshold
+
+
+def find_optimal_thresholds_otsu(imgs) -> ndarray:
+    """
+    Finds the Otsu threshold of every image of a batch.
+
+    The histograms are computed per image and the threshold search runs once
+    for the whole batch.
+
+    Args:
+        imgs (Union[ndarray, list[ndarray]]): A (N, H, W) stack of images or a list of images,
+            which may differ in size.
+
+    Returns:
+        ndarray: The optimal threshold of every image.
+    """
+    hists = stack([_get_histogram(img) for img in imgs])
+    return _find_optimal_thresholds_from_histograms(hists)
     
 
+@lru_cache(maxsize=None)
+def _get_empty_classes_mask(bins: int) -> ndarray:
+    """
+    Computes the lookup mask of the (first level, last level) pairs that do not form a class.
+    It only depends on the number of bins, so it is shared by every histogram.
+
+    Args:
+        bins (int): Number of bins of the histograms.
+
+    Returns:
+        ndarray: True where the last level is before the first level.
+    """
+    mask = tril(ones((bins, bins), dtype=bool_), k=-1)
+    mask.flags.writeable = False
+    return mask
+
+
+def _get_class_scores(hists: ndarray) -> ndarray:
+    """
+    Computes, from the cumulative moment tables, the score (sum of gray levels)^2 / pixels
+    of every class of consecutive gray levels of every histogram.
+
+    Maximizing the sum of the scores of the classes maximizes the between class variance.
+
+    Args:
+        hists (ndarray): (N, bins) histograms.
+
+    Returns:
+        ndarray: (N, first level, last level) scores, -inf for pairs that do not form a class
+            and 0 for classes without pixels.
+    """
+    hists = asarray(hists, dtype=float64)
+    padding = zeros(hists.shape[:-1] + (1,))
+    weights = concatenate([padding, cumsum(hists, axis=-1)], axis=-1)
+    sums = concatenate([padding, cumsum(hists * arange(hists.shape[-1]), axis=-1)], axis=-1)
+    class_weights = weights[:, None, 1:] - weights[:, :-1, None]
+    class_sums = sums[:, None, 1:] - sums[:, :-1, None]
+    with errstate(divide="ignore", invalid="ignore"):
+        scores = where(class_weights > 0, class_sums**2 / class_weights, 0)
+    scores[:, _get_empty_classes_mask(hists.shape[-1])] = -inf
+    return scores
+
+
+def _find_multi_thresholds_from_histograms(hists: ndarray, classes: int) -> ndarray:
+    """
+    Finds the multi-level Otsu thresholds of many histograms with dynamic programming.
+
+    The best score of splitting the levels up to every last level into j classes is built
+    from the best split into j - 1 classes, so the search costs O(classes * bins^2)
+    instead of O(bins^(classes - 1)).
+
+    Args:
+        hists (ndarray): (N, bins) histograms.
+        classes (int): Number of classes.
+
+    Returns:
+        ndarray: (N, classes - 1) thresholds, pixels greater than the j-th threshold are
+            at least in class j + 1.
+    """
+    scores = _get_class_scores(hists)
+    best = scores[:, 0, :]  # a single class from level 0 up to every last level
+    choices = []
+    for _ in range(classes - 1):
+        # last level of the previous classes (axis 1) for every last level (axis 2)
+        candidates = best[:, :-1, None] + scores[:, 1:, :]
+        choices.append(argmax(candidates, axis=1))
+        best = full(best.shape, -inf)
+        best[:, 1:] = candidates.max(axis=1)[:, 1:]
+    thresholds = zeros((scores.shape[0], classes - 1), dtype=intp)
+    last_level = full(scores.shape[0], scores.shape[-1] - 1)
+    rows = arange(scores.shape[0])
+    for j in range(classes - 2, -1, -1):
+        last_level = choices[j][rows, last_level]
+        thresholds[:, j] = last_level
+    return thresholds
+
+
+def find_multi_thresholds_otsu(img: ndarray, classes: int = 3) -> ndarray:
+    """
+    Finds the multi-level Otsu thresholds that split an image into a number of classes.
+
+    Args:
+        img (ndarray): The input image as a NumPy array.
+        classes (int, optional): Number of classes. Defaults to 3.
+
+    Returns:
+        ndarray: The classes - 1 increasing thresholds.
+    """
+    return find_multi_thresholds_otsu_batch([img], classes)[0]
+
+
+def find_multi_thresholds_otsu_batch(imgs, classes: int = 3, chunk_size: int = 8) -> ndarray:
+    """
+    Finds the multi-level Otsu thresholds of every image of a batch.
+
+    The class masks are shared by every image and the dynamic programming search runs
+    for a chunk of images at once.
+
+    Args:
+        imgs (Union[ndarray, list[ndarray]]): A (N, H, W) stack of images or a list of images,
+            which may differ in size.
+        classes (int, optional): Number of classes. Defaults to 3.
+        chunk_size (int, optional): Number of images searched at once, it bounds the memory
+            of the score tables. Defaults to 8.
+
+    Returns:
+        ndarray: (N, classes - 1) thresholds.
+
+    Raises:
+        AssertionError: If the number of classes is not between 2 and 256.
+    """
+    assert 2 <= classes <= 256, "Number of classes must be between 2 and 256"
+    hists = stack([_get_histogram(img) for img in imgs])
+    return concatenate([_find_multi_thresholds_from_histograms(hists[i:i + chunk_size], classes)
+                        for i in range(0, len(hists), chunk_size)])
+
+
+def quantize(img: ndarray, thresholds) -> ndarray:
+    """
+    Maps every pixel to the label of its class, the number of thresholds below the pixel.
+
+    Args:
+        img (ndarray): The input image as a NumPy array.
+        thresholds (Union[ndarray, list[int]]): Increasing thresholds.
+
+    Returns:
+        ndarray: The class labels as uint8.
+    """
+    thresholds = asarray(thresholds)
+    if img.dtype == uint8:
+        lookup_table = searchsorted(thresholds, arange(256), side="left").astype(uint8)
+        return lookup_table[img]
+    return searchsorted(thresholds, img, side="left").astype(uint8)
+
+
 def simple_image_thresholding(img: ndarray, 
                               optimal_threshold: int = None):
     """
@@ -69,5 +261,7 @@ def simple_image_thresholding(img: ndarray,
     if optimal_threshold is None:        
         optimal_threshold = _find_optimal_threshold_otsu(img)
     
-    thresholded_image = where(img > optimal_threshold, 255, 0)
-    return thresholded_image.astype(uint8)
\ No newline at end of file
+    thresholded_image = empty(img.shape, dtype=uint8)
+    greater(img, optimal_threshold, out=thresholded_image.view(bool_))  # no int64 intermediate
+    thresholded_image *= 255
+    return thresholded_image
\ No newline at end of file
@@ -0,0 +1,53 @@
+from functools import partial
+from shared_processing.frame_pipeline import FrameWriter, iter_frames, get_video_fps, run_frame_pipeline
+from shared_processing.pool import get_executor
+from parallel import _get_or_check_processes
+from custom_thresholding import _find_optimal_thresholds_from_histograms, _get_histogram, simple_image_thresholding
+
+import cv2
+from numpy import ndarray
+
+
+def threshold_frame(frame: ndarray, optimal_threshold: int = None) -> ndarray:
+    """
+    Thresholds a frame, color frames are converted to gray levels first.
+
+    Args:
+        frame (ndarray): A gray or BGR frame.
+        optimal_threshold (int, optional): The threshold value for image segmentation.
+            If None, the Otsu threshold of every frame is used. Defaults to None.
+
+    Returns:
+        ndarray: The thresholded frame.
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    if optimal_threshold is None:
+        optimal_threshold = int(_find_optimal_thresholds_from_histograms(_get_histogram(gray)))
+    return simple_image_thresholding(gray, optimal_threshold)
+
+
+def threshold_frames(source_path: str,
+                     output_path: str,
+                     optimal_threshold: int = None,
+                     num_processes: int = None,
+                     queue_size: int = 8) -> dict:
+    """
+    Thresholds every frame of a video or a directory of frames.
+
+    Args:
+        source_path (str): Path of a video or of a directory of frames.
+        output_path (str): Path of the output video, or of a directory for PNG frames.
+        optimal_threshold (int, optional): The threshold value for image segmentation.
+            If None, the Otsu threshold of every frame is used. Defaults to None.
+        num_processes (int, optional): Number of worker processes. Defaults to the number of cores.
+        queue_size (int, optional): Capacity of every queue of the pipeline. Defaults to 8.
+
+    Returns:
+        dict: The number of frames, the elapsed seconds and the frames per second.
+    """
+    writer = FrameWriter(output_path, get_video_fps(source_path))
+    try:
+        return run_frame_pipeline(iter_frames(source_path), partial(threshold_frame, optimal_threshold=optimal_threshold),
+                                  writer.write, get_executor(_get_or_check_processes(num_processes)), queue_size)
+    finally:
+        writer.close()
@@ -1,10 +1,9 @@
-import os
-from concurrent.futures import ProcessPoolExecutor
-from single_node import _find_optimal_threshold, threshold_image
-from custom_thresholding import _find_optimal_threshold_otsu, simple_image_thresholding
+from shared_processing.pool import get_executor, find_available_cores
+from single_node import threshold_image
+from custom_thresholding import _find_optimal_thresholds_from_histograms, _get_histogram, simple_image_thresholding
 from functools import partial
 
-from numpy import array, ndarray, mean, vstack
+from numpy import ndarray, vstack
 
 
 def _get_or_check_processes(num_processes: int = None):
@@ -29,19 +28,32 @@ def _get_or_check_processes(num_processes: int = None):
 
 
 
-def find_available_cores() -> int:
+def get_band_bounds(height: int, num_parts: int) -> list[tuple[int, int]]:
     """
-    Returns the number of available CPU cores on the current system.
+    Computes the row bounds of splitting an image into horizontal bands.
+    Bands differ in at most one row and together cover every row of the image.
+
+    Args:
+        height (int): Number of rows of the image.
+        num_parts (int): Number of bands.
 
     Returns:
-        int: The number of available CPU cores.
+        list[tuple[int, int]]: The first row and the row where every band stops, excluded.
     """
-    return os.cpu_count()
+    num_parts = max(1, min(num_parts, height))
+    base_height, remainder = divmod(height, num_parts)
+    bounds, row_start = [], 0
+    for i in range(num_parts):
+        row_stop = row_start + base_height + (1 if i < remainder else 0)
+        bounds.append((row_start, row_stop))
+        row_start = row_stop
+    return bounds
 
 
-def split_image(img: ndarray, num_parts: int = None) -> ndarray[ndarray]:
+def split_image(img: ndarray, num_parts: int = None) -> list[ndarray]:
     """
     Splits an image matrix into a specified number of parts.
+    The parts are views of the image and, together, cover every row of it.
 
     Args:
         img (ndarray): Matrix representation of the image
@@ -50,15 +62,12 @@ def split_image(img: ndarray, num_parts: int = None) -> ndarray[ndarray]:
         Defaults to None.
 
     Returns:
-        ndarray[ndarray]: List of image parts.
+        list[ndarray]: List of image parts.
     """
     if num_parts is None:
         num_parts = find_available_cores()
     assert isinstance(num_parts, int), "Number of parts for splitting the image must be int"
-    height, width = img.shape[:2]
-    one_part_height = height // num_parts
-    img_parts = [img[i*one_part_height:(i+1)*one_part_height] for i in range(num_parts)]
-    return array(img_parts)
+    return [img[row_start:row_stop] for row_start, row_stop in get_band_bounds(img.shape[0], num_parts)]
 
 
 def _find_parallel_optimal_threshold(img: ndarray, 
@@ -66,35 +75,36 @@ def _find_parallel_optimal_threshold(img: ndarray,
                                      use_cv2: bool = False) -> int:
     """
     Finds the optimal threshold for image thresholding using parallel processing.
-    The optimal threshold is found for every image partition then the mean of all will 
-    be considered as the optimal threshold.
+    Every worker only computes the histogram of its partition, the histograms are
+    summed and Otsu's method runs once over the result, which gives exactly the
+    threshold of the whole image.
 
     Args:
         img (ndarray): Matrix representation of the image.
         num_processes (int, optional): Number of processes to use for parallelization. 
             If not provided, it will use the number of available cores.
             Defaults to None.
+        use_cv2 (bool, optional): Ignored, both algorithms threshold with Otsu's method so the
+            summed histogram gives the same threshold. Kept so positional callers still work.
+            Defaults to False.
 
     Returns:
         int: The optimal threshold for image thresholding.
     """
-    optimal_threshold_algorithm = _find_optimal_threshold_otsu if use_cv2 is False else _find_optimal_threshold
     num_processes:int = _get_or_check_processes(num_processes)
-    img_parts: ndarray = split_image(img) 
-    with ProcessPoolExecutor(max_workers=num_processes) as executor:
-        optimal_threshold_votes: list = list(executor.map(optimal_threshold_algorithm, img_parts))
-    print(f"The optimal thresholds for each partition are: {optimal_threshold_votes}")
-    optimal_threshold = int(mean(optimal_threshold_votes))
+    img_parts: list[ndarray] = split_image(img, num_processes) 
+    hist = sum(get_executor(num_processes, img.size).map(_get_histogram, img_parts))
+    optimal_threshold = int(_find_optimal_thresholds_from_histograms(hist))
     print(f"The optimal threshold is: {optimal_threshold}")
     return optimal_threshold
 
 
-def _merge_img_parts(img_parts: ndarray[ndarray]) -> ndarray:
+def _merge_img_parts(img_parts: list[ndarray]) -> ndarray:
     """
     Merges a list of image parts into a single image matrix.
 
     Args:
-        img_parts (ndarray[ndarray]): List of image parts to be merged.
+        img_parts (list[ndarray]): List of image parts to be merged.
 
     Returns:
         ndarray: Merged image matrix.
@@ -124,14 +134,13 @@ def parallel_thresholding(img,
     """
     thresholding_algorithm = simple_image_thresholding if use_cv2 is False else threshold_image
     num_processes:int = _get_or_check_processes(num_processes)
-    optimal_threshold = _find_parallel_optimal_threshold(img)
-    img_parts: ndarray = split_image(img)
+    img_parts: list[ndarray] = split_image(img, num_processes)
     if optimal_threshold_per_partition is False:
+        optimal_threshold = _find_parallel_optimal_threshold(img, num_processes, use_cv2)
         threshold_n_img = partial(thresholding_algorithm, optimal_threshold=optimal_threshold)
     else: 
         threshold_n_img = thresholding_algorithm
-    with ProcessPoolExecutor(max_workers=num_processes) as executor:
-        thresholded_images: list = list(executor.map(threshold_n_img, img_parts))
+    thresholded_images: list = list(get_executor(num_processes, img.size).map(threshold_n_img, img_parts))
     return _merge_img_parts(thresholded_images)
 
          
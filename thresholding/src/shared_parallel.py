@@ -0,0 +1,150 @@
+from multiprocessing.shared_memory import SharedMemory
+from typing import Union
+from shared_processing.pool import get_executor
+from parallel import _get_or_check_processes, get_band_bounds
+from custom_thresholding import _find_optimal_thresholds_from_histograms, _get_histogram
+
+from numpy import ndarray, dtype, greater, uint8, bool_
+
+
+def _attach_shared_memory(name: str) -> SharedMemory:
+    """
+    Attaches to a shared memory block owned by the parent process.
+
+    Pool workers share the resource tracker of the parent, so the block stays
+    registered once and is only unlinked by the parent.
+
+    Args:
+        name (str): Name of the shared memory block.
+
+    Returns:
+        SharedMemory: The attached block.
+    """
+    try:
+        return SharedMemory(name=name, track=False)  # Python >= 3.13
+    except TypeError:
+        return SharedMemory(name=name)
+
+
+def _histogram_band(img_name: str,
+                    shape: tuple,
+                    img_dtype: str,
+                    row_start: int,
+                    row_stop: int) -> ndarray:
+    """
+    Computes the gray level histogram of a band of rows of the shared image.
+
+    Args:
+        img_name (str): Name of the shared memory block holding the image.
+        shape (tuple): Shape of the image.
+        img_dtype (str): Dtype of the image.
+        row_start (int): First row of the band.
+        row_stop (int): Row where the band stops, excluded.
+
+    Returns:
+        ndarray: The 256 bins histogram of the band.
+    """
+    img_memory = _attach_shared_memory(img_name)
+    try:
+        band = ndarray(shape, dtype=dtype(img_dtype), buffer=img_memory.buf)[row_start:row_stop]
+        hist = _get_histogram(band)
+        del band
+        return hist
+    finally:
+        img_memory.close()
+
+
+def _threshold_band(img_name: str,
+                    out_name: str,
+                    shape: tuple,
+                    img_dtype: str,
+                    row_start: int,
+                    row_stop: int,
+                    optimal_threshold: Union[None, int]) -> int:
+    """
+    Thresholds a band of rows of the shared image straight into the shared output.
+
+    Args:
+        img_name (str): Name of the shared memory block holding the image.
+        out_name (str): Name of the shared memory block holding the output.
+        shape (tuple): Shape of the image.
+        img_dtype (str): Dtype of the image.
+        row_start (int): First row of the band.
+        row_stop (int): Row where the band stops, excluded.
+        optimal_threshold (Union[None, int]): Threshold of the band, if None it is found
+            with Otsu's method over the band.
+
+    Returns:
+        int: The threshold used for the band.
+    """
+    img_memory, out_memory = _attach_shared_memory(img_name), _attach_shared_memory(out_name)
+    try:
+        band = ndarray(shape, dtype=dtype(img_dtype), buffer=img_memory.buf)[row_start:row_stop]
+        out_band = ndarray(shape, dtype=uint8, buffer=out_memory.buf)[row_start:row_stop]
+        if optimal_threshold is None:
+            optimal_threshold = int(_find_optimal_thresholds_from_histograms(_get_histogram(band)))
+        greater(band, optimal_threshold, out=out_band.view(bool_))  # 0 or 1 written in place
+        out_band *= 255
+        del band, out_band  # the buffers can not be closed while views over them exist
+        return optimal_threshold
+    finally:
+        img_memory.close()
+        out_memory.close()
+
+
+def shared_parallel_thresholding(img: ndarray,
+                                 optimal_threshold_per_partition: bool = False,
+                                 num_processes: int = None,
+                                 optimal_threshold: int = None) -> ndarray:
+    """
+    Applies thresholding to an image using parallel processing over shared memory.
+
+    The image is copied once into shared memory, every worker thresholds its band of
+    rows in place into a shared output buffer, so no image part is pickled and no part
+    is merged afterwards. The single threshold is found from the sum of the band
+    histograms. The worker pool is kept alive and reused across calls.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        optimal_threshold_per_partition (bool, optional):
+            If True, uses a different optimal threshold for each band.
+            If False, uses a single optimal threshold for the entire image.
+            Defaults to False.
+        num_processes (int, optional): Number of processes to use for parallelization.
+            If not provided, it will use the number of available cores.
+            Defaults to None.
+        optimal_threshold (int, optional): If provided, the threshold used for the entire image.
+            Defaults to None.
+
+    Returns:
+        ndarray: Thresholded image matrix.
+    """
+    num_processes: int = _get_or_check_processes(num_processes)
+    img_memory = SharedMemory(create=True, size=max(1, img.nbytes))
+    out_memory = SharedMemory(create=True, size=max(1, img.size))
+    try:
+        shared_img = ndarray(img.shape, dtype=img.dtype, buffer=img_memory.buf)
+        shared_img[...] = img
+        executor = get_executor(num_processes, img.size)
+        band_bounds = get_band_bounds(img.shape[0], num_processes)
+        if optimal_threshold is None and optimal_threshold_per_partition is False:
+            hists = [executor.submit(_histogram_band, img_memory.name, img.shape, img.dtype.str, *bounds)
+                     for bounds in band_bounds]
+            optimal_threshold = int(_find_optimal_thresholds_from_histograms(sum(hist.result() for hist in hists)))
+            print(f"The optimal threshold is: {optimal_threshold}")
+        futures = [
+            executor.submit(_threshold_band, img_memory.name, out_memory.name, img.shape, img.dtype.str,
+                            row_start, row_stop, optimal_threshold)
+            for row_start, row_stop in band_bounds
+        ]
+        thresholds = [future.result() for future in futures]
+        if optimal_threshold_per_partition:
+            print(f"The optimal thresholds for each partition are: {thresholds}")
+        thresholded_img = ndarray(img.shape, dtype=uint8, buffer=out_memory.buf).copy()
+        del shared_img
+        return thresholded_img
+    finally:
+        img_memory.close()
+        img_memory.unlink()
+        out_memory.close()
+        out_memory.unlink()
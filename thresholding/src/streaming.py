@@ -0,0 +1,191 @@
+from io import BufferedReader
+from typing import Callable, Iterator
+from custom_thresholding import _find_optimal_thresholds_from_histograms, _get_histogram
+
+from numpy import ndarray, empty, zeros, greater, uint8, int64, bool_
+
+
+def iter_file_strips(bin_file: BufferedReader,
+                     shape: tuple,
+                     img_dtype: str = "uint8",
+                     offset: int = 0,
+                     strip_rows: int = 256) -> Iterator[ndarray]:
+    """
+    Reads the rows of a raw pixel block one strip at a time into a single reused buffer.
+
+    The yielded strip is overwritten by the next one, it must be consumed before
+    asking for the next strip.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        shape (tuple): Shape of the image, (rows, cols) or (rows, cols, dims).
+        img_dtype (str, optional): Dtype of the pixels. Defaults to "uint8".
+        offset (int, optional): Position of the first pixel in the file. Defaults to 0.
+        strip_rows (int, optional): Number of rows of a strip. Defaults to 256.
+
+    Yields:
+        ndarray: The next strip of rows.
+
+    Raises:
+        ValueError: If the file ends before the whole pixel block was read.
+    """
+    strip = empty((strip_rows,) + tuple(shape[1:]), dtype=img_dtype)
+    bin_file.seek(offset)
+    for row_start in range(0, shape[0], strip_rows):
+        rows = strip[:min(strip_rows, shape[0] - row_start)]
+        if bin_file.readinto(memoryview(rows).cast("B")) != rows.nbytes:
+            raise ValueError("Truncated pixel block")
+        yield rows
+
+
+def iter_array_strips(img: ndarray, strip_rows: int = 256) -> Iterator[ndarray]:
+    """
+    Slices an array, usually a numpy memmap, into strips of rows.
+    Only the pages of the current strip of a memmap are read from disk.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        strip_rows (int, optional): Number of rows of a strip. Defaults to 256.
+
+    Yields:
+        ndarray: The next strip of rows.
+    """
+    for row_start in range(0, img.shape[0], strip_rows):
+        yield img[row_start:row_start + strip_rows]
+
+
+def iter_aku_strips(bin_file: BufferedReader, strip_rows: int = 256) -> Iterator[ndarray]:
+    """
+    Reads the pixels of a .aku file of any version one strip at a time.
+
+    Uncompressed pixel blocks are read in strips of strip_rows rows, compressed ones
+    are decompressed one chunk at a time, so a strip has the rows of a chunk.
+    Requires the aku_format package of TelemedicineDataFormat, pip install -e TelemedicineDataFormat/akuFormat.
+
+    Args:
+        bin_file (BufferedReader): Binary file stream.
+        strip_rows (int, optional): Number of rows of a strip of uncompressed files. Defaults to 256.
+
+    Yields:
+        ndarray: The next strip of rows.
+
+    Raises:
+        ValueError: If the file is truncated, corrupted or of an unsupported version.
+    """
+    from aku_format.layout import PIXELS_TAG, read_layout, iter_compressed_chunks  # only needed for .aku files
+
+    layout = read_layout(bin_file)
+    if layout.compressed:
+        yield from iter_compressed_chunks(bin_file, layout)
+        return
+    pixels_offset, _ = layout.sections[PIXELS_TAG]
+    yield from iter_file_strips(bin_file, layout.shape, layout.dtype, pixels_offset, strip_rows)
+
+
+def stream_thresholding(get_strips: Callable[[], Iterator[ndarray]],
+                        output_path: str,
+                        optimal_threshold: int = None) -> int:
+    """
+    Thresholds an image that does not fit in memory, one strip of rows at a time.
+
+    A first pass accumulates the histogram of every strip to find the Otsu threshold
+    of the whole image, a second pass thresholds every strip and appends it to the
+    output, so peak memory is bounded by the strip size.
+
+    Args:
+        get_strips (Callable[[], Iterator[ndarray]]): Returns a new iterator over the strips
+            of the image, it is called once per pass.
+        output_path (str): Path of the raw uint8 output, 0 or 255 per pixel in row order.
+        optimal_threshold (int, optional): If provided, the first pass is skipped and this
+            threshold is used. Defaults to None.
+
+    Returns:
+        int: The threshold used.
+    """
+    if optimal_threshold is None:
+        hist = zeros(256, dtype=int64)  # stays empty when the image has no rows
+        for strip in get_strips():
+            hist += _get_histogram(strip)
+        optimal_threshold = int(_find_optimal_thresholds_from_histograms(hist))
+
+    thresholded_strip = None
+    with open(output_path, "wb") as output_file:
+        for strip in get_strips():
+            if thresholded_strip is None or thresholded_strip.shape[0] < strip.shape[0]:
+                thresholded_strip = empty(strip.shape, dtype=uint8)
+            out_strip = thresholded_strip[:strip.shape[0]]
+            greater(strip, optimal_threshold, out=out_strip.view(bool_))
+            out_strip *= 255
+            output_file.write(memoryview(out_strip).cast("B"))
+    return optimal_threshold
+
+
+def threshold_raw_file(input_path: str,
+                       output_path: str,
+                       shape: tuple,
+                       img_dtype: str = "uint8",
+                       offset: int = 0,
+                       strip_rows: int = 256,
+                       optimal_threshold: int = None) -> int:
+    """
+    Thresholds a raw pixel file one strip of rows at a time.
+
+    Args:
+        input_path (str): Path of the raw pixel file.
+        output_path (str): Path of the raw uint8 output.
+        shape (tuple): Shape of the image, (rows, cols) or (rows, cols, dims).
+        img_dtype (str, optional): Dtype of the pixels. Defaults to "uint8".
+        offset (int, optional): Position of the first pixel in the file. Defaults to 0.
+        strip_rows (int, optional): Number of rows of a strip. Defaults to 256.
+        optimal_threshold (int, optional): If provided, the threshold used. Defaults to None.
+
+    Returns:
+        int: The threshold used.
+    """
+    def get_strips() -> Iterator[ndarray]:
+        with open(input_path, "rb") as bin_file:
+            yield from iter_file_strips(bin_file, shape, img_dtype, offset, strip_rows)
+
+    return stream_thresholding(get_strips, output_path, optimal_threshold)
+
+
+def threshold_aku_file(input_path: str,
+                       output_path: str,
+                       strip_rows: int = 256,
+                       optimal_threshold: int = None) -> int:
+    """
+    Thresholds the pixels of a .aku file one strip of rows at a time.
+
+    Args:
+        input_path (str): Path of the .aku file.
+        output_path (str): Path of the raw uint8 output.
+        strip_rows (int, optional): Number of rows of a strip of uncompressed files. Defaults to 256.
+        optimal_threshold (int, optional): If provided, the threshold used. Defaults to None.
+
+    Returns:
+        int: The threshold used.
+    """
+    def get_strips() -> Iterator[ndarray]:
+        with open(input_path, "rb") as bin_file:
+            yield from iter_aku_strips(bin_file, strip_rows)
+
+    return stream_thresholding(get_strips, output_path, optimal_threshold)
+
+
+def threshold_array_streaming(img: ndarray,
+                              output_path: str,
+                              strip_rows: int = 256,
+                              optimal_threshold: int = None) -> int:
+    """
+    Thresholds an array, usually a numpy memmap, one strip of rows at a time.
+
+    Args:
+        img (ndarray): Matrix representation of the image.
+        output_path (str): Path of the raw uint8 output.
+        strip_rows (int, optional): Number of rows of a strip. Defaults to 256.
+        optimal_threshold (int, optional): If provided, the threshold used. Defaults to None.
+
+    Returns:
+        int: The threshold used.
+    """
+    return stream_thresholding(lambda: iter_array_strips(img, strip_rows), output_path, optimal_threshold)
@@ -1,8 +1,10 @@
-import timeit
 import os
 from single_node import threshold_image
 from custom_thresholding import simple_image_thresholding
-from parallel import parallel_thresholding
+from parallel import parallel_thresholding, split_image, find_available_cores
+from shared_parallel import shared_parallel_thresholding
+from shared_processing.benchmarking import measure_func_time, summarize_times, echo, measure_pool_overheads
+from shared_processing.benchmarking import save_results, compare_with_baseline  # noqa: F401, kept importable from tests
 
 import cv2
 import pandas as pd
@@ -11,23 +13,6 @@ import matplotlib.pyplot as plt
 from numpy import ndarray
 
 
-def _measure_func_time(func) -> float:
-    """
-    Measures the execution time of a given function.
-
-    Args:
-        func (Callable): The function for which the execution time needs to be measured.
-
-    Returns:
-        float: The elapsed time in milliseconds for the execution of the provided function.
-    """
-    start_time = timeit.default_timer()
-    func
-    end_time = timeit.default_timer()
-    elapsed_time = (end_time - start_time) * 1000 #Miliseconds
-    return elapsed_time
-
-
 def _get_file_name(file_path: str):
     """
     Extracts the file name from the given file path.
@@ -43,7 +28,9 @@ def _get_file_name(file_path: str):
 
 def benchmark(img_paths: list[str], 
               img_sizes:list[tuple] = [(300, 300), (900, 900), (2700, 2700)],
-              use_cv2: bool = False) -> list[pd.DataFrame]:
+              use_cv2: bool = False,
+              warmup: int = 1,
+              repeat: int = 5) -> list[pd.DataFrame]:
     """
     Benchmarks image processing algorithms on a set of images with different sizes.
     In case the use_cv2 argument is False the custom_thresholding simple_image_thresholding algorithm
@@ -55,32 +42,85 @@ def benchmark(img_paths: list[str],
             Defaults to [(300, 300), (900, 900), (2700, 2700)].
         use_cv2 (bool, optional): A flag indicating whether to use the OpenCV library for image processing.
             Defaults to False.
+        warmup (int, optional): Number of untimed calls of every algorithm. Defaults to 1.
+        repeat (int, optional): Number of timed calls of every algorithm. Defaults to 5.
 
     Returns:
-        list[pd.DataFrame]: A list of Pandas DataFrames containing benchmarking results for each image.
+        list[pd.DataFrame]: A list of Pandas DataFrames containing benchmarking results for each image,
+            the median time of every algorithm and its 95th percentile in the _p95 columns.
     """
     thresholding_algorithm = simple_image_thresholding if use_cv2 is False else threshold_image
+    algorithms = {
+        "threshold_single_node_time": lambda img: thresholding_algorithm(img),
+        "voting_parallel_thresholding_time": lambda img: parallel_thresholding(img, False, use_cv2=use_cv2),
+        "non_voting_parallel_thresholding_time": lambda img: parallel_thresholding(img, True, use_cv2=use_cv2),
+        "shared_parallel_thresholding_time": lambda img: shared_parallel_thresholding(img),
+    }
     results = []
     for path in img_paths:
-        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        original_img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
         total_times = []
         for size in img_sizes:
-            img = cv2.resize(img, size)
-            threshold_single_node_time: float = _measure_func_time(thresholding_algorithm(img))
-            voting_parallel_thresholding_time:float = _measure_func_time(parallel_thresholding(img, False, use_cv2=use_cv2))
-            non_voting_parallel_thresholding_time: float = _measure_func_time(parallel_thresholding(img, True, use_cv2=use_cv2))
-            times_taken = [threshold_single_node_time,
-                            voting_parallel_thresholding_time,
-                            non_voting_parallel_thresholding_time,
-                            size]
+            img = cv2.resize(original_img, size)
+            times_taken = {"size": size}
+            for name, algorithm in algorithms.items():
+                summary = summarize_times(measure_func_time(lambda: algorithm(img), warmup, repeat))
+                times_taken[name] = summary["median_ms"]
+                times_taken[f"{name}_p95"] = summary["p95_ms"]
             total_times.append(times_taken)
-        time_df = pd.DataFrame(columns=["threshold_single_node_time", "voting_parallel_thresholding_time", "non_voting_parallel_thresholding_time", "size"],
-                               data= total_times)
+        time_df = pd.DataFrame(total_times)
         time_df["file_name"] = _get_file_name(path)
         results.append(time_df)
     return results
 
 
+def benchmark_scaling(img_paths: list[str],
+                      img_sizes: list[tuple] = [(500, 500), (1000, 1000), (2000, 2000)],
+                      workers: list[int] = None,
+                      use_cv2: bool = False,
+                      warmup: int = 1,
+                      repeat: int = 5) -> pd.DataFrame:
+    """
+    Measures how every algorithm scales with the image size and the number of workers.
+
+    Args:
+        img_paths (list[str]): A list of file paths to the images for benchmarking.
+        img_sizes (list[tuple], optional): A list of tuples representing different image sizes to be tested.
+            Defaults to [(500, 500), (1000, 1000), (2000, 2000)].
+        workers (list[int], optional): Numbers of worker processes to be tested.
+            Defaults to the powers of two up to the number of cores.
+        use_cv2 (bool, optional): A flag indicating whether to use the OpenCV library for image processing.
+            Defaults to False.
+        warmup (int, optional): Number of untimed calls of every algorithm. Defaults to 1.
+        repeat (int, optional): Number of timed calls of every algorithm. Defaults to 5.
+
+    Returns:
+        pd.DataFrame: One row per image, size, algorithm and number of workers with its
+            time summary and, for parallel_thresholding, the startup, IPC and compute costs of its persistent pool.
+    """
+    if workers is None:
+        workers = [2**i for i in range(find_available_cores().bit_length()) if 2**i <= find_available_cores()]
+    thresholding_algorithm = simple_image_thresholding if use_cv2 is False else threshold_image
+    rows = []
+    for path in img_paths:
+        original_img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        for size in img_sizes:
+            img = cv2.resize(original_img, size)
+            key = {"file_name": _get_file_name(path), "size": f"{size[0]}x{size[1]}", "pixels": size[0]*size[1]}
+            single_node = summarize_times(measure_func_time(lambda: thresholding_algorithm(img), warmup, repeat))
+            rows.append({**key, "algorithm": "single_node", "workers": 1, **single_node})
+            for num_processes in workers:
+                parallel = summarize_times(measure_func_time(
+                    lambda: parallel_thresholding(img, False, num_processes, use_cv2), warmup, repeat))
+                overheads = measure_pool_overheads([(echo, split_image(img, num_processes))], lambda: thresholding_algorithm(img),
+                                                   num_processes, img.size, warmup, repeat)
+                rows.append({**key, "algorithm": "parallel", "workers": num_processes, **parallel, **overheads})
+                shared = summarize_times(measure_func_time(
+                    lambda: shared_parallel_thresholding(img, num_processes=num_processes), warmup, repeat))
+                rows.append({**key, "algorithm": "shared_parallel", "workers": num_processes, **shared})
+    return pd.DataFrame(rows)
+
+
 def plot_benchmarking(img_paths: list[str], 
                      img_sizes:list[tuple] = [(1000, 1000), (2000, 2000), (3000, 3000), (4000, 4000), (5000, 5000)],
                      use_cv2: bool = False) -> list[pd.DataFrame]:
@@ -112,7 +152,8 @@ def plot_benchmarking(img_paths: list[str],
         """
         metrics_cols = ["threshold_single_node_time", 
                         "voting_parallel_thresholding_time", 
-                        "non_voting_parallel_thresholding_time"]
+                        "non_voting_parallel_thresholding_time",
+                        "shared_parallel_thresholding_time"]
         flag = True if len(images_metrics) == 1 else False
         for i, image_metric in enumerate(images_metrics):
             for metric_col in metrics_cols:
@@ -138,4 +179,17 @@ def plot_benchmarking(img_paths: list[str],
     _, axes = plt.subplots(ncols=len(results), 
                            figsize=(12, 5))
     axes = plot_results(results, axes)
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+
+def plot_scaling(results: pd.DataFrame) -> None:
+    """
+    Plots the scaling curves of benchmark_scaling, median time against size for every
+    algorithm and number of workers.
+
+    Args:
+        results (pd.DataFrame): The results of benchmark_scaling.
+    """
+    results = results.assign(curve=results["algorithm"] + " x" + results["workers"].astype(str))
+    sns.lineplot(data=results, x="pixels", y="median_ms", hue="curve", marker="o")
+    plt.show()